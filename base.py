@@ -6,11 +6,16 @@
          Parser、Storage 等所有处理单元共同遵守的接口契约。
          Bus 调度器的注册表值类型均为 HandlerBase，子协程通过统一调用
          handle() 方法完成任务分发与处理，实现各处理单元之间的解耦。
-         本文件为纯接口定义，不含任何运行时逻辑。
+         handle_batch() 为可选的批量入口，Bus 对配置了批处理策略的任务类型攒批后调用；
+         默认实现逐个调用 handle()，子类可覆写以合并 I/O（如单条多行 SQL、单次提交）。
+         handle() 也可以返回异步迭代器，Bus 边迭代边将产出的任务投回队列，下游无需等待整批处理结束。
+         inline 为 True 的处理器声明自身是纯同步、不阻塞的（handle() 内不做 I/O、不挂起），
+         Bus 可在上游处理器产出其任务时直接内联调用，不经队列与子协程。
 """
 
 from abc import ABC, abstractmethod
-from collections.abc import Iterable
+from collections.abc import AsyncIterator, Iterable, Sequence
+from typing import ClassVar
 
 from data import TaskBaseData
 
@@ -23,22 +28,48 @@ class HandlerBase[T: TaskBaseData](ABC):
              可通过统一接口调用全部处理单元。
     """
 
+    # 是否可由 Bus 内联执行：为 True 时 handle() 须不 await 任何 I/O、不依赖并发槽位与期限
+    inline: ClassVar[bool] = False
+
     @abstractmethod
-    async def handle(self, task: T) -> Iterable[TaskBaseData | None] | TaskBaseData | None:
+    async def handle(self, task: T) -> AsyncIterator[TaskBaseData | None] | Iterable[TaskBaseData | None] | TaskBaseData | None:
         """
         @brief 处理一个总线数据包并返回后续任务
         @details Bus 子协程从队列取出数据包后调用此方法。子类须根据任务类型
                  完成实际处理逻辑，并将产生的后续任务以返回值形式交还给 Bus。
                  Bus 对返回值的处理规则：
+                 - 异步迭代器：每产出一个数据包即投回队列，迭代结束后本任务才算完成；
+                   被取消（如处理期限到期）时，迭代器可在重新抛出 CancelledError 前产出未完成部分的后续任务；
                  - 可迭代对象：逐一将其中的数据包投回队列；
                  - 单个 TaskBaseData：直接投回队列；
                  - None：链路终止，无后续操作。
         @param task 从总线队列取出的数据包，实际类型为 TaskBaseData 的某个子类
-        @return Iterable[TaskBaseData] 多个后续任务，由 Bus 逐一投回队列；
+        @return AsyncIterator[TaskBaseData] 陆续产生的后续任务，由 Bus 边迭代边投回队列；
+                Iterable[TaskBaseData] 多个后续任务，由 Bus 逐一投回队列；
                 TaskBaseData 单个后续任务，由 Bus 直接投回队列；
                 None 无后续任务，当前处理链路终止
         """
 
+    async def handle_batch(self, tasks: Sequence[T]) -> Iterable[TaskBaseData | None] | TaskBaseData | None:
+        """
+        @brief 批量处理同一类型的多个数据包并返回全部后续任务
+        @details Bus 按批处理策略攒够 max_size 个或等待满 max_linger 秒后调用，一批只占用一个并发槽位。
+                 返回值规则与 handle() 相同。默认实现按顺序逐个调用 handle() 并合并结果
+                 （异步迭代器在此处迭代完毕），子类可覆写以合并 I/O。
+        @param tasks 同一具体类型的数据包序列，至少一个
+        @return 全部后续任务
+        """
+        results: list[TaskBaseData | None] = []
+        for task in tasks:
+            result = await self.handle(task)
+            if isinstance(result, AsyncIterator):
+                results.extend([item async for item in result])
+            elif isinstance(result, Iterable):
+                results.extend(result)
+            else:
+                results.append(result)
+        return results
+
 
 if __name__ == '__main__':
     pass
@@ -0,0 +1,11 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 性能基准测试包
+@details 各基准脚本以 `python -m benchmarks.<name>` 方式在项目根目录运行，
+         不访问网络与数据库，结果以 JSON 输出便于跨次运行对比。
+         延迟分位数的计算与命令行 --output / JSON 输出由 benchmarks._common 统一提供。
+"""
+
+if __name__ == '__main__':
+    pass
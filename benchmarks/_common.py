@@ -0,0 +1,54 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 基准脚本共用的统计与输出工具
+@details percentiles_ms() 统一延迟分位数的计算口径；report_parser() 构造带 --output 参数的命令行解析器，
+         emit_report() 将结果以 JSON 写入文件或打印到标准输出，各基准脚本的入口只需声明自身参数并调用 main()。
+"""
+
+import argparse
+import json
+from statistics import quantiles
+
+
+def percentiles_ms(values: list[float]) -> dict[str, float]:
+    """
+    @brief 计算延迟分位数
+    @details 样本少于两个时无法切分，各分位数均取最大值。
+    @param values 延迟样本（秒）
+    @return p50 / p95 / p99 / max（毫秒）
+    """
+    if len(values) < 2:
+        top = max(values, default=0.0) * 1000
+        return {'p50_ms': top, 'p95_ms': top, 'p99_ms': top, 'max_ms': top}
+    cuts = quantiles(values, n=100)
+    return {'p50_ms': cuts[49] * 1000, 'p95_ms': cuts[94] * 1000, 'p99_ms': cuts[98] * 1000, 'max_ms': max(values) * 1000}
+
+
+def report_parser(description: str) -> argparse.ArgumentParser:
+    """
+    @brief 构造基准脚本的命令行解析器，预置 --output 参数
+    @param description 基准说明
+    @return 命令行解析器，调用方继续添加自身参数
+    """
+    arg_parser = argparse.ArgumentParser(description=description)
+    arg_parser.add_argument('--output', type=str, default=None, help='结果 JSON 输出路径，缺省打印到标准输出')
+    return arg_parser
+
+
+def emit_report(report: dict[str, object], output: str | None) -> None:
+    """
+    @brief 输出基准结果
+    @param report 基准结果
+    @param output JSON 输出路径，None 表示打印到标准输出
+    """
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,284 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief Bangumi API 本地替身
+@details 在 StandinServer 上挂载 BangumiRoute，为本项目消费的三类接口生成合成但结构真实的响应：
+         - GET /calendar：一周七天的放送日历，包含全部 N 个条目的评分快照；
+         - GET /v0/subjects/{id}：条目详情，含 infobox 别名、标签与指向 lain.bgm.tv 的封面地址，超出范围的 id 返回 404；
+         - GET /pic/cover/...：封面图（JPEG 头尾加伪随机字节），大小在 cover_bytes 上下浮动。
+         同一 (seed, id) 的响应内容固定，多次运行可直接对比。API 与封面路径互不重叠，两个主机可共用同一端口。
+         延迟分布、429 / 5xx 比例与慢速响应体由 StandinConfig 注入。
+         爬虫侧以 [http:<host>] connect_to 把 api.bgm.tv 与 lain.bgm.tv 的连接指向替身，
+         请求 URL 不变，HTTPX_ROUTES 路由、限速器与缓存仍按原主机名工作。
+         用法：python -m benchmarks.bangumi_standin --port 8901 --subjects 2000 --latency-ms 50 --distribution lognormal \\
+               --rate-limited 0.02 --server-errors 0.01 --slow-bodies 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import cache
+from logging import getLogger
+
+from benchmarks.standin import Distribution, Reply, StandinConfig, StandinServer
+
+logger = getLogger(__name__)
+
+_SUBJECT_PATH = re.compile(r'/v0/subjects/(\d+)')
+_COVER_PATH = re.compile(r'/pic/cover/[a-z]/[0-9a-f]{2}/[0-9a-f]{2}/(\d+)_\w+\.jpg')
+
+_WEEKDAYS: tuple[tuple[str, str, str], ...] = (
+    ('Mon', '星期一', '月耀日'),
+    ('Tue', '星期二', '火耀日'),
+    ('Wed', '星期三', '水耀日'),
+    ('Thu', '星期四', '木耀日'),
+    ('Fri', '星期五', '金耀日'),
+    ('Sat', '星期六', '土耀日'),
+    ('Sun', '星期日', '日耀日'),
+)
+_TAGS: tuple[str, ...] = ('TV', '原创', '漫画改', '轻小说改', '搞笑', '日常', '奇幻', '科幻', '恋爱', '百合', '战斗', '校园', '治愈', '悬疑')
+_SYLLABLES: tuple[str, ...] = ('ka', 'na', 'mi', 'to', 'ri', 'so', 'ra', 'yu', 'ki', 'ha', 'no', 'se', 'shi', 'ro')
+_HANZI: str = '星之空海月花夜光少女物语世界魔法学园日常旅途约定记忆'
+
+
+def _not_found() -> Reply:
+    """
+    @brief 404 响应
+    @return 与 Bangumi API 格式一致的 404 响应
+    """
+    return Reply(404, b'{"title":"Not Found","description":"resource can\'t be found in the database or has been removed"}')
+
+
+@dataclass(frozen=True)
+class BangumiRoute(object):
+    """
+    @brief Bangumi API 替身路由
+    @details 可 pickle，可直接作为 run_in_process() 的路由函数。
+    @param subjects 条目数量
+    @param first_id 第一个条目 id
+    @param cover_bytes 封面图平均字节数
+    @param cover_host 封面图主机名
+    @param seed 生成内容的随机数种子
+    """
+    subjects: int = 1000              # 条目数量
+    first_id: int = 1                 # 第一个条目 id
+    cover_bytes: int = 65536          # 封面图平均字节数
+    cover_host: str = 'lain.bgm.tv'   # 封面图主机名
+    seed: int = 0                     # 内容种子
+
+    def __call__(self, method: str, target: str) -> Reply:
+        """
+        @brief 按路径生成响应
+        @param method 请求方法
+        @param target 请求路径（含查询串）
+        @return 响应
+        """
+        path: str = target.partition('?')[0]
+        if method not in ('GET', 'HEAD'):
+            return Reply(405, b'{"title":"Method Not Allowed"}')
+        if path == '/calendar':
+            return Reply(200, _calendar(self))
+        if match := _SUBJECT_PATH.fullmatch(path):
+            subject_id = int(match.group(1))
+            return Reply(200, json.dumps(self.subject(subject_id), ensure_ascii=False).encode()) if self._known(subject_id) else _not_found()
+        if match := _COVER_PATH.fullmatch(path):
+            subject_id = int(match.group(1))
+            return Reply(200, self.cover(subject_id), 'image/jpeg') if self._known(subject_id) else _not_found()
+        return _not_found()
+
+    def subject(self, subject_id: int) -> dict:
+        """
+        @brief 生成 /v0/subjects/{id} 的条目详情
+        @param subject_id 条目 id
+        @return 条目详情字典
+        """
+        rng = self._random(subject_id)
+        name = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(3, 7))).capitalize()
+        name_cn = ''.join(rng.choices(_HANZI, k=rng.randint(3, 8)))
+        aired = date(2020, 1, 1) + timedelta(days=rng.randrange(2500))
+        rating = self._rating(rng)
+        return {
+            'id': subject_id,
+            'type': 2,
+            'name': name,
+            'name_cn': name_cn,
+            'summary': '。'.join(''.join(rng.choices(_HANZI, k=rng.randint(10, 30))) for _ in range(rng.randint(2, 6))),
+            'date': aired.isoformat(),
+            'platform': 'TV',
+            'images': self._images(subject_id),
+            'infobox': [
+                {'key': '中文名', 'value': name_cn},
+                {'key': '别名', 'value': [{'v': f'{name} {suffix}'} for suffix in ('S2', 'The Animation')[:rng.randint(0, 2)]]},
+                {'key': '话数', 'value': str(rng.choice((12, 13, 24, 25)))},
+                {'key': '放送开始', 'value': f'{aired.year}年{aired.month}月{aired.day}日'},
+            ],
+            'tags': [{'name': tag, 'count': rng.randint(1, 5000)} for tag in rng.sample(_TAGS, rng.randint(2, 8))],
+            'rating': rating,
+            'collection': {'wish': rng.randint(0, 5000), 'collect': rng.randint(0, 20000), 'doing': rng.randint(0, 5000), 'on_hold': rng.randint(0, 1000), 'dropped': rng.randint(0, 1000)},
+            'eps': 12,
+            'total_episodes': 12,
+            'volumes': 0,
+            'locked': False,
+            'nsfw': False,
+        }
+
+    def calendar_item(self, subject_id: int) -> dict:
+        """
+        @brief 生成 /calendar 中的单个条目
+        @param subject_id 条目 id
+        @return 日历条目字典，评分与条目详情一致
+        """
+        subject = self.subject(subject_id)
+        return {
+            'id': subject_id,
+            'url': f'http://bgm.tv/subject/{subject_id}',
+            'type': 2,
+            'name': subject['name'],
+            'name_cn': subject['name_cn'],
+            'summary': '',
+            'air_date': subject['date'],
+            'air_weekday': self._weekday(subject_id) + 1,
+            'rating': {key: subject['rating'][key] for key in ('total', 'count', 'score')},
+            'rank': subject['rating']['rank'],
+            'images': subject['images'],
+            'collection': {'doing': subject['collection']['doing']},
+        }
+
+    def cover(self, subject_id: int) -> bytes:
+        """
+        @brief 生成封面图字节
+        @param subject_id 条目 id
+        @return JPEG 头尾包裹的伪随机字节，长度在 cover_bytes 的 ±50% 内
+        """
+        rng = self._random(subject_id)
+        size = max(rng.randint(self.cover_bytes // 2, self.cover_bytes * 3 // 2), 4)
+        return b'\xff\xd8\xff\xe0' + rng.randbytes(size - 4) + b'\xff\xd9'
+
+    def _known(self, subject_id: int) -> bool:
+        """
+        @brief 判断 id 是否在生成范围内
+        @param subject_id 条目 id
+        @return 在范围内时返回 True
+        """
+        return self.first_id <= subject_id < self.first_id + self.subjects
+
+    def _random(self, subject_id: int) -> random.Random:
+        """
+        @brief 条目专属的随机数生成器，保证同一 (seed, id) 内容固定
+        @param subject_id 条目 id
+        @return 随机数生成器
+        """
+        return random.Random(f'{self.seed}:{subject_id}')
+
+    def _weekday(self, subject_id: int) -> int:
+        """
+        @brief 条目的放送星期
+        @param subject_id 条目 id
+        @return 0（周一）至 6（周日）
+        """
+        return (subject_id - self.first_id) % 7
+
+    def _images(self, subject_id: int) -> dict[str, str]:
+        """
+        @brief 生成各尺寸的封面地址
+        @param subject_id 条目 id
+        @return 尺寸 → URL
+        """
+        tag = f'{subject_id * 2654435761 & 0xffffffff:08x}'
+        return {
+            size: f'https://{self.cover_host}/pic/cover/{size[0]}/{tag[:2]}/{tag[2:4]}/{subject_id}_{tag[4:]}.jpg'
+            for size in ('large', 'common', 'medium', 'small', 'grid')
+        }
+
+    @staticmethod
+    def _rating(rng: random.Random) -> dict:
+        """
+        @brief 生成评分分布
+        @param rng 条目专属的随机数生成器
+        @return rank / total / count / score
+        """
+        count = {str(score): rng.randint(0, 400) for score in range(1, 11)}
+        total = sum(count.values())
+        score = sum(int(k) * v for k, v in count.items()) / total if total else 0
+        return {'rank': rng.randint(1, 8000), 'total': total, 'count': count, 'score': round(score, 1)}
+
+
+@cache
+def _calendar(route: BangumiRoute) -> bytes:
+    """
+    @brief 生成并缓存 /calendar 响应体
+    @param route 路由配置
+    @return 按星期分组的日历 JSON
+    """
+    days: list[dict] = [
+        {'weekday': {'en': en, 'cn': cn, 'ja': ja, 'id': i + 1}, 'items': []}
+        for i, (en, cn, ja) in enumerate(_WEEKDAYS)
+    ]
+    for subject_id in range(route.first_id, route.first_id + route.subjects):
+        days[route._weekday(subject_id)]['items'].append(route.calendar_item(subject_id))
+    return json.dumps(days, ensure_ascii=False).encode()
+
+
+async def serve(config: StandinConfig, route: BangumiRoute, host: str, port: int) -> None:
+    """
+    @brief 在前台运行替身服务器，直到被中断
+    @param config 服务器配置
+    @param route Bangumi 路由
+    @param host 监听地址
+    @param port 监听端口
+    """
+    server = StandinServer(config, route)
+    port = await server.start(host, port)
+    _calendar(route)
+    print(
+        f'# Bangumi 替身已监听 {host}:{port}，{route.subjects} 个条目；在爬虫配置中加入：\n'
+        f'[http:api.bgm.tv]\nconnect_to = {host}:{port}\n\n[http:{route.cover_host}]\nconnect_to = {host}:{port}',
+        flush=True,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        logger.info(f"连接 {server.connections}，注入 {server.injected}")
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Bangumi API 本地替身服务器')
+    arg_parser.add_argument('--host', type=str, default='127.0.0.1', help='监听地址')
+    arg_parser.add_argument('--port', type=int, default=8901, help='监听端口')
+    arg_parser.add_argument('--subjects', type=int, default=1000, help='条目数量')
+    arg_parser.add_argument('--first-id', type=int, default=1, help='第一个条目 id')
+    arg_parser.add_argument('--cover-kb', type=int, default=64, help='封面图平均大小（KiB）')
+    arg_parser.add_argument('--latency-ms', type=float, default=0.0, help='单请求延迟（毫秒），非固定分布时为均值或中位数')
+    arg_parser.add_argument('--distribution', type=str, default='fixed', choices=[d.value for d in Distribution], help='延迟分布')
+    arg_parser.add_argument('--sigma', type=float, default=0.5, help='对数正态分布形状参数')
+    arg_parser.add_argument('--handshake-ms', type=float, default=0.0, help='建连延迟（毫秒）')
+    arg_parser.add_argument('--rate-limited', type=float, default=0.0, help='返回 429 的请求比例')
+    arg_parser.add_argument('--retry-after', type=float, default=1.0, help='429 响应的 Retry-After 秒数')
+    arg_parser.add_argument('--server-errors', type=float, default=0.0, help='返回 5xx 的请求比例')
+    arg_parser.add_argument('--slow-bodies', type=float, default=0.0, help='慢速写出响应体的请求比例')
+    arg_parser.add_argument('--slow-kbps', type=float, default=64.0, help='慢速响应体写出速率（KiB/s）')
+    arg_parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    args = arg_parser.parse_args()
+
+    standin_config = StandinConfig(
+        latency=args.latency_ms / 1000,
+        handshake=args.handshake_ms / 1000,
+        distribution=Distribution(args.distribution),
+        latency_sigma=args.sigma,
+        rate_limited=args.rate_limited,
+        retry_after=args.retry_after,
+        server_errors=args.server_errors,
+        slow_bodies=args.slow_bodies,
+        slow_body_bps=int(args.slow_kbps * 1024),
+        seed=args.seed,
+    )
+    bangumi_route = BangumiRoute(subjects=args.subjects, first_id=args.first_id, cover_bytes=args.cover_kb << 10, seed=args.seed)
+    try:
+        asyncio.run(serve(standin_config, bangumi_route, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
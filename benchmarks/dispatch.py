@@ -0,0 +1,167 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief Bus 调度微基准套件
+@details 以合成处理器构造 Bus，不访问网络与数据库，覆盖四类负载：
+         - noop：无工作、扇出 1 的长链路，测量纯调度开销；
+         - fanout：扇出 N 的树形链路，测量队列堆积与回投开销；
+         - sleep：每跳 asyncio.sleep，测量 I/O 等待型处理器下的并发收益；
+         - cpu：每跳纯 Python 计算，测量阻塞事件循环时的调度延迟。
+         对每个 (负载, max_concurrent_tasks, max_queue_size) 组合测量吞吐量（任务/秒）、
+         单跳调度延迟分位数、峰值 RSS，并在单独一轮中以 tracemalloc 统计内存分配峰值与任务对象数。
+         每个组合默认在独立子进程中运行，使峰值 RSS 互不干扰。结果以 JSON 输出便于跨次运行对比。
+         用法：python -m benchmarks.dispatch --cases noop,fanout --concurrency 10,100,1000 --queue-sizes 0,1000
+"""
+
+import asyncio
+import resource
+import sys
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from multiprocessing import get_context
+
+from benchmarks._common import emit_report, percentiles_ms, report_parser
+from benchmarks.synthetic import ChainHandler, SyntheticTask, Work, expected_tasks
+from bus import Bus, BusConfig
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Case(object):
+    """
+    @brief 单个负载定义
+    @param name 负载名
+    @param seeds 种子任务数
+    @param depth 每个种子的链路深度
+    @param fan_out 每跳扇出
+    @param work 工作类型
+    @param amount 工作量：SLEEP 为秒数，CPU 为循环次数
+    """
+    name: str          # 负载名
+    seeds: int         # 种子任务数
+    depth: int         # 链路深度
+    fan_out: int       # 每跳扇出
+    work: Work         # 工作类型
+    amount: float      # 工作量
+
+
+CASES: dict[str, Case] = {
+    'noop':   Case('noop',   seeds=500, depth=40, fan_out=1, work=Work.NOOP,  amount=0),
+    'fanout': Case('fanout', seeds=5,   depth=6,  fan_out=4, work=Work.NOOP,  amount=0),
+    'sleep':  Case('sleep',  seeds=500, depth=10, fan_out=1, work=Work.SLEEP, amount=0.001),
+    'cpu':    Case('cpu',    seeds=100, depth=10, fan_out=1, work=Work.CPU,   amount=2000),
+}
+
+
+def _peak_rss_kib() -> int:
+    """
+    @brief 当前进程的峰值常驻内存
+    @return 峰值 RSS（KiB）；macOS 下 ru_maxrss 单位为字节，统一换算
+    """
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+async def _run(case: Case, concurrency: int, queue_size: int, latencies: list[float] | None) -> tuple[int, float]:
+    """
+    @brief 构造 Bus 并运行一次负载
+    @param case 负载定义
+    @param concurrency max_concurrent_tasks
+    @param queue_size max_queue_size
+    @param latencies 收集单跳延迟的列表，None 表示不收集
+    @return (处理任务数, 耗时秒)
+    """
+    handler = ChainHandler(case.fan_out, case.work, case.amount, latencies)
+    bus = Bus(BusConfig(
+        dispatch_registry={SyntheticTask: handler},
+        max_concurrent_tasks=concurrency,
+        max_queue_size=queue_size,
+    ))
+    summary = await bus.run_until_idle(SyntheticTask(case.depth) for _ in range(case.seeds))
+    return summary.handled, summary.elapsed_seconds
+
+
+def run_case(case: Case, concurrency: int, queue_size: int) -> dict[str, object]:
+    """
+    @brief 运行单个组合：一轮计时与延迟统计，一轮 tracemalloc 分配统计
+    @details 两轮分开进行，避免 tracemalloc 的开销污染吞吐与延迟数据。
+    @param case 负载定义
+    @param concurrency max_concurrent_tasks
+    @param queue_size max_queue_size
+    @return 结果字典
+    """
+    latencies: list[float] = []
+    handled, elapsed = asyncio.run(_run(case, concurrency, queue_size, latencies))
+    peak_rss: int = _peak_rss_kib()
+
+    tracemalloc.start()
+    asyncio.run(_run(case, concurrency, queue_size, None))
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sample = SyntheticTask(0)
+    return {
+        'case': case.name,
+        'max_concurrent_tasks': concurrency,
+        'max_queue_size': queue_size,
+        'tasks': handled,
+        'expected_tasks': expected_tasks(case.seeds, case.fan_out, case.depth),
+        'elapsed_seconds': elapsed,
+        'tasks_per_second': handled / elapsed,
+        'hop_latency': percentiles_ms(latencies),
+        'peak_rss_kib': peak_rss,
+        'traced_peak_kib': traced_peak / 1024,
+        'traced_peak_bytes_per_task': traced_peak / handled,
+        'task_objects': handled,
+        'task_object_bytes': sys.getsizeof(sample) + sys.getsizeof(sample.__dict__),
+    }
+
+
+def main(cases: list[str], concurrency: list[int], queue_sizes: list[int], isolate: bool) -> dict[str, object]:
+    """
+    @brief 运行全部组合
+    @param cases 负载名列表
+    @param concurrency max_concurrent_tasks 取值列表
+    @param queue_sizes max_queue_size 取值列表
+    @param isolate 是否每个组合在独立子进程中运行
+    @return 基准结果字典
+    """
+    combos = [(CASES[name], c, q) for name in cases for c in concurrency for q in queue_sizes]
+    results: list[dict[str, object]] = []
+    for case, c, q in combos:
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                results.append(executor.submit(run_case, case, c, q).result())
+        else:
+            results.append(run_case(case, c, q))
+        logger.info(f"{case.name} c={c} q={q} 完成")
+
+    return {
+        'python': sys.version.split()[0],
+        'cases': {name: {**asdict(CASES[name]), 'work': CASES[name].work.value} for name in cases},
+        'results': results,
+    }
+
+
+def _int_list(text: str) -> list[int]:
+    """
+    @brief 解析逗号分隔的整数列表
+    @param text 如 "10,100,1000"
+    @return 整数列表
+    """
+    return [int(part) for part in text.split(',') if part.strip()]
+
+
+if __name__ == '__main__':
+    arg_parser = report_parser('Bus 调度微基准套件')
+    arg_parser.add_argument('--cases', type=str, default=','.join(CASES), help=f"负载名，逗号分隔，可选 {', '.join(CASES)}")
+    arg_parser.add_argument('--concurrency', type=_int_list, default=[10, 100, 1000], help='max_concurrent_tasks 取值，逗号分隔')
+    arg_parser.add_argument('--queue-sizes', type=_int_list, default=[0, 1000], help='max_queue_size 取值，逗号分隔，0 表示无界')
+    arg_parser.add_argument('--in-process', action='store_true', help='在当前进程中依次运行（峰值 RSS 为累计值）')
+    args = arg_parser.parse_args()
+
+    report = main([name.strip() for name in args.cases.split(',')], args.concurrency, args.queue_sizes, not args.in_process)
+    emit_report(report, args.output)
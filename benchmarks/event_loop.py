@@ -0,0 +1,86 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 事件循环实现对比基准
+@details 用不做任何工作的合成处理器构造链路，通过 Bus.run_until_idle() 驱动，
+         分别在标准库 asyncio 事件循环与 uvloop（已安装时）下测量每秒调度的任务数。
+         每种事件循环重复运行若干轮，取中位数与最大值，结果以 JSON 输出。
+         用法：python -m benchmarks.event_loop --seeds 200 --depth 20 --concurrency 100 --rounds 5
+"""
+
+import asyncio
+from asyncio import AbstractEventLoop
+from collections.abc import Callable
+from logging import getLogger
+from statistics import median
+
+from benchmarks._common import emit_report, report_parser
+from benchmarks.synthetic import ChainHandler, SyntheticTask, expected_tasks
+from bus import Bus, BusConfig
+
+logger = getLogger(__name__)
+
+
+async def run_once(seeds: int, depth: int, concurrency: int) -> float:
+    """
+    @brief 运行一轮并返回吞吐量
+    @param seeds 种子任务数
+    @param depth 每个种子的链路深度
+    @param concurrency Bus 最大并发数
+    @return 每秒处理的任务数
+    """
+    bus = Bus(BusConfig(dispatch_registry={SyntheticTask: ChainHandler()}, max_concurrent_tasks=concurrency))
+    summary = await bus.run_until_idle(SyntheticTask(depth) for _ in range(seeds))
+    return summary.handled / summary.elapsed_seconds
+
+
+def available_loops() -> dict[str, Callable[[], AbstractEventLoop] | None]:
+    """
+    @brief 列出可用的事件循环实现
+    @return 名称 → loop_factory（None 表示标准库默认）
+    """
+    loops: dict[str, Callable[[], AbstractEventLoop] | None] = {'asyncio': None}
+    try:
+        import uvloop  # type: ignore[import-not-found]
+    except ImportError:
+        logger.warning('未安装 uvloop，仅测试 asyncio 事件循环')
+    else:
+        loops['uvloop'] = uvloop.new_event_loop
+    return loops
+
+
+def main(seeds: int, depth: int, concurrency: int, rounds: int) -> dict[str, object]:
+    """
+    @brief 依次在各事件循环下运行多轮
+    @param seeds 种子任务数
+    @param depth 每个种子的链路深度
+    @param concurrency Bus 最大并发数
+    @param rounds 每种事件循环的运行轮数
+    @return 基准结果字典
+    """
+    results: dict[str, object] = {
+        'seeds': seeds,
+        'depth': depth,
+        'concurrency': concurrency,
+        'tasks_per_round': expected_tasks(seeds, 1, depth),
+        'rounds': rounds,
+    }
+    for name, factory in available_loops().items():
+        throughput = [asyncio.run(run_once(seeds, depth, concurrency), loop_factory=factory) for _ in range(rounds)]
+        results[name] = {
+            'tasks_per_second_median': median(throughput),
+            'tasks_per_second_max': max(throughput),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    arg_parser = report_parser('事件循环实现对比基准')
+    arg_parser.add_argument('--seeds', type=int, default=200, help='种子任务数')
+    arg_parser.add_argument('--depth', type=int, default=20, help='每个种子的链路深度')
+    arg_parser.add_argument('--concurrency', type=int, default=100, help='Bus 最大并发数')
+    arg_parser.add_argument('--rounds', type=int, default=5, help='每种事件循环的运行轮数')
+    args = arg_parser.parse_args()
+
+    report = main(args.seeds, args.depth, args.concurrency, args.rounds)
+    emit_report(report, args.output)
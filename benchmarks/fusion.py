@@ -0,0 +1,204 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 阶段融合基准：对比路由与站点处理器内联前后每条响应的调度开销
+@details 以真实的 HttpxSiteRouter、站点处理器与编译后的路由表构造 Bus，不访问网络与数据库：
+         ResponseSource 模拟请求器，每个种子产出一组预先构造好的 HttpxResponseData
+         （/calendar、/v0/subjects/{id} 与封面图按比例混合）；ParseSink 接收全部解析数据包后终止链路。
+         同一负载分别以 fuse_inline = False / True 运行，测量每条响应从产出到解析数据包被消费的平均耗时、
+         经队列分发的子协程数，并在单独一轮中以 tracemalloc 统计每条响应的内存分配峰值。
+         用法：python -m benchmarks.fusion --responses 20000 --per-seed 100 --concurrency 100
+"""
+
+import asyncio
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from logging import getLogger
+
+import httpx
+
+from base import HandlerBase
+from benchmarks._common import emit_report, report_parser
+from bus import Bus, BusConfig
+from data.base import TaskBaseData
+from data.parse import BangumiCalendarParseData, BangumiCoverParseData, BangumiSubjectDetailParseData, ParseBaseData
+from data.request import SingleHttpxRequestData
+from data.response import HttpxResponseData
+from gateway import build_site_handlers
+from router import build_httpx_site_router
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ResponseSeed(TaskBaseData):
+    """
+    @brief 基准种子任务
+    @param index 种子序号，决定取哪一段预构造的响应
+    """
+    index: int  # 种子序号
+
+
+class ResponseSource(HandlerBase[ResponseSeed]):
+    """
+    @brief 模拟请求器：每个种子产出一段预构造的响应数据包
+    """
+
+    def __init__(self, responses: list[HttpxResponseData], per_seed: int) -> None:
+        """
+        @brief 初始化响应源
+        @param responses 预构造的全部响应数据包
+        @param per_seed 每个种子产出的响应数
+        """
+        self._responses: list[HttpxResponseData] = responses
+        self._per_seed: int = per_seed
+
+    async def handle(self, task: ResponseSeed) -> list[HttpxResponseData]:
+        """
+        @brief 产出该种子对应的一段响应
+        @param task 种子任务
+        @return 响应数据包列表
+        """
+        start = task.index * self._per_seed
+        return self._responses[start:start + self._per_seed]
+
+
+class ParseSink(HandlerBase[ParseBaseData]):
+    """
+    @brief 解析数据包的终点：只计数，不解析
+    """
+
+    def __init__(self) -> None:
+        """
+        @brief 初始化计数
+        """
+        self.consumed: int = 0
+
+    async def handle(self, task: ParseBaseData) -> None:
+        """
+        @brief 计数后终止链路
+        @param task 解析数据包
+        """
+        self.consumed += 1
+
+
+def build_responses(count: int) -> list[HttpxResponseData]:
+    """
+    @brief 预构造响应数据包，URL 按 1 : 8 : 1 混合日历、条目详情与封面图
+    @param count 响应数
+    @return 响应数据包列表
+    """
+    responses: list[HttpxResponseData] = []
+    for i in range(count):
+        match i % 10:
+            case 0:
+                url = 'https://api.bgm.tv/calendar'
+            case 9:
+                url = f'https://lain.bgm.tv/pic/cover/l/{i % 97:02x}/{i}.jpg'
+            case _:
+                url = f'https://api.bgm.tv/v0/subjects/{i}'
+        request = httpx.Request('GET', url)
+        responses.append(HttpxResponseData(
+            task=SingleHttpxRequestData(retry=1, request=request),
+            response=httpx.Response(200, request=request, content=b'{}'),
+            meta={'db_id': i},
+        ))
+    return responses
+
+
+async def _run(responses: list[HttpxResponseData], per_seed: int, concurrency: int, fuse: bool) -> tuple[int, int, float]:
+    """
+    @brief 构造 Bus 并运行一次负载
+    @param responses 预构造的响应数据包
+    @param per_seed 每个种子产出的响应数
+    @param concurrency max_concurrent_tasks
+    @param fuse 是否启用阶段融合
+    @return (消费的解析数据包数, 经队列分发的任务数, 耗时秒)
+    """
+    sink = ParseSink()
+    bus = Bus(BusConfig(
+        dispatch_registry={
+            ResponseSeed: ResponseSource(responses, per_seed),
+            **build_httpx_site_router(),
+            **build_site_handlers(),
+            BangumiCalendarParseData: sink,
+            BangumiSubjectDetailParseData: sink,
+            BangumiCoverParseData: sink,
+        },
+        max_concurrent_tasks=concurrency,
+        fuse_inline=fuse,
+    ))
+    seeds = (len(responses) + per_seed - 1) // per_seed
+    summary = await bus.run_until_idle(ResponseSeed(i) for i in range(seeds))
+    queued: int = summary.handled - (2 * len(responses) if fuse else 0)
+    return sink.consumed, queued, summary.elapsed_seconds
+
+
+def run_mode(responses: list[HttpxResponseData], per_seed: int, concurrency: int, fuse: bool, repeat: int) -> dict[str, object]:
+    """
+    @brief 运行单个模式：repeat 轮计时取最快一轮，另一轮 tracemalloc 分配统计
+    @param responses 预构造的响应数据包
+    @param per_seed 每个种子产出的响应数
+    @param concurrency max_concurrent_tasks
+    @param fuse 是否启用阶段融合
+    @param repeat 计时轮数
+    @return 结果字典
+    """
+    best: float = float('inf')
+    consumed = queued = 0
+    for _ in range(repeat):
+        consumed, queued, elapsed = asyncio.run(_run(responses, per_seed, concurrency, fuse))
+        best = min(best, elapsed)
+
+    tracemalloc.start()
+    asyncio.run(_run(responses, per_seed, concurrency, fuse))
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'fuse_inline': fuse,
+        'responses': len(responses),
+        'parse_tasks': consumed,
+        'queued_tasks': queued,
+        'elapsed_seconds': best,
+        'us_per_response': best / len(responses) * 1e6,
+        'responses_per_second': len(responses) / best,
+        'traced_peak_kib': traced_peak / 1024,
+    }
+
+
+def main(responses: int, per_seed: int, concurrency: int, repeat: int) -> dict[str, object]:
+    """
+    @brief 依次以关闭与开启阶段融合运行同一负载
+    @param responses 响应数
+    @param per_seed 每个种子产出的响应数
+    @param concurrency max_concurrent_tasks
+    @param repeat 计时轮数
+    @return 基准结果字典
+    """
+    prepared = build_responses(responses)
+    results = [run_mode(prepared, per_seed, concurrency, fuse, repeat) for fuse in (False, True)]
+    for result in results:
+        logger.info(f"fuse_inline={result['fuse_inline']} 完成：{result['us_per_response']:.1f} µs/响应")
+    unfused, fused = results
+    return {
+        'python': sys.version.split()[0],
+        'per_seed': per_seed,
+        'max_concurrent_tasks': concurrency,
+        'results': results,
+        'speedup': unfused['elapsed_seconds'] / fused['elapsed_seconds'],
+        'saved_us_per_response': unfused['us_per_response'] - fused['us_per_response'],
+    }
+
+
+if __name__ == '__main__':
+    arg_parser = report_parser('阶段融合基准')
+    arg_parser.add_argument('--responses', type=int, default=20000, help='响应数')
+    arg_parser.add_argument('--per-seed', type=int, default=100, help='每个种子产出的响应数')
+    arg_parser.add_argument('--concurrency', type=int, default=100, help='max_concurrent_tasks')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='计时轮数，取最快一轮')
+    args = arg_parser.parse_args()
+
+    report = main(args.responses, args.per_seed, args.concurrency, args.repeat)
+    emit_report(report, args.output)
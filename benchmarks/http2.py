@@ -0,0 +1,120 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief HTTP/1.1 与 HTTP/2 请求对比基准
+@details 在子进程中启动本地替身服务器（注入单请求延迟与建连延迟），
+         经 requester 包的 HttpClientRegistry 分别以 HTTP/1.1 连接池与 HTTP/2 多路复用并发发出一批小 JSON 请求，
+         测量总耗时、吞吐量、单请求延迟分位数与新建连接数。每轮使用新的客户端注册表，从冷连接开始。
+         与 BatchHttpRequester 的 max_concurrent 相同，客户端以信号量把在途请求限制在连接数（HTTP/1.1）
+         或并发流上限（HTTP/2）以内。httpcore 连接池在每次状态变化时扫描全部连接与排队请求，
+         HTTP/1.1 连接数较大（如默认的 100）时结果中包含可观的连接池 CPU 开销，这也是实际运行时的开销；
+         以 --connections 10 运行可单独对比协议本身的差异。
+         本地服务器为明文端口，HTTP/2 以 prior knowledge（h2c）方式连接；线上 HTTPS 主机经 ALPN 协商，
+         建连延迟参数即用于模拟 TCP + TLS 握手的往返开销。需要安装 h2。
+         用法：python -m benchmarks.http2 --requests 500 --connections 100 --latency-ms 20 --handshake-ms 30
+"""
+
+import asyncio
+import sys
+from logging import getLogger
+from statistics import median
+from time import perf_counter
+
+from httpx import Request
+
+from benchmarks._common import emit_report, percentiles_ms, report_parser
+from benchmarks.standin import StandinConfig, run_in_process
+from requester.client import HostClientConfig, HttpClientRegistry
+
+logger = getLogger(__name__)
+
+
+async def run_once(port: int, host_config: HostClientConfig, requests: int, in_flight: int) -> dict[str, object]:
+    """
+    @brief 以给定连接配置并发发出一批请求
+    @details 单请求延迟从提交时刻计起，包含在客户端信号量上的排队时间。
+    @param port 替身服务器端口
+    @param host_config 主机连接配置
+    @param requests 请求数
+    @param in_flight 客户端在途请求上限
+    @return 本轮结果
+    """
+    registry = HttpClientRegistry(host_config, {})
+    client = registry.get('127.0.0.1')
+    semaphore = asyncio.Semaphore(in_flight)
+    latencies: list[float] = []
+
+    async def fetch(i: int) -> None:
+        start = perf_counter()
+        async with semaphore:
+            response = await client.send(Request('GET', f'http://127.0.0.1:{port}/v0/subjects/{i}'))
+        response.raise_for_status()
+        latencies.append(perf_counter() - start)
+
+    start = perf_counter()
+    await asyncio.gather(*[fetch(i) for i in range(requests)])
+    elapsed = perf_counter() - start
+    stats = registry.stats()['127.0.0.1']
+    await registry.aclose()
+    return {
+        'elapsed_seconds': elapsed,
+        'requests_per_second': requests / elapsed,
+        'latency': percentiles_ms(latencies),
+        'connections': stats.connections,
+        'h2_connections': stats.h2_connections,
+    }
+
+
+def main(requests: int, connections: int, streams: int, latency: float, handshake: float, rounds: int) -> dict[str, object]:
+    """
+    @brief 启动替身服务器，依次运行 HTTP/1.1 与 HTTP/2 各若干轮
+    @param requests 每轮请求数
+    @param connections HTTP/1.1 连接池上限（HTTP/2 同样以此为 max_connections）
+    @param streams HTTP/2 在途请求上限
+    @param latency 服务器单请求延迟（秒）
+    @param handshake 服务器建连延迟（秒）
+    @param rounds 每种协议的运行轮数
+    @return 基准结果字典
+    """
+    process, port = run_in_process(StandinConfig(latency=latency, handshake=handshake, max_concurrent_streams=streams))
+    modes: dict[str, tuple[HostClientConfig, int]] = {
+        'http1': (HostClientConfig(connections, connections, 5.0), connections),
+        'http2': (HostClientConfig(connections, connections, 5.0, http1=False, http2=True, max_concurrent_streams=streams), streams),
+    }
+    results: dict[str, object] = {
+        'python': sys.version.split()[0],
+        'requests': requests,
+        'connections': connections,
+        'max_concurrent_streams': streams,
+        'latency_ms': latency * 1000,
+        'handshake_ms': handshake * 1000,
+        'rounds': rounds,
+    }
+    try:
+        for name, (host_config, in_flight) in modes.items():
+            runs = [asyncio.run(run_once(port, host_config, requests, in_flight)) for _ in range(rounds)]
+            best = min(runs, key=lambda run: run['elapsed_seconds'])
+            results[name] = {
+                'elapsed_seconds_median': median(run['elapsed_seconds'] for run in runs),
+                'requests_per_second_median': median(run['requests_per_second'] for run in runs),
+                'best_round': best,
+            }
+            logger.info(f"{name} 完成")
+    finally:
+        process.terminate()
+        process.join()
+    return results
+
+
+if __name__ == '__main__':
+    arg_parser = report_parser('HTTP/1.1 与 HTTP/2 请求对比基准')
+    arg_parser.add_argument('--requests', type=int, default=500, help='每轮请求数')
+    arg_parser.add_argument('--connections', type=int, default=100, help='连接池上限（与 [http] max_connections 默认值一致）')
+    arg_parser.add_argument('--streams', type=int, default=100, help='HTTP/2 在途请求上限')
+    arg_parser.add_argument('--latency-ms', type=float, default=20.0, help='服务器单请求延迟（毫秒）')
+    arg_parser.add_argument('--handshake-ms', type=float, default=30.0, help='服务器建连延迟（毫秒），模拟握手往返')
+    arg_parser.add_argument('--rounds', type=int, default=3, help='每种协议的运行轮数')
+    args = arg_parser.parse_args()
+
+    report = main(args.requests, args.connections, args.streams, args.latency_ms / 1000, args.handshake_ms / 1000, args.rounds)
+    emit_report(report, args.output)
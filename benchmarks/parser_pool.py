@@ -0,0 +1,134 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 解析器进程池模式的事件循环卡顿基准
+@details 构造大体积的 /v0/subjects/{id} 合成响应，分别以 INLINE 与 PROCESS 模式
+         并发运行 BangumiSubjectDetailParser，同时用一个固定间隔的探针协程测量事件循环卡顿
+         （探针实际唤醒时间与预期时间之差）。输出两种模式的总耗时与卡顿统计。
+         用法：python -m benchmarks.parser_pool --tasks 200 --size-kb 256 --workers 4
+"""
+
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger
+from time import perf_counter
+
+import httpx
+
+from benchmarks._common import emit_report, percentiles_ms, report_parser
+from data.parse import BangumiSubjectDetailParseData
+from data.request import SingleHttpxRequestData
+from parser.bangumi.subject import BangumiSubjectDetailParser
+
+logger = getLogger(__name__)
+
+_PROBE_INTERVAL: float = 0.001  # 探针协程的期望唤醒间隔（秒）
+
+
+def build_payload(size_kb: int) -> bytes:
+    """
+    @brief 构造指定体积的合成 subject JSON 响应体
+    @details infobox 中填充大量别名与条目，使 JSON 解码与别名提取成为主要开销。
+    @param size_kb 目标响应体大小（KiB，近似值）
+    @return UTF-8 编码的 JSON 字节
+    """
+    aliases = [{'v': f'别名-{i:06d}'} for i in range(size_kb * 16)]
+    infobox = [{'key': '别名', 'value': aliases}] + [{'key': f'条目{i}', 'value': '值' * 16} for i in range(size_kb * 4)]
+    subject = {
+        'id': 1,
+        'name': 'synthetic',
+        'name_cn': '合成条目',
+        'date': '2026-10-01',
+        'summary': '简介' * 64,
+        'images': {'common': 'https://lain.bgm.tv/pic/cover/c/00/00/1.jpg'},
+        'tags': [{'name': f'tag{i}', 'count': i} for i in range(64)],
+        'infobox': infobox,
+    }
+    return json.dumps(subject, ensure_ascii=False).encode('utf-8')
+
+
+def build_tasks(count: int, payload: bytes) -> list[BangumiSubjectDetailParseData]:
+    """
+    @brief 构造解析输入数据包列表
+    @param count 任务数
+    @param payload 响应体字节
+    @return 解析输入数据包列表
+    """
+    tasks: list[BangumiSubjectDetailParseData] = []
+    for i in range(count):
+        request = httpx.Request('GET', f'https://api.bgm.tv/v0/subjects/{i}')
+        response = httpx.Response(200, headers={'Content-Type': 'application/json'}, content=payload, request=request)
+        tasks.append(BangumiSubjectDetailParseData(task=SingleHttpxRequestData(retry=0, request=request), response=response))
+    return tasks
+
+
+async def _probe(lags: list[float], stop: asyncio.Event) -> None:
+    """
+    @brief 事件循环卡顿探针
+    @param lags 收集每次唤醒延迟（秒）的列表
+    @param stop 停止信号
+    """
+    while not stop.is_set():
+        start = perf_counter()
+        await asyncio.sleep(_PROBE_INTERVAL)
+        lags.append(max(perf_counter() - start - _PROBE_INTERVAL, 0.0))
+
+
+async def run_case(parser: BangumiSubjectDetailParser, tasks: list[BangumiSubjectDetailParseData]) -> dict[str, float]:
+    """
+    @brief 并发解析全部任务并统计卡顿
+    @param parser 待测解析器实例
+    @param tasks 解析输入数据包列表
+    @return 总耗时与卡顿统计（毫秒）
+    """
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+
+    start = perf_counter()
+    await asyncio.gather(*[parser.handle(task) for task in tasks])
+    elapsed = perf_counter() - start
+
+    stop.set()
+    await probe
+
+    return {
+        'elapsed_ms': elapsed * 1000,
+        'stall_total_ms': sum(lags) * 1000,
+        'stall_max_ms': max(lags, default=0.0) * 1000,
+        'stall_p99_ms': percentiles_ms(lags)['p99_ms'],
+        'probe_samples': len(lags),
+    }
+
+
+async def main(tasks_count: int, size_kb: int, workers: int) -> dict[str, object]:
+    """
+    @brief 依次运行 INLINE 与 PROCESS 两种模式
+    @param tasks_count 任务数
+    @param size_kb 单个响应体大小（KiB）
+    @param workers 进程池大小
+    @return 基准结果字典
+    """
+    tasks = build_tasks(tasks_count, build_payload(size_kb))
+    results: dict[str, object] = {'tasks': tasks_count, 'size_kb': size_kb, 'workers': workers}
+
+    results['inline'] = await run_case(BangumiSubjectDetailParser(), tasks)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parser = BangumiSubjectDetailParser(executor)
+        await parser.handle(tasks[0])  # 预热：启动子进程并完成模块导入
+        results['process'] = await run_case(parser, tasks)
+
+    return results
+
+
+if __name__ == '__main__':
+    arg_parser = report_parser('解析器进程池模式事件循环卡顿基准')
+    arg_parser.add_argument('--tasks', type=int, default=200, help='解析任务数')
+    arg_parser.add_argument('--size-kb', type=int, default=256, help='单个响应体大小（KiB）')
+    arg_parser.add_argument('--workers', type=int, default=4, help='进程池大小')
+    args = arg_parser.parse_args()
+
+    report = asyncio.run(main(args.tasks, args.size_kb, args.workers))
+    emit_report(report, args.output)
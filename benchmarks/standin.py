@@ -0,0 +1,371 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 本地替身 HTTP 服务器
+@details 同一端口同时支持 HTTP/1.1（h11）与 HTTP/2 prior knowledge（h2c，依赖 h2 包），
+         按连接前言区分协议。响应由路由函数按 (方法, 路径) 生成，可注入固定的单请求延迟，
+         以及模拟 TCP + TLS 握手往返的建连延迟，使本地基准能体现连接复用与多路复用的差异。
+         单请求延迟可按固定值、均匀、指数或对数正态分布抽样；可按比例注入 429（附 Retry-After）与 5xx 响应，
+         以及按限定速率分块写出的慢速响应体，用于限速器与重试的浸泡测试。随机数可指定种子以便复现。
+         HTTP/1.1 连接上的请求串行处理；HTTP/2 连接上的各个流并发处理，并通告 max_concurrent_streams，
+         响应体按帧大小与流量控制窗口分帧发送。
+         run_in_process() 在独立子进程中运行服务器，避免与被测客户端争用同一个事件循环。
+"""
+
+import asyncio
+import json
+import math
+import random
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from enum import Enum
+from logging import getLogger
+from multiprocessing import get_context
+from multiprocessing.process import BaseProcess
+
+import h11
+
+logger = getLogger(__name__)
+
+# HTTP/2 连接前言
+_H2_PREFACE: bytes = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+_READ_BYTES: int = 65536
+# 慢速响应体的分块大小
+_SLOW_CHUNK_BYTES: int = 16384
+
+
+@dataclass(frozen=True)
+class Reply(object):
+    """
+    @brief 路由函数生成的响应
+    @param status 状态码
+    @param body 响应体
+    @param content_type Content-Type 头
+    @param headers 其余响应头
+    """
+    status: int                                # 状态码
+    body: bytes                                # 响应体
+    content_type: str = 'application/json'     # Content-Type 头
+    headers: tuple[tuple[str, str], ...] = ()  # 其余响应头
+
+    def header_list(self) -> list[tuple[str, str]]:
+        """
+        @brief 组装完整响应头（不含 HTTP/2 伪头）
+        @return 响应头列表
+        """
+        return [('content-type', self.content_type), ('content-length', str(len(self.body))), *self.headers]
+
+
+type Route = Callable[[str, str], Reply]
+
+
+def echo_route(method: str, target: str) -> Reply:
+    """
+    @brief 默认路由：以小 JSON 回显方法与路径
+    @param method 请求方法
+    @param target 请求路径（含查询串）
+    @return 200 响应
+    """
+    return Reply(200, json.dumps({'method': method, 'path': target}).encode())
+
+
+class Distribution(Enum):
+    """
+    @brief 单请求延迟的分布
+    """
+    FIXED = 'fixed'              # 固定为 latency
+    UNIFORM = 'uniform'          # [0, 2 × latency] 均匀分布，均值为 latency
+    EXPONENTIAL = 'exponential'  # 均值为 latency 的指数分布
+    LOGNORMAL = 'lognormal'      # 中位数为 latency、形状参数为 latency_sigma 的对数正态分布，长尾
+
+
+@dataclass(frozen=True)
+class StandinConfig(object):
+    """
+    @brief 替身服务器配置
+    @param latency 每个请求的处理延迟（秒），非固定分布时为均值或中位数
+    @param handshake 每条新连接的建连延迟（秒），模拟握手往返
+    @param max_concurrent_streams HTTP/2 通告的单连接并发流上限
+    @param distribution 单请求延迟的分布
+    @param latency_sigma 对数正态分布的形状参数
+    @param rate_limited 返回 429 的请求比例
+    @param retry_after 429 响应的 Retry-After 秒数
+    @param server_errors 返回 500 / 502 / 503 的请求比例
+    @param slow_bodies 慢速写出响应体的请求比例
+    @param slow_body_bps 慢速响应体的写出速率（字节 / 秒）
+    @param seed 随机数种子，None 表示不固定
+    """
+    latency: float = 0.0                             # 单请求处理延迟（秒）
+    handshake: float = 0.0                           # 建连延迟（秒）
+    max_concurrent_streams: int = 100                # HTTP/2 并发流上限
+    distribution: Distribution = Distribution.FIXED  # 延迟分布
+    latency_sigma: float = 0.5                       # 对数正态分布形状参数
+    rate_limited: float = 0.0                        # 429 比例
+    retry_after: float = 1.0                         # Retry-After 秒数
+    server_errors: float = 0.0                       # 5xx 比例
+    slow_bodies: float = 0.0                         # 慢速响应体比例
+    slow_body_bps: int = 65536                       # 慢速写出速率（字节 / 秒）
+    seed: int | None = None                          # 随机数种子
+
+
+class StandinServer(object):
+    """
+    @brief 替身 HTTP 服务器
+    @details start() 监听端口后返回，stop() 关闭监听并等待连接处理结束。
+    """
+
+    def __init__(self, config: StandinConfig, route: Route = echo_route) -> None:
+        """
+        @brief 初始化服务器
+        @param config 服务器配置
+        @param route 路由函数，(方法, 路径) → Reply
+        """
+        self._config: StandinConfig = config
+        self._route: Route = route
+        self._random: random.Random = random.Random(config.seed)
+        self._server: asyncio.Server | None = None
+        self.connections: dict[str, int] = {'h1': 0, 'h2': 0}
+        self.injected: dict[str, int] = {'rate_limited': 0, 'server_errors': 0, 'slow_bodies': 0}
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        """
+        @brief 开始监听
+        @param host 监听地址
+        @param port 监听端口，0 表示由系统分配
+        @return 实际监听的端口
+        """
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """
+        @brief 停止监听并关闭服务器
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        @brief 处理一条连接：模拟握手延迟后按前言分派到 HTTP/1.1 或 HTTP/2
+        @param reader 连接读端
+        @param writer 连接写端
+        """
+        try:
+            if self._config.handshake:
+                await asyncio.sleep(self._config.handshake)
+            data = await reader.read(_READ_BYTES)
+            while data and len(data) < len(_H2_PREFACE) and _H2_PREFACE.startswith(data):
+                data += await reader.read(_READ_BYTES)
+            if data.startswith(_H2_PREFACE):
+                self.connections['h2'] += 1
+                await self._serve_h2(reader, writer, data)
+            elif data:
+                self.connections['h1'] += 1
+                await self._serve_h1(reader, writer, data)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_h1(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, data: bytes) -> None:
+        """
+        @brief HTTP/1.1 keep-alive 连接：逐个处理请求
+        @param reader 连接读端
+        @param writer 连接写端
+        @param data 已读取的首段数据
+        """
+        conn = h11.Connection(h11.SERVER)
+        conn.receive_data(data)
+        request: h11.Request | None = None
+        while True:
+            event = conn.next_event()
+            if event is h11.NEED_DATA:
+                conn.receive_data(await reader.read(_READ_BYTES))
+            elif isinstance(event, h11.Request):
+                request = event
+            elif isinstance(event, h11.EndOfMessage) and request is not None:
+                reply = await self._reply(request.method.decode(), request.target.decode())
+                writer.write(conn.send(h11.Response(status_code=reply.status, headers=reply.header_list())))
+                pace: float = self._pace()
+                for chunk in self._chunks(reply.body, pace):
+                    writer.write(conn.send(h11.Data(data=chunk)))
+                    if pace:
+                        await writer.drain()
+                        await asyncio.sleep(len(chunk) * pace)
+                writer.write(conn.send(h11.EndOfMessage()))
+                await writer.drain()
+                if conn.our_state is not h11.DONE or conn.their_state is not h11.DONE:
+                    return
+                conn.start_next_cycle()
+                request = None
+            elif isinstance(event, h11.ConnectionClosed) or event is h11.PAUSED:
+                return
+
+    async def _serve_h2(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, data: bytes) -> None:
+        """
+        @brief HTTP/2 连接：每个请求流在独立协程中处理，完成后写回
+        @param reader 连接读端
+        @param writer 连接写端
+        @param data 已读取的首段数据（含连接前言）
+        """
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.exceptions
+        import h2.settings
+
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False, header_encoding='utf-8'))
+        conn.initiate_connection()
+        conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: self._config.max_concurrent_streams})
+        streams: set[asyncio.Task] = set()
+        window = asyncio.Condition()
+
+        async def respond(stream_id: int, method: str, target: str) -> None:
+            reply = await self._reply(method, target)
+            pace: float = self._pace()
+            try:
+                conn.send_headers(stream_id, [(':status', str(reply.status)), *reply.header_list()])
+                writer.write(conn.data_to_send())
+                for chunk in self._chunks(reply.body, pace):
+                    view = memoryview(chunk)
+                    while view:
+                        async with window:
+                            size = min(len(view), conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size)
+                            if size <= 0:
+                                await window.wait()
+                                continue
+                        conn.send_data(stream_id, bytes(view[:size]))
+                        writer.write(conn.data_to_send())
+                        view = view[size:]
+                    if pace:
+                        await writer.drain()
+                        await asyncio.sleep(len(chunk) * pace)
+                conn.end_stream(stream_id)
+                writer.write(conn.data_to_send())
+            except h2.exceptions.StreamClosedError:
+                pass
+
+        try:
+            while data:
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        headers = dict(event.headers)
+                        stream = asyncio.create_task(respond(event.stream_id, headers[':method'], headers[':path']))
+                        streams.add(stream)
+                        stream.add_done_callback(streams.discard)
+                    elif isinstance(event, h2.events.WindowUpdated):
+                        async with window:
+                            window.notify_all()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                writer.write(conn.data_to_send())
+                await writer.drain()
+                data = await reader.read(_READ_BYTES)
+        finally:
+            for stream in streams:
+                stream.cancel()
+
+    async def _reply(self, method: str, target: str) -> Reply:
+        """
+        @brief 注入处理延迟后按比例返回 429 / 5xx，其余调用路由函数
+        @param method 请求方法
+        @param target 请求路径
+        @return 响应
+        """
+        if self._config.latency:
+            await asyncio.sleep(self._sample_latency())
+        roll: float = self._random.random()
+        if roll < self._config.rate_limited:
+            self.injected['rate_limited'] += 1
+            return Reply(429, b'{"title":"Too Many Requests"}', headers=(('retry-after', f'{self._config.retry_after:g}'),))
+        if roll < self._config.rate_limited + self._config.server_errors:
+            self.injected['server_errors'] += 1
+            status: int = self._random.choice((500, 502, 503))
+            return Reply(status, json.dumps({'title': 'Server Error', 'status': status}).encode())
+        return self._route(method, target)
+
+    def _sample_latency(self) -> float:
+        """
+        @brief 按配置的分布抽样单请求延迟
+        @return 延迟秒数
+        """
+        latency: float = self._config.latency
+        match self._config.distribution:
+            case Distribution.UNIFORM:
+                return self._random.uniform(0.0, 2 * latency)
+            case Distribution.EXPONENTIAL:
+                return self._random.expovariate(1 / latency)
+            case Distribution.LOGNORMAL:
+                return self._random.lognormvariate(math.log(latency), self._config.latency_sigma)
+            case _:
+                return latency
+
+    def _pace(self) -> float:
+        """
+        @brief 按比例决定本次响应体是否慢速写出
+        @return 每字节的写出间隔（秒）；不限速时为 0
+        """
+        if self._config.slow_bodies and self._random.random() < self._config.slow_bodies:
+            self.injected['slow_bodies'] += 1
+            return 1 / self._config.slow_body_bps
+        return 0.0
+
+    @staticmethod
+    def _chunks(body: bytes, pace: float) -> Iterator[bytes]:
+        """
+        @brief 切分响应体：慢速写出时按固定大小分块，否则整体写出
+        @param body 响应体
+        @param pace 每字节的写出间隔（秒）
+        @return 响应体分块
+        """
+        if not pace:
+            yield body
+            return
+        for offset in range(0, len(body), _SLOW_CHUNK_BYTES):
+            yield body[offset:offset + _SLOW_CHUNK_BYTES]
+
+
+async def _run_forever(config: StandinConfig, route: Route, port_pipe) -> None:
+    """
+    @brief 子进程入口协程：启动服务器，经管道回报端口后一直运行
+    @param config 服务器配置
+    @param route 路由函数
+    @param port_pipe 回报端口的管道写端
+    """
+    server = StandinServer(config, route)
+    port_pipe.send(await server.start())
+    port_pipe.close()
+    await asyncio.Event().wait()
+
+
+def _process_main(config: StandinConfig, route: Route, port_pipe) -> None:
+    """
+    @brief 子进程入口
+    @param config 服务器配置
+    @param route 路由函数（须可 pickle，即模块级函数）
+    @param port_pipe 回报端口的管道写端
+    """
+    asyncio.run(_run_forever(config, route, port_pipe))
+
+
+def run_in_process(config: StandinConfig, route: Route = echo_route) -> tuple[BaseProcess, int]:
+    """
+    @brief 在独立子进程中启动替身服务器
+    @param config 服务器配置
+    @param route 路由函数（须为模块级函数）
+    @return (子进程, 监听端口)；用毕调用 process.terminate()
+    """
+    context = get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_process_main, args=(config, route, sender), daemon=True)
+    process.start()
+    sender.close()
+    port: int = receiver.recv()
+    receiver.close()
+    return process, port
+
+
+if __name__ == '__main__':
+    pass
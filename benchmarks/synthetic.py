@@ -0,0 +1,94 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 基准用的合成任务与处理器
+@details 不访问网络与数据库，只保留总线调度本身的开销。
+         SyntheticTask 携带剩余深度，ChainHandler 每处理一个任务产出 fan_out 个深度减一的后续任务，
+         深度归零时链路终止；通过 work 参数在处理中加入休眠或纯 CPU 计算，模拟不同类型的处理器。
+         任务构造时记录 perf_counter 时间戳，处理器开始处理时计算差值，即单跳调度延迟（入队、排队、等待槽位）。
+         单个种子产出的任务总数为 1 + f + f² + … + f^depth（f 为 fan_out）。
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from enum import Enum
+from logging import getLogger
+from time import perf_counter
+
+from base import HandlerBase
+from data.base import TaskBaseData
+
+logger = getLogger(__name__)
+
+
+class Work(Enum):
+    """
+    @brief 合成处理器的工作类型
+    """
+    NOOP = 'noop'    # 不做任何工作
+    SLEEP = 'sleep'  # asyncio.sleep，模拟 I/O 等待
+    CPU = 'cpu'      # 纯 Python 循环，模拟阻塞事件循环的 CPU 计算
+
+
+@dataclass(frozen=True)
+class SyntheticTask(TaskBaseData):
+    """
+    @brief 合成任务
+    @param depth 剩余链路深度，为 0 时处理器不再产出后续任务
+    @param created_at 构造时刻（perf_counter），不参与比较
+    """
+    depth: int                                                          # 剩余链路深度
+    created_at: float = field(default_factory=perf_counter, compare=False)  # 构造时刻
+
+
+class ChainHandler(HandlerBase[SyntheticTask]):
+    """
+    @brief 可配置扇出与工作量的合成处理器
+    """
+
+    def __init__(self, fan_out: int = 1, work: Work = Work.NOOP, amount: float = 0.0, latencies: list[float] | None = None) -> None:
+        """
+        @brief 初始化合成处理器
+        @param fan_out 每个任务产出的后续任务数
+        @param work 工作类型
+        @param amount 工作量：SLEEP 为休眠秒数，CPU 为循环次数
+        @param latencies 收集单跳调度延迟（秒）的列表，None 表示不收集
+        """
+        self._fan_out: int = fan_out
+        self._work: Work = work
+        self._amount: float = amount
+        self._latencies: list[float] | None = latencies
+
+    async def handle(self, task: SyntheticTask) -> list[SyntheticTask] | None:
+        """
+        @brief 执行配置的工作量，并产出深度减一的后续任务
+        @param task 合成任务
+        @return 后续任务列表；深度为 0 时返回 None
+        """
+        if self._latencies is not None:
+            self._latencies.append(perf_counter() - task.created_at)
+        match self._work:
+            case Work.SLEEP:
+                await asyncio.sleep(self._amount)
+            case Work.CPU:
+                total = 0
+                for i in range(int(self._amount)):
+                    total += i * i
+        if task.depth <= 0:
+            return None
+        return [SyntheticTask(task.depth - 1) for _ in range(self._fan_out)]
+
+
+def expected_tasks(seeds: int, fan_out: int, depth: int) -> int:
+    """
+    @brief 计算一次运行应处理的任务总数
+    @param seeds 种子任务数
+    @param fan_out 扇出
+    @param depth 种子任务的链路深度
+    @return 任务总数
+    """
+    return seeds * sum(fan_out ** level for level in range(depth + 1))
+
+
+if __name__ == '__main__':
+    pass
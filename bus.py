@@ -2,26 +2,142 @@
 # AUTHOR: Sun
 """
 @brief 异步事件总线核心模块
-@details Bus 是框架的中枢调度器，持有一个无界 asyncio.Queue，
+@details Bus 是框架的中枢调度器，持有一个 asyncio.Queue（默认无界，可配置容量上限），
          通过类型 → HandlerBase 实例的映射表（dispatch_registry）
          将任务分发给对应处理单元，自身不含任何业务逻辑。
-         信号量（Semaphore）限制并发子协程数，确保资源可控。
+         信号量（Semaphore）限制并发子协程数，确保资源可控；
+         可选的有界准入模式同时限制队列深度与等待信号量的子协程数，
+         队列满时生产者（Bus.put 与处理器返回值回投）阻塞等待，形成端到端背压。
+         队列为优先级队列：按任务类型（沿 MRO 查找阶段基类）划分优先级通道，
+         数值越大越先出队，同一通道内保持 FIFO，使下游阶段优先排空以控制工作集。
+         全局并发上限之下可按任务类型或处理器类型（沿 MRO 查找，可使用阶段基类）单独限流，
+         并可为阶段预留槽位：其他阶段占满共享槽位后，预留部分仍只供该阶段使用。
+         按任务类型与处理器类型记录队列深度、在途数、信号量等待、处理耗时、结果分类与扇出指标。
+         除常驻模式 run() 外，run_until_idle() 提供一次性运行模式：注入种子任务后跟踪未完成任务数
+         （已入队 + 处理中），归零即停止分发并返回 BusRunSummary，便于 cron / k8s Job 驱动。
+         配置 journal 时，任务入队前写入预写日志，处理器正常结束（含异常被捕获）后确认；
+         启动时先重放上次未确认的任务，语义为至少一次（崩溃时处理中的任务会被再次处理）。
+         配置 tracer 时，每次处理器调用记为一个 span，后续任务以其为父 span 入队，
+         种子任务开启新链路，从而无需修改 data 类即可还原任务血缘与各阶段耗时。
+         配置 batch_policies 的任务类型在分发时按具体类型攒批，攒满 max_size 个或首个任务等待满
+         max_linger 秒后整批交给处理器的 handle_batch()，一批只占用一个并发槽位。
+         处理器返回 attempt 递增、not_before 为 0 的任务表示重试，Bus 按任务类型（沿 MRO 查找）的
+         RetryPolicy 计算指数退避加随机抖动后的到期时刻写入 not_before；未到期的任务放入按到期时刻排序的
+         延迟堆，由独立协程到期后移入队列，等待期间不占用队列容量与并发槽位，但计入未完成任务数。
+         处理器可返回异步迭代器，Bus 在槽位内边迭代边将产出的任务入队，批量请求的响应无需等整批结束即可进入下游。
+         配置 task_deadlines / handler_deadlines 时，处理器调用（含异步迭代）超过期限即被取消，取消经 await 传入
+         httpx 与数据库驱动，槽位随即释放；超时按处理器与任务类型计数，尚无产出的请求任务递减 retry 后按重试策略重投。
+         run_deadline 限制一次性运行的总时长，到期后取消全部处理中的子协程并返回汇总。
+         启用 fuse_inline 时，处理器产出的任务若对应声明 inline 的处理器（如站点路由器、站点处理器），
+         就地调用该处理器并沿链路继续，直到产出非内联任务才入队：中间任务不经队列、任务日志与子协程，
+         但仍计入处理数、结果分类与耗时指标，并记录 span。配置了批量、限流、预留槽位或期限的类型不内联，以保证这些配置生效。
+         数据包持有的落盘响应体（FileBody 字段）归数据包所有：处理结束（含异常、超时、内联执行与无处理器丢弃）后，
+         未转交给后续任务的文件即被删除；被取消的任务不删除，启用任务日志时重放仍需读取。
 """
 
 import asyncio
-from collections.abc import Iterable
-from dataclasses import dataclass, field
+import random
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field, replace
+from heapq import heappop, heappush
+from itertools import count
 from logging import getLogger
+from time import perf_counter, time, time_ns
 from typing import TYPE_CHECKING
 
 from base import HandlerBase
 from data.base import TaskBaseData
+from data.gateway import SiteGatewayBaseData
+from data.parse import ParseBaseData
+from data.request import RequestBaseData
+from data.response import ResponseBaseData
+from data.codec import CodecError
+from data.store import StoreBaseData
+from journal import TaskJournal
+from metrics import metrics
+from spool import release_bodies
+from tracing import Span, SpanContext, Tracer
 
 if TYPE_CHECKING:
     from scheduler import Scheduler
 
 logger = getLogger(__name__)
 
+# 阶段族默认优先级：requester < router < gateway < parser < storage，越靠近落库越先出队
+DEFAULT_TASK_PRIORITIES: dict[type[TaskBaseData], int] = {
+    RequestBaseData:     0,
+    ResponseBaseData:    1,
+    SiteGatewayBaseData: 2,
+    ParseBaseData:       3,
+    StoreBaseData:       4,
+}
+
+_QUEUE_DEPTH = metrics.gauge('bus_queue_depth', '队列中等待分发的任务数', ('task',))
+_IN_FLIGHT = metrics.gauge('bus_in_flight', '正在执行的处理器子协程数', ('task', 'handler'))
+_SEMAPHORE_WAIT = metrics.histogram('bus_semaphore_wait_seconds', '子协程等待并发槽位的时间', ('task', 'handler'))
+_HANDLER_LATENCY = metrics.histogram('bus_handler_duration_seconds', '处理器 handle() 耗时', ('task', 'handler'))
+_HANDLER_RESULTS = metrics.counter('bus_handler_results_total', '处理结果计数（success / exception / none）', ('task', 'handler', 'outcome'))
+_FAN_OUT = metrics.histogram(
+    'bus_handler_fan_out', '单个任务产出的后续任务数', ('task', 'handler'),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+_DROPPED = metrics.counter('bus_dropped_total', '注册表中无对应处理器而被丢弃的任务数', ('task',))
+_BATCH_SIZE = metrics.histogram(
+    'bus_batch_size', '批量分发的实际批大小', ('task', 'handler'),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+_DELAYED = metrics.gauge('bus_delayed_tasks', '延迟堆中等待到期的重试任务数', ('task',))
+_RETRIES = metrics.counter('bus_retries_scheduled_total', '按重试策略延迟执行的任务数', ('task',))
+_LIMIT = metrics.gauge('bus_concurrency_limit', '并发上限（global / task / handler / reserved）', ('scope', 'key'))
+_LIMIT_IN_USE = metrics.gauge('bus_concurrency_in_use', '已占用的并发槽位数', ('scope', 'key'))
+_FUSED = metrics.counter('bus_fused_total', '内联执行、未经队列的任务数', ('task', 'handler'))
+_TIMEOUTS = metrics.counter('bus_handler_timeouts_total', '处理器调用超过期限被取消的任务数', ('task', 'handler'))
+
+
+@dataclass(frozen=True)
+class BatchPolicy(object):
+    """
+    @brief 批量分发策略
+    @param max_size 单批最大任务数，攒满立即分发
+    @param max_linger 批内首个任务的最长等待时间（秒），超时后不足 max_size 也分发
+    """
+    max_size: int      # 单批最大任务数
+    max_linger: float  # 首个任务最长等待时间（秒）
+
+
+@dataclass(frozen=True)
+class RetryPolicy(object):
+    """
+    @brief 延迟重试策略
+    @details 第 n 次重试的名义延迟为 min(base_delay × factor^(n-1), max_delay)，
+             实际延迟在 [名义延迟 × (1 - jitter), 名义延迟] 间均匀随机，避免同一时刻失败的任务同时重试。
+    @param base_delay 首次重试的延迟（秒），0 表示立即重试
+    @param factor 每次重试延迟的放大倍数
+    @param max_delay 延迟上限（秒）
+    @param jitter 抖动比例，0.0 ~ 1.0
+    """
+    base_delay: float        # 首次重试延迟（秒）
+    factor: float = 2.0      # 延迟放大倍数
+    max_delay: float = 60.0  # 延迟上限（秒）
+    jitter: float = 0.5      # 抖动比例
+
+    def delay(self, attempt: int) -> float:
+        """
+        @brief 计算第 attempt 次重试的延迟
+        @param attempt 重试次数，从 1 开始
+        @return 延迟秒数
+        """
+        nominal: float = min(self.base_delay * self.factor ** max(attempt - 1, 0), self.max_delay)
+        return nominal * (1.0 - self.jitter * random.random())
+
+
+# 默认仅对请求阶段启用延迟重试：1 秒起，每次翻倍，最长 60 秒
+DEFAULT_RETRY_POLICIES: dict[type[TaskBaseData], RetryPolicy] = {
+    RequestBaseData: RetryPolicy(base_delay=1.0),
+}
+
 
 @dataclass(frozen=True)
 class BusConfig(object):
@@ -29,15 +145,177 @@ class BusConfig(object):
     @brief 事件总线配置
     @details frozen=True 防止配置在运行时被意外修改。
              dispatch_registry 为 dict，不可哈希，使用 field(hash=False) 排除在 __hash__ 之外。
+             max_queue_size 与 max_pending_tasks 为 0 时不设上限，与无界模式行为一致。
+             task_priorities 的键可以是具体任务类型，也可以是阶段基类，按 MRO 最近者生效，未命中为 0。
+             seed_priority 为 None 时，Bus.put 注入的种子任务与同类型任务同级。
+             task_limits / handler_limits 的键同样按 MRO 最近者生效，以基类为键时该基类下所有类型共享同一上限；
+             两者均在全局上限之下叠加生效。reserved_slots 之和不得超过 max_concurrent_tasks。
+             journal 由调用方创建、open() 与 close()，Bus 只负责追加、确认与重放。
+             batch_policies 的键按 MRO 最近者生效，但攒批始终按具体类型分组，同一批任务类型相同。
+             retry_policies 的键按 MRO 最近者生效，未命中的任务类型重试时立即入队。
+             task_deadlines / handler_deadlines 的键按 MRO 最近者生效，两者同时命中时取较短者，均未命中时不限时。
+             run_deadline 只作用于 run_until_idle()，0 表示不限。
+             fuse_inline 为 False 时声明 inline 的处理器也照常经队列分发。
     """
     dispatch_registry: dict[type[TaskBaseData], HandlerBase] = field(hash=False)  # 类型到处理器实例的映射表
     max_concurrent_tasks: int                                                      # 信号量上限，控制并发子协程数
+    max_queue_size: int = 0                                                        # 队列深度上限，0 表示无界
+    max_pending_tasks: int = 0                                                     # 已创建但未取得信号量的子协程上限，0 表示不限
+    task_priorities: dict[type[TaskBaseData], int] = field(                        # 任务类型 / 阶段基类 → 优先级
+        default_factory=lambda: dict(DEFAULT_TASK_PRIORITIES), hash=False,
+    )
+    seed_priority: int | None = None                                               # 种子任务优先级，None 表示按类型
+    task_limits: dict[type[TaskBaseData], int] = field(default_factory=dict, hash=False)   # 任务类型 / 阶段基类 → 并发上限
+    handler_limits: dict[type[HandlerBase], int] = field(default_factory=dict, hash=False)  # 处理器类型 / 基类 → 并发上限
+    reserved_slots: dict[type[TaskBaseData], int] = field(default_factory=dict, hash=False)  # 任务类型 / 阶段基类 → 预留槽位数
+    journal: TaskJournal | None = field(default=None, hash=False)                  # 已 open() 的任务日志，None 表示不持久化
+    tracer: Tracer | None = field(default=None, hash=False)                        # 任务追踪器，None 表示不追踪
+    batch_policies: dict[type[TaskBaseData], BatchPolicy] = field(default_factory=dict, hash=False)  # 任务类型 / 阶段基类 → 批量策略
+    retry_policies: dict[type[TaskBaseData], RetryPolicy] = field(                 # 任务类型 / 阶段基类 → 重试策略
+        default_factory=lambda: dict(DEFAULT_RETRY_POLICIES), hash=False,
+    )
+    task_deadlines: dict[type[TaskBaseData], float] = field(default_factory=dict, hash=False)   # 任务类型 / 阶段基类 → 处理期限（秒）
+    handler_deadlines: dict[type[HandlerBase], float] = field(default_factory=dict, hash=False)  # 处理器类型 / 基类 → 处理期限（秒）
+    run_deadline: float = 0.0                                                      # 一次性运行总期限（秒），0 表示不限
+    fuse_inline: bool = True                                                       # 是否内联执行声明 inline 的处理器
+
+
+@dataclass(frozen=True)
+class BusRunSummary(object):
+    """
+    @brief 一次性运行结束后的汇总
+    @param seeds 注入的种子任务数
+    @param handled 完成处理的任务数（含异常）
+    @param exceptions handle() 抛出异常的任务数
+    @param dropped 无对应处理器而被丢弃的任务数
+    @param produced 处理器产出并回投总线的后续任务数
+    @param elapsed_seconds 从注入种子到总线空闲的耗时（秒）
+    @param timeouts 处理超过期限被取消的任务数
+    @param deadline_exceeded 是否因 run_deadline 到期而提前结束
+    """
+    seeds: int                       # 注入的种子任务数
+    handled: int                     # 完成处理的任务数（含异常）
+    exceptions: int                  # handle() 抛出异常的任务数
+    dropped: int                     # 无对应处理器而被丢弃的任务数
+    produced: int                    # 回投总线的后续任务数
+    elapsed_seconds: float           # 注入种子到总线空闲的耗时（秒）
+    timeouts: int = 0                # 超过期限的任务数
+    deadline_exceeded: bool = False  # 是否因总期限到期而结束
+
+
+@dataclass(slots=True)
+class _Envelope(object):
+    """
+    @brief 队列中随任务传递的总线内部状态
+    @details 任务本身为 frozen dataclass 且由处理器构造，日志记录 ID 与追踪上下文不写入任务，而是由信封携带。
+    """
+    task: TaskBaseData                 # 任务数据包
+    record_id: int | None = None       # 任务日志记录 ID，None 表示未持久化
+    parent: SpanContext | None = None  # 父 span 上下文，None 表示链路起点
+    enqueued_ns: int = 0               # 入队时刻（Unix 纳秒），仅追踪时记录
+
+
+class _SlotGate(object):
+    """
+    @brief 带阶段预留的全局并发槽位
+    @details 功能上等同于容量为 capacity 的信号量，但为 reserved 中的每个通道保留一部分槽位：
+             某通道取得槽位的条件是，取得后剩余的空闲槽位仍足以兑现其他通道尚未用满的预留。
+             等待者按通道分别排队，释放槽位时在所有可准入的通道队首中按到达顺序唤醒，
+             唤醒即完成占用（直接移交），新到达者不会抢占已唤醒的等待者。
+    """
+
+    def __init__(self, capacity: int, reserved: dict[type[TaskBaseData], int]) -> None:
+        """
+        @brief 初始化槽位
+        @param capacity 全局槽位总数
+        @param reserved 通道键 → 预留槽位数
+        @throws ValueError 预留槽位之和超过总数时
+        """
+        if sum(reserved.values()) > capacity:
+            raise ValueError(f'预留槽位之和 {sum(reserved.values())} 超过全局并发上限 {capacity}')
+        self._capacity: int = capacity
+        self._reserved: dict[type[TaskBaseData], int] = reserved
+        self._used_total: int = 0
+        self._used: dict[type[TaskBaseData] | None, int] = {}
+        self._waiters: dict[type[TaskBaseData] | None, deque[tuple[int, asyncio.Future]]] = {}
+        self._sequence: count = count()
+
+    async def acquire(self, lane: type[TaskBaseData] | None) -> None:
+        """
+        @brief 为指定通道取得一个槽位，无可用槽位时等待
+        @param lane 预留通道键，None 表示不属于任何预留通道
+        """
+        waiters = self._waiters.setdefault(lane, deque())
+        while waiters and waiters[0][1].done():
+            waiters.popleft()
+        if not waiters and self._admissible(lane):
+            self._take(lane)
+            return
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        waiters.append((next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 已被唤醒（槽位已移交）但随即取消时归还槽位
+            if future.done() and not future.cancelled():
+                self.release(lane)
+            raise
+
+    def release(self, lane: type[TaskBaseData] | None) -> None:
+        """
+        @brief 归还一个槽位并唤醒可准入的等待者
+        @param lane 取得槽位时使用的通道键
+        """
+        self._used_total -= 1
+        self._used[lane] -= 1
+        self._wake()
+
+    def _admissible(self, lane: type[TaskBaseData] | None) -> bool:
+        """
+        @brief 判断指定通道当前能否取得槽位
+        @param lane 通道键
+        @return 取得后仍能兑现其他通道未用满的预留时为 True
+        """
+        free: int = self._capacity - self._used_total
+        if free <= 0:
+            return False
+        held: int = sum(
+            max(slots - self._used.get(key, 0), 0) for key, slots in self._reserved.items() if key is not lane
+        )
+        return free > held
+
+    def _take(self, lane: type[TaskBaseData] | None) -> None:
+        """
+        @brief 占用一个槽位
+        @param lane 通道键
+        """
+        self._used_total += 1
+        self._used[lane] = self._used.get(lane, 0) + 1
+
+    def _wake(self) -> None:
+        """
+        @brief 在可准入的通道队首中按到达顺序依次移交槽位，直到没有可准入者
+        """
+        while True:
+            chosen: type[TaskBaseData] | None = None
+            chosen_seq: int | None = None
+            for lane, waiters in self._waiters.items():
+                while waiters and waiters[0][1].done():
+                    waiters.popleft()
+                if waiters and (chosen_seq is None or waiters[0][0] < chosen_seq) and self._admissible(lane):
+                    chosen, chosen_seq = lane, waiters[0][0]
+            if chosen_seq is None:
+                return
+            _, future = self._waiters[chosen].popleft()
+            self._take(chosen)
+            future.set_result(None)
 
 
 class Bus(object):
     """
     @brief 异步事件总线
-    @details 框架核心调度器。持有 asyncio.Queue，主协程永远运行，
+    @details 框架核心调度器。持有 asyncio.PriorityQueue，主协程永远运行，
              仅负责将任务按类型路由到注册表中对应的 HandlerBase 实例，
              不包含任何业务逻辑。
     """
@@ -45,71 +323,652 @@ class Bus(object):
     def __init__(self, config: BusConfig) -> None:
         """
         @brief 初始化事件总线
-        @param config 总线配置，包含类型注册表和最大并发数
+        @param config 总线配置，包含类型注册表、最大并发数与有界准入参数
         """
         self._registry: dict[type[TaskBaseData], HandlerBase] = config.dispatch_registry
-        self._queue: asyncio.Queue[TaskBaseData] = asyncio.Queue()
-        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(config.max_concurrent_tasks)
+        # 队列元素为 (-优先级, 入队序号, 信封)，序号保证同一通道内 FIFO 且不比较信封本身
+        self._queue: asyncio.PriorityQueue[tuple[int, int, _Envelope]] = asyncio.PriorityQueue(
+            maxsize=config.max_queue_size,
+        )
+        self._sequence: count = count()
+        self._priorities: dict[type[TaskBaseData], int] = config.task_priorities
+        self._priority_cache: dict[type[TaskBaseData], int] = {}
+        self._seed_priority: int | None = config.seed_priority
+        self._journal: TaskJournal | None = config.journal
+        self._tracer: Tracer | None = config.tracer
+        self._batch_policies: dict[type[TaskBaseData], BatchPolicy] = config.batch_policies
+        self._batch_policy_cache: dict[type[TaskBaseData], BatchPolicy | None] = {}
+        # 按具体任务类型攒批的缓冲区及其超时分发定时器
+        self._batches: dict[type[TaskBaseData], list[_Envelope]] = {}
+        self._batch_timers: dict[type[TaskBaseData], asyncio.TimerHandle] = {}
+        self._retry_policies: dict[type[TaskBaseData], RetryPolicy] = config.retry_policies
+        self._retry_policy_cache: dict[type[TaskBaseData], RetryPolicy | None] = {}
+        # 延迟堆元素为 (到期时刻, 入队序号, 优先级, 信封)；堆顶变化时置位事件唤醒释放协程
+        self._delayed: list[tuple[float, int, int, _Envelope]] = []
+        self._delayed_changed: asyncio.Event = asyncio.Event()
+        self._gate: _SlotGate = _SlotGate(config.max_concurrent_tasks, config.reserved_slots)
+        self._reserved: dict[type[TaskBaseData], int] = config.reserved_slots
+        self._lane_cache: dict[type[TaskBaseData], type[TaskBaseData] | None] = {}
+        # 分级限流信号量，键与配置一致；按具体类型缓存查找结果
+        self._task_limits: dict[type[TaskBaseData], asyncio.Semaphore] = {
+            cls: asyncio.Semaphore(limit) for cls, limit in config.task_limits.items()
+        }
+        self._handler_limits: dict[type[HandlerBase], asyncio.Semaphore] = {
+            cls: asyncio.Semaphore(limit) for cls, limit in config.handler_limits.items()
+        }
+        self._limit_cache: dict[tuple[type[TaskBaseData], type[HandlerBase]], tuple[tuple[asyncio.Semaphore, str, str], ...]] = {}
+        self._task_deadlines: dict[type[TaskBaseData], float] = config.task_deadlines
+        self._handler_deadlines: dict[type[HandlerBase], float] = config.handler_deadlines
+        self._deadline_cache: dict[tuple[type[TaskBaseData], type[HandlerBase]], float | None] = {}
+        self._run_deadline: float = config.run_deadline
+        self._fuse_inline: bool = config.fuse_inline
+        self._inline_cache: dict[type[TaskBaseData], HandlerBase | None] = {}
+        _LIMIT.labels('global', '*').set(config.max_concurrent_tasks)
+        for scope, limits in (('task', config.task_limits), ('handler', config.handler_limits), ('reserved', config.reserved_slots)):
+            for cls, limit in limits.items():
+                _LIMIT.labels(scope, cls.__name__).set(limit)
+        # 限制已创建但仍在等待并发槽位的子协程数，None 表示不限
+        self._pending: asyncio.Semaphore | None = (
+            asyncio.Semaphore(config.max_pending_tasks) if config.max_pending_tasks > 0 else None
+        )
+        # 持有子协程引用，防止运行中的 Task 被垃圾回收
+        self._tasks: set[asyncio.Task] = set()
+        # 未完成任务数（已入队 + 处理中），归零时置位 _idle
+        self._outstanding: int = 0
+        self._idle: asyncio.Event = asyncio.Event()
+        self._idle.set()
+        self._handled: int = 0
+        self._exceptions: int = 0
+        self._dropped: int = 0
+        self._produced: int = 0
+        self._timeouts: int = 0
 
     async def run(self, scheduler: Scheduler) -> None:
         """
         @brief 启动总线，并发运行 _dispatch 主协程和 scheduler.run
-        @details 两个协程均为永久运行，使用 gather 同时启动
+        @details 两个协程均为永久运行，使用 gather 同时启动；配置任务日志时同时重放未确认任务，
+                 延迟重试的释放协程同样常驻
         @param scheduler 调度器实例，负责产生初始任务并注入队列
         """
-        await asyncio.gather(self._dispatch(), scheduler.run(self))
+        await asyncio.gather(self._dispatch(), self._release_delayed(), self._recover(), scheduler.run(self))
+
+    async def run_until_idle(self, seeds: Iterable[TaskBaseData]) -> BusRunSummary:
+        """
+        @brief 一次性运行：注入种子任务，待全部后续任务处理完毕后返回
+        @details 先启动分发协程，再重放任务日志中未确认的任务并注入种子，保证有界队列下注入不会阻塞死锁。
+                 未完成任务数归零（队列与延迟堆为空且无处理中的子协程）后取消分发与延迟释放协程并返回汇总。
+                 配置 run_deadline 时，到期后停止分发并取消全部处理中的子协程；被取消的任务不确认，
+                 启用任务日志时下次运行重放。
+        @param seeds 种子任务
+        @return 本次运行的汇总
+        """
+        start: float = perf_counter()
+        seed_count: int = 0
+        deadline_exceeded: bool = False
+        dispatcher: asyncio.Task = asyncio.create_task(self._dispatch())
+        releaser: asyncio.Task = asyncio.create_task(self._release_delayed())
+
+        try:
+            async with asyncio.timeout(self._run_deadline or None) as scope:
+                await self._recover()
+                for seed in seeds:
+                    await self.put(seed)
+                    seed_count += 1
+                await self._idle.wait()
+        except TimeoutError:
+            if not scope.expired():
+                raise
+            deadline_exceeded = True
+            logger.warning(f"一次性运行超过总期限 {self._run_deadline:g} 秒，取消 {len(self._tasks)} 个处理中的任务")
+        finally:
+            backgrounds: list[asyncio.Task] = [dispatcher, releaser, *self._tasks]
+            for background in backgrounds:
+                background.cancel()
+            for background in backgrounds:
+                with suppress(asyncio.CancelledError):
+                    await background
 
-    async def put(self, task: TaskBaseData) -> None:
+        summary = BusRunSummary(
+            seeds=seed_count,
+            handled=self._handled,
+            exceptions=self._exceptions,
+            dropped=self._dropped,
+            produced=self._produced,
+            elapsed_seconds=perf_counter() - start,
+            timeouts=self._timeouts,
+            deadline_exceeded=deadline_exceeded,
+        )
+        logger.info(
+            f"{'总线运行超时' if deadline_exceeded else '总线空闲'}，一次性运行结束：种子 {summary.seeds} 个，处理 {summary.handled} 个，"
+            f"异常 {summary.exceptions} 个，超时 {summary.timeouts} 个，丢弃 {summary.dropped} 个，耗时 {summary.elapsed_seconds:.2f} 秒"
+        )
+        return summary
+
+    async def put(self, task: TaskBaseData, priority: int | None = None) -> None:
         """
         @brief 向总线队列注入任务
-        @details 供 Scheduler 及外部调用方使用
+        @details 供 Scheduler 及外部调用方使用。队列已满时阻塞，直到分发协程取走任务。
+                 优先级依次取 priority 参数、seed_priority、任务类型优先级。
         @param task 待处理的任务数据包
+        @param priority 显式指定的优先级，数值越大越先出队
+        """
+        if priority is None:
+            priority = self._seed_priority
+        await self._enqueue(task, priority)
+
+    async def _recover(self) -> None:
+        """
+        @brief 将任务日志中未确认的任务按原顺序重新入队，沿用原记录 ID
+        """
+        if self._journal is None:
+            return
+        recovered: int = 0
+        for record_id, task in self._journal.recovered():
+            await self._enqueue(task, record_id=record_id)
+            recovered += 1
+        if recovered:
+            logger.info(f"已从任务日志重放 {recovered} 个未确认任务")
+
+    async def _enqueue(
+        self,
+        task: TaskBaseData,
+        priority: int | None = None,
+        record_id: int | None = None,
+        parent: SpanContext | None = None,
+    ) -> None:
         """
-        await self._queue.put(task)
+        @brief 按优先级将任务放入队列，尚未到期的重试任务放入延迟堆
+        @details 重试任务（attempt > 0 且 not_before 为 0）先按重试策略写入到期时刻，再写入日志，
+                 使重放后仍按原到期时刻执行。
+                 配置任务日志且未给出 record_id 时先写入日志；无法编码的任务记录警告后不持久化，照常入队。
+        @param task 待入队的任务数据包
+        @param priority 优先级，None 时按任务类型查表
+        @param record_id 已存在的日志记录 ID（重放时使用）
+        @param parent 产出该任务的 span 上下文，None 表示链路起点
+        """
+        if priority is None:
+            priority = self._priority_of(type(task))
+        if task.attempt > 0 and not task.not_before:
+            policy: RetryPolicy | None = self._retry_policy_of(type(task))
+            if policy is not None and policy.base_delay > 0:
+                task = replace(task, not_before=time() + policy.delay(task.attempt))
+                _RETRIES.labels(type(task).__name__).inc()
+        if self._journal is not None and record_id is None:
+            try:
+                record_id = self._journal.append(task)
+            except CodecError as e:
+                logger.warning(f"任务 {type(task).__name__} 无法写入任务日志，本次不持久化：{e}")
+        self._outstanding += 1
+        self._idle.clear()
+        envelope = _Envelope(task, record_id, parent, time_ns() if self._tracer is not None else 0)
+        if task.not_before > time():
+            heappush(self._delayed, (task.not_before, next(self._sequence), priority, envelope))
+            _DELAYED.labels(type(task).__name__).inc()
+            if self._delayed[0][3] is envelope:
+                self._delayed_changed.set()
+            return
+        await self._queue.put((-priority, next(self._sequence), envelope))
+        _QUEUE_DEPTH.labels(type(task).__name__).inc()
+
+    async def _release_delayed(self) -> None:
+        """
+        @brief 延迟释放协程，永不结束
+        @details 等待到堆顶任务到期后将其移入队列；等待期间有更早到期的任务加入时被事件唤醒重新计时。
+                 有界队列已满时阻塞在 put 上，但不影响分发协程继续出队。
+        """
+        while True:
+            if not self._delayed:
+                self._delayed_changed.clear()
+                await self._delayed_changed.wait()
+                continue
+            remaining: float = self._delayed[0][0] - time()
+            if remaining > 0:
+                self._delayed_changed.clear()
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(self._delayed_changed.wait(), remaining)
+                continue
+            _, sequence, priority, envelope = heappop(self._delayed)
+            _DELAYED.labels(type(envelope.task).__name__).dec()
+            await self._queue.put((-priority, sequence, envelope))
+            _QUEUE_DEPTH.labels(type(envelope.task).__name__).inc()
+
+    def _finish(self, count: int = 1) -> None:
+        """
+        @brief 标记任务处理完毕（含丢弃），未完成任务数归零时置位空闲事件
+        @param count 完成的任务数
+        """
+        self._outstanding -= count
+        if self._outstanding == 0:
+            self._idle.set()
+
+    def _priority_of(self, task_type: type[TaskBaseData]) -> int:
+        """
+        @brief 沿 MRO 查找任务类型的优先级，结果按类型缓存
+        @param task_type 任务的具体类型
+        @return 最近的已配置祖先类型的优先级；均未配置时为 0
+        """
+        priority: int | None = self._priority_cache.get(task_type)
+        if priority is None:
+            priority = next((self._priorities[cls] for cls in task_type.__mro__ if cls in self._priorities), 0)
+            self._priority_cache[task_type] = priority
+        return priority
+
+    def _batch_policy_of(self, task_type: type[TaskBaseData]) -> BatchPolicy | None:
+        """
+        @brief 沿 MRO 查找任务类型的批量策略，结果按类型缓存
+        @param task_type 任务的具体类型
+        @return 最近的已配置祖先类型的策略；均未配置时为 None
+        """
+        if task_type not in self._batch_policy_cache:
+            self._batch_policy_cache[task_type] = next(
+                (self._batch_policies[cls] for cls in task_type.__mro__ if cls in self._batch_policies), None,
+            )
+        return self._batch_policy_cache[task_type]
+
+    def _retry_policy_of(self, task_type: type[TaskBaseData]) -> RetryPolicy | None:
+        """
+        @brief 沿 MRO 查找任务类型的重试策略，结果按类型缓存
+        @param task_type 任务的具体类型
+        @return 最近的已配置祖先类型的策略；均未配置时为 None
+        """
+        if task_type not in self._retry_policy_cache:
+            self._retry_policy_cache[task_type] = next(
+                (self._retry_policies[cls] for cls in task_type.__mro__ if cls in self._retry_policies), None,
+            )
+        return self._retry_policy_cache[task_type]
+
+    def _lane_of(self, task_type: type[TaskBaseData]) -> type[TaskBaseData] | None:
+        """
+        @brief 沿 MRO 查找任务类型所属的预留通道，结果按类型缓存
+        @param task_type 任务的具体类型
+        @return reserved_slots 中最近的祖先类型；均未配置时为 None
+        """
+        if task_type not in self._lane_cache:
+            self._lane_cache[task_type] = next((cls for cls in task_type.__mro__ if cls in self._reserved), None)
+        return self._lane_cache[task_type]
+
+    def _limits_of(self, task_type: type[TaskBaseData], handler_type: type[HandlerBase]) -> tuple[tuple[asyncio.Semaphore, str, str], ...]:
+        """
+        @brief 查找任务适用的分级限流信号量，结果按 (任务类型, 处理器类型) 缓存
+        @details 任务类型与处理器类型各自沿 MRO 取最近的已配置键，先任务后处理器，固定顺序避免相互等待。
+        @param task_type 任务的具体类型
+        @param handler_type 处理器的具体类型
+        @return (信号量, 指标 scope, 指标 key) 元组
+        """
+        key = (task_type, handler_type)
+        limits = self._limit_cache.get(key)
+        if limits is None:
+            found: list[tuple[asyncio.Semaphore, str, str]] = []
+            for scope, mro, table in (('task', task_type.__mro__, self._task_limits), ('handler', handler_type.__mro__, self._handler_limits)):
+                cls = next((cls for cls in mro if cls in table), None)
+                if cls is not None:
+                    found.append((table[cls], scope, cls.__name__))
+            limits = self._limit_cache[key] = tuple(found)
+        return limits
+
+    def _deadline_of(self, task_type: type[TaskBaseData], handler_type: type[HandlerBase]) -> float | None:
+        """
+        @brief 查找任务适用的处理期限，结果按 (任务类型, 处理器类型) 缓存
+        @details 任务类型与处理器类型各自沿 MRO 取最近的已配置键，同时命中时取较短者。
+        @param task_type 任务的具体类型
+        @param handler_type 处理器的具体类型
+        @return 期限（秒）；均未配置时为 None
+        """
+        key = (task_type, handler_type)
+        if key not in self._deadline_cache:
+            found = [
+                next((table[cls] for cls in mro if cls in table), None)
+                for mro, table in ((task_type.__mro__, self._task_deadlines), (handler_type.__mro__, self._handler_deadlines))
+            ]
+            self._deadline_cache[key] = min((d for d in found if d is not None), default=None)
+        return self._deadline_cache[key]
+
+    def _retry_timed_out(self, task: TaskBaseData) -> TaskBaseData | None:
+        """
+        @brief 为超时的任务构造重试副本
+        @details 只有请求任务携带剩余重试次数：retry > 1 时递减并交由重试策略计算退避，与请求器的失败重试一致；
+                 其余任务重试可能重复写入或重复产出，直接丢弃。
+        @param task 超时的任务
+        @return 重试副本；不重试时为 None
+        """
+        if isinstance(task, RequestBaseData) and task.retry > 1:
+            logger.warning(f"{type(task).__name__} 处理超时，剩余重试 {task.retry - 1} 次")
+            return replace(task, retry=task.retry - 1, attempt=task.attempt + 1, not_before=0.0)
+        logger.error(f"{type(task).__name__} 处理超时，丢弃任务")
+        return None
+
+    def _inline_of(self, task_type: type[TaskBaseData]) -> HandlerBase | None:
+        """
+        @brief 查找可内联执行该任务类型的处理器，结果按类型缓存
+        @details 处理器须声明 inline，且任务类型与处理器类型均未配置批量、限流、预留槽位与期限。
+        @param task_type 任务的具体类型
+        @return 可内联的处理器；不可内联或未启用融合时为 None
+        """
+        if task_type not in self._inline_cache:
+            handler: HandlerBase | None = self._registry.get(task_type) if self._fuse_inline else None
+            if handler is not None and not (
+                handler.inline
+                and self._batch_policy_of(task_type) is None
+                and self._lane_of(task_type) is None
+                and not self._limits_of(task_type, type(handler))
+                and self._deadline_of(task_type, type(handler)) is None
+            ):
+                handler = None
+            self._inline_cache[task_type] = handler
+        return self._inline_cache[task_type]
+
+    async def _fuse(self, task: TaskBaseData, parent: SpanContext | None) -> list[tuple[TaskBaseData, SpanContext | None]]:
+        """
+        @brief 沿内联处理器链路就地处理任务，返回需要入队的任务
+        @details 任务对应可内联的处理器时直接调用，产出的任务继续同样处理（深度优先，保持产出顺序），
+                 直到遇到不可内联的类型。内联处理器抛出的异常与普通处理器一样只记录日志，其任务丢弃。
+                 每一步结束后删除该任务持有、未转交给产出任务的落盘响应体（如未命中路由的响应）。
+        @param task 上游处理器产出的任务
+        @param parent 上游 span 上下文
+        @return (待入队任务, 其父 span 上下文) 列表；task 不可内联时即为其自身
+        """
+        fused: list[tuple[TaskBaseData, SpanContext | None]] = []
+        stack: list[tuple[TaskBaseData, SpanContext | None]] = [(task, parent)]
+        while stack:
+            task, parent = stack.pop()
+            handler: HandlerBase | None = self._inline_of(type(task))
+            if handler is None:
+                fused.append((task, parent))
+                continue
+
+            labels: tuple[str, str] = (type(task).__name__, type(handler).__name__)
+            span: Span | None = None
+            if self._tracer is not None:
+                span = self._tracer.start_span(parent, labels[1], labels[0], time_ns())
+                span.start_ns = span.enqueued_ns
+                span.attributes['inline'] = 1
+            start: float = perf_counter()
+            try:
+                result = await handler.handle(task)
+                if isinstance(result, AsyncIterator):
+                    results: list[TaskBaseData | None] = [item async for item in result]
+                elif isinstance(result, Iterable):
+                    results = list(result)
+                else:
+                    results = [result]
+                produced: list[TaskBaseData] = [item for item in results if item is not None]
+                outcome: str = 'success' if produced else 'none'
+            except Exception as e:
+                produced = []
+                outcome = 'exception'
+                self._exceptions += 1
+                logger.error(
+                    f"处理器 {labels[1]} 内联处理任务 {labels[0]} 时发生异常：{e}",
+                    exc_info=True,
+                )
+            _HANDLER_LATENCY.labels(*labels).observe(perf_counter() - start)
+            _HANDLER_RESULTS.labels(*labels, outcome).inc()
+            _FUSED.labels(*labels).inc()
+            if outcome != 'exception':
+                _FAN_OUT.labels(*labels).observe(len(produced))
+            self._handled += 1
+            self._produced += len(produced)
+            release_bodies((task,), produced)
+
+            context: SpanContext | None = parent
+            if span is not None:
+                span.end_ns = time_ns()
+                span.outcome = outcome
+                span.fan_out = len(produced)
+                self._tracer.finish(span)
+                context = span.context
+            stack.extend((item, context) for item in reversed(produced))
+        return fused
+
+    @asynccontextmanager
+    async def _slot(self, task_type: type[TaskBaseData], handler_type: type[HandlerBase]) -> AsyncIterator[None]:
+        """
+        @brief 依次取得分级限流许可与全局槽位，退出时逆序归还
+        @details 先取分级许可再取全局槽位，被单项上限挡住的任务不会占用全局槽位。
+        @param task_type 任务的具体类型
+        @param handler_type 处理器的具体类型
+        """
+        lane: type[TaskBaseData] | None = self._lane_of(task_type)
+        acquired: list[tuple[asyncio.Semaphore, str, str]] = []
+        try:
+            for limit in self._limits_of(task_type, handler_type):
+                await limit[0].acquire()
+                acquired.append(limit)
+                _LIMIT_IN_USE.labels(limit[1], limit[2]).inc()
+            await self._gate.acquire(lane)
+            _LIMIT_IN_USE.labels('global', '*').inc()
+            try:
+                yield
+            finally:
+                _LIMIT_IN_USE.labels('global', '*').dec()
+                self._gate.release(lane)
+        finally:
+            for semaphore, scope, key in reversed(acquired):
+                _LIMIT_IN_USE.labels(scope, key).dec()
+                semaphore.release()
 
     async def _dispatch(self) -> None:
         """
         @brief 主分发协程，永不结束
         @details while True 循环从队列取任务，查找注册表，
                  为每个任务创建独立子协程（create_task），不阻塞主循环。
+                 启用 max_pending_tasks 时，先取得准入许可再取任务：等待信号量的子协程达到上限后
+                 停止出队，任务留在有界队列中，从而使上游生产者阻塞。攒批中的任务同样占用准入许可，
+                 许可耗尽时立即分发全部未满的批次，超时定时器保证其余情况下也不会无限期等待。
                  若注册表中无对应类型，记录警告后丢弃该任务。
         """
         while True:
-            task: TaskBaseData = await self._queue.get()
+            if self._pending is not None:
+                if self._pending.locked():
+                    # 准入许可耗尽时攒批中的任务无法再增长，立即分发以免空等超时
+                    for task_type in list(self._batches):
+                        self._flush_batch(task_type)
+                await self._pending.acquire()
+
+            _, _, envelope = await self._queue.get()
+            task: TaskBaseData = envelope.task
+            _QUEUE_DEPTH.labels(type(task).__name__).dec()
             handler: HandlerBase | None = self._registry.get(type(task))
 
             if handler is None:
+                _DROPPED.labels(type(task).__name__).inc()
                 logger.warning(f"注册表中找不到类型 {type(task).__name__} 对应的处理器，任务已丢弃")
+                release_bodies((task,), ())
+                if self._pending is not None:
+                    self._pending.release()
+                self._ack(envelope.record_id)
+                self._dropped += 1
+                self._finish()
+                continue
+
+            policy: BatchPolicy | None = self._batch_policy_of(type(task))
+            if policy is None:
+                self._spawn(handler, [envelope])
                 continue
 
-            asyncio.create_task(self._run_handler(handler, task))
+            batch: list[_Envelope] = self._batches.setdefault(type(task), [])
+            batch.append(envelope)
+            if len(batch) >= policy.max_size:
+                self._flush_batch(type(task))
+            elif len(batch) == 1:
+                self._batch_timers[type(task)] = asyncio.get_running_loop().call_later(
+                    policy.max_linger, self._flush_batch, type(task),
+                )
+
+    def _spawn(self, handler: HandlerBase, envelopes: list[_Envelope]) -> None:
+        """
+        @brief 为一个任务或一批同类型任务创建子协程
+        @param handler 注册表中匹配到的处理器实例
+        @param envelopes 队列信封列表
+        """
+        child: asyncio.Task = asyncio.create_task(self._run_handler(handler, envelopes))
+        self._tasks.add(child)
+        child.add_done_callback(self._tasks.discard)
+
+    def _flush_batch(self, task_type: type[TaskBaseData]) -> None:
+        """
+        @brief 分发指定类型当前攒下的整批任务，并取消其超时定时器
+        @param task_type 任务的具体类型
+        """
+        timer: asyncio.TimerHandle | None = self._batch_timers.pop(task_type, None)
+        if timer is not None:
+            timer.cancel()
+        batch: list[_Envelope] | None = self._batches.pop(task_type, None)
+        if batch:
+            self._spawn(self._registry[task_type], batch)
 
-    async def _run_handler(self, handler: HandlerBase, task: TaskBaseData) -> None:
+    def _ack(self, record_id: int | None) -> None:
         """
-        @brief 子协程：受信号量控制，调用处理器并将返回值投回队列
-        @details 信号量限制同时运行的子协程数。对 handle() 的三种返回值
-                 进行标准化处理：Iterable 逐一入队，单个 TaskBaseData 直接入队，
+        @brief 在任务日志中确认任务处理完毕
+        @param record_id 日志记录 ID，None 表示未持久化
+        """
+        if record_id is not None:
+            self._journal.ack(record_id)
+
+    async def _run_handler(self, handler: HandlerBase, envelopes: list[_Envelope]) -> None:
+        """
+        @brief 子协程：受并发槽位控制，调用处理器并将返回值投回队列
+        @details 全局槽位与分级限流共同限制同时运行的子协程数。取得槽位后立即归还准入许可。对 handle() 的四种返回值
+                 进行标准化处理：异步迭代器边迭代边入队，Iterable 逐一入队，单个 TaskBaseData 直接入队，
                  None 则链路终止。异常只记录日志，不重抛，保证总线不崩溃。
+                 返回值在释放槽位之后才回投队列：队列已满时本协程阻塞等待，
+                 但不占用并发槽位，分发协程仍可继续出队，避免有界模式下相互等待造成死锁。
+                 后续任务全部入队后才将本任务标记为完成，保证未完成任务数不会提前归零。
+                 同理，后续任务写入任务日志后才确认本任务；被取消（进程退出）时不确认，留待下次重放。
+                 配置追踪器时以各信封中的父上下文分别创建 span，处理结束后导出。
         @param handler 注册表中匹配到的处理器实例
-        @param task 待处理的任务数据包
+        @param envelopes 队列信封列表，单个任务时长度为 1，批量分发时为同一类型的整批任务
+        """
+        spans: list[Span] = []
+        if self._tracer is not None:
+            spans = [
+                self._tracer.start_span(e.parent, type(handler).__name__, type(e.task).__name__, e.enqueued_ns)
+                for e in envelopes
+            ]
+        try:
+            await self._handle_and_reinject(handler, envelopes, spans)
+            for envelope in envelopes:
+                self._ack(envelope.record_id)
+        finally:
+            for span in spans:
+                self._tracer.finish(span)
+            self._handled += len(envelopes)
+            self._finish(len(envelopes))
+
+    async def _handle_and_reinject(self, handler: HandlerBase, envelopes: list[_Envelope], spans: list[Span]) -> None:
         """
-        async with self._semaphore:
+        @brief 在并发槽位内调用处理器，释放槽位后将返回值投回队列
+        @details 单个任务调用 handle()，整批任务调用 handle_batch()。批量结果无法逐一对应到输入任务，
+                 后续任务统一以批内首个任务的 span 为父。
+                 返回异步迭代器时在槽位内迭代，产出的任务在队列有空位时立即入队；
+                 队列已满后其余任务暂存，释放槽位后再入队，持有槽位期间从不阻塞在队列上。
+                 迭代中途抛出的异常按处理器异常计，已入队的任务保留，暂存的任务照常入队。
+                 配置期限时，处理器调用与异步迭代整体受期限约束，到期即取消（CancelledError 经 await 传入
+                 httpx 请求与数据库会话）。超时前尚无产出时按任务重试；已有产出时保留已产出的任务，不再整体重试以免重复，
+                 未完成的部分由异步迭代器在取消时自行产出（批量请求器产出未完成请求的重试任务后再重新抛出取消）。
+                 迭代期间本协程在两次取下一项之间从不挂起，取消总是落在迭代器内部。
+                 产出的任务入队前先经 _fuse() 内联执行可融合的下游处理器：异步迭代器的产出在槽位内逐个融合，
+                 其余返回值在释放槽位后融合，不计入本处理器的耗时。
+                 处理结束（含异常与超时）后删除输入任务持有、未转交给产出任务的落盘响应体；被取消时不删除。
+        @param handler 注册表中匹配到的处理器实例
+        @param envelopes 队列信封列表
+        @param spans 与信封一一对应的 span，不追踪时为空
+        """
+        task: TaskBaseData = envelopes[0].task
+        labels: tuple[str, str] = (type(task).__name__, type(handler).__name__)
+        in_flight = _IN_FLIGHT.labels(*labels)
+        wait_start: float = perf_counter()
+        parent: SpanContext | None = spans[0].context if spans else None
+        # 全部后续任务（用于统计）、其中已融合的个数，以及已融合但尚未入队的任务与其父 span 上下文
+        produced: list[TaskBaseData] = []
+        fused_count: int = 0
+        deferred: list[tuple[TaskBaseData, SpanContext | None]] = []
+        failed: bool = False
+        deadline: float | None = self._deadline_of(type(task), type(handler))
+
+        async with self._slot(type(task), type(handler)):
+            if self._pending is not None:
+                for _ in envelopes:
+                    self._pending.release()
+
+            start: float = perf_counter()
+            _SEMAPHORE_WAIT.labels(*labels).observe(start - wait_start)
+            in_flight.inc()
+            start_ns: int = time_ns() if spans else 0
+            for span in spans:
+                span.start_ns = start_ns
+            scope = asyncio.timeout(deadline)
             try:
-                result: Iterable[TaskBaseData | None] | TaskBaseData | None = await handler.handle(task)
+                async with scope:
+                    if len(envelopes) == 1:
+                        result: AsyncIterator[TaskBaseData | None] | Iterable[TaskBaseData | None] | TaskBaseData | None = (
+                            await handler.handle(task)
+                        )
+                    else:
+                        _BATCH_SIZE.labels(*labels).observe(len(envelopes))
+                        result = await handler.handle_batch([e.task for e in envelopes])
+                    if isinstance(result, AsyncIterator):
+                        async for item in result:
+                            if item is None:
+                                continue
+                            produced.append(item)
+                            fused_count += 1
+                            for fused in await self._fuse(item, parent):
+                                if deferred or self._queue.full():
+                                    deferred.append(fused)
+                                else:
+                                    await self._enqueue(fused[0], parent=fused[1])
+                    else:
+                        if not isinstance(result, Iterable):
+                            result = [result]
+                        produced = [i for i in result if i is not None]
             except Exception as e:
-                logger.error(
-                    f"处理器 {type(handler).__name__} 处理任务 {type(task).__name__} 时发生异常：{e}",
-                    exc_info=True,
-                )
-                return
+                failed = True
+                if isinstance(e, TimeoutError) and scope.expired():
+                    for span in spans:
+                        span.outcome = 'timeout'
+                    self._timeouts += len(envelopes)
+                    _TIMEOUTS.labels(*labels).inc(len(envelopes))
+                    _HANDLER_RESULTS.labels(*labels, 'timeout').inc()
+                    logger.warning(
+                        f"处理器 {type(handler).__name__} 处理任务 {type(task).__name__} 超过期限 {deadline:g} 秒，"
+                        f"已产出 {len(produced)} 个后续任务"
+                    )
+                    if not produced:
+                        retries = [self._retry_timed_out(envelope.task) for envelope in envelopes]
+                        produced = [r for r in retries if r is not None]
+                else:
+                    for span in spans:
+                        span.outcome = 'exception'
+                    self._exceptions += len(envelopes)
+                    _HANDLER_RESULTS.labels(*labels, 'exception').inc()
+                    logger.error(
+                        f"处理器 {type(handler).__name__} 处理任务 {type(task).__name__} 时发生异常：{e}",
+                        exc_info=True,
+                    )
+            finally:
+                in_flight.dec()
+                _HANDLER_LATENCY.labels(*labels).observe(perf_counter() - start)
+                end_ns: int = time_ns() if spans else 0
+                for span in spans:
+                    span.end_ns = end_ns
 
-            if not isinstance(result, Iterable):
-                result = [result]
+        self._produced += len(produced)
+        if not failed:
+            _HANDLER_RESULTS.labels(*labels, 'success' if produced else 'none').inc()
+            _FAN_OUT.labels(*labels).observe(len(produced))
+            for span in spans:
+                span.outcome = 'success' if produced else 'none'
+                span.fan_out = len(produced)
+                if len(envelopes) > 1:
+                    span.attributes['batch_size'] = len(envelopes)
 
-            result_without_none: Iterable[TaskBaseData] = [i for i in result if i is not None]
+        release_bodies((envelope.task for envelope in envelopes), produced)
 
-            for item in result_without_none:
-                await self._queue.put(item)
+        for item in produced[fused_count:]:
+            deferred.extend(await self._fuse(item, parent))
+        for item, item_parent in deferred:
+            await self._enqueue(item, parent=item_parent)
 
 
 if __name__ == '__main__':
@@ -7,9 +7,13 @@
          未设置时降级为进程工作目录下的 config.ini（适配本地开发与 Docker 挂载）。
          setup_logging() 从 [logging] 节读取参数，根据 [app] debug 开关
          选择开发模式（控制台）或生产模式（文件轮转），由 main.py 唯一调用一次。
+         event_loop_factory() 按 [app] event_loop 选择事件循环实现（asyncio / uvloop），
+         作为 asyncio.run() 的 loop_factory 参数；uvloop 未安装时回退到标准库实现。
          本模块不导入任何项目内部模块，可被任意层级安全导入。
 """
 
+from asyncio import AbstractEventLoop
+from collections.abc import Callable
 from os import environ
 from configparser import RawConfigParser, SectionProxy
 from logging import DEBUG, ERROR, Formatter, INFO, StreamHandler, WARNING, getLogger
@@ -69,5 +73,32 @@ def setup_logging() -> None:
         getLogger(lib).setLevel(WARNING)
 
 
+def event_loop_factory() -> Callable[[], AbstractEventLoop] | None:
+    """
+    @brief 按 [app] event_loop 返回事件循环工厂
+    @details 可选值：asyncio（默认，标准库实现）、uvloop。
+             选择 uvloop 但未安装，或配置了无法识别的值时，记录警告并回退到标准库实现。
+             须在 setup_logging() 之后调用，以便回退警告写入日志。
+    @return 传给 asyncio.run(loop_factory=...) 的工厂函数；None 表示使用标准库默认事件循环
+    """
+    name: str = config.get('app', 'event_loop', fallback='asyncio').strip().lower()
+    logger = getLogger(__name__)
+
+    match name:
+        case 'asyncio':
+            return None
+        case 'uvloop':
+            try:
+                import uvloop  # type: ignore[import-not-found]
+            except ImportError:
+                logger.warning("配置了 event_loop = uvloop 但未安装 uvloop，回退到 asyncio 默认事件循环")
+                return None
+            logger.info(f"使用 uvloop {uvloop.__version__} 事件循环")
+            return uvloop.new_event_loop
+        case _:
+            logger.warning(f"无法识别的 event_loop 配置 {name!r}，回退到 asyncio 默认事件循环")
+            return None
+
+
 if __name__ == '__main__':
     pass
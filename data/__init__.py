@@ -14,9 +14,10 @@ from data.request import (
     MultiHttpxRequestData,
     RequestBaseData,
     SingleHttpxRequestData,
+    StreamHttpxRequestData,
     ThrottledHttpxRequestData,
 )
-from data.response import ExampleResponseData, HttpxResponseData, ResponseBaseData
+from data.response import ExampleResponseData, FileBody, HttpxResponseData, ResponseBaseData
 from data.gateway import ExampleSiteGatewayData, HttpxSiteGatewayData, SiteGatewayBaseData
 from data.store import ExampleStoreData, StoreBaseData
 
@@ -30,10 +31,12 @@ __all__ = [
     "SingleHttpxRequestData",
     "BatchHttpxRequestData",
     "ThrottledHttpxRequestData",
+    "StreamHttpxRequestData",
     # response
     "ResponseBaseData",
     "ExampleResponseData",
     "HttpxResponseData",
+    "FileBody",
     # gateway
     "SiteGatewayBaseData",
     "ExampleSiteGatewayData",
@@ -4,10 +4,11 @@
 @brief 定义总线数据包的根基类
 @details 所有在异步事件总线上流通的数据包均继承自 TaskBaseData。
          Bus 的 dispatch_registry 以 type[TaskBaseData] 为键进行路由。
+         根基类仅携带总线调度用的两个 kw_only 字段：attempt 与 not_before，用于延迟重试。
          此模块无任何项目内依赖，也不引入第三方库。
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from logging import getLogger
 
 logger = getLogger(__name__)
@@ -17,9 +18,16 @@ logger = getLogger(__name__)
 class TaskBaseData(object):
     """
     @brief 总线数据包根基类
-    @details 纯标记基类，无任何字段。所有具体数据包均继承此类，
-             Bus 通过 type(task) 精确匹配注册表进行分发。
+    @details 所有具体数据包均继承此类，Bus 通过 type(task) 精确匹配注册表进行分发。
+             不含业务字段，仅有两个供 Bus 延迟重试使用的调度字段：
+             处理器返回 attempt 递增、not_before 为 0 的副本即表示"重试"，Bus 按任务类型的重试策略
+             计算退避后的到期时刻写入 not_before，到期前任务留在延迟堆中，不进入队列也不占用并发槽位。
+             两个字段均不参与哈希与比较，kw_only 规避子类必填字段的排序约束。
+    @param attempt 已重试次数，0 表示首次执行
+    @param not_before 最早执行时刻（Unix 秒），0 表示立即执行
     """
+    attempt: int = field(default=0, hash=False, compare=False, kw_only=True)         # 已重试次数
+    not_before: float = field(default=0.0, hash=False, compare=False, kw_only=True)  # 最早执行时刻（Unix 秒）
 
 
 if __name__ == '__main__':
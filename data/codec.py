@@ -0,0 +1,202 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 总线数据包序列化编解码
+@details 将 data 包中的 frozen dataclass（含嵌套的值对象、httpx.Request / httpx.Response 字段）
+         编码为紧凑的字节串，并可原样还原，供任务日志（journal）持久化使用。
+         编码结果为 4 字节小端 JSON 长度 + JSON 正文 + 依次拼接的二进制块：
+         JSON 描述结构，bytes 字段（请求体、响应体、图片字节）不做 base64，
+         以 {"$b": [偏移, 长度]} 引用正文之后的二进制区。
+         非 JSON 原生类型以单键对象标记：$c dataclass、$t tuple、$d dict、$b bytes、
+         $date / $dt 日期时间、$req / $resp httpx 请求与响应。
+         出于安全考虑，仅允许还原 data 包内定义的 dataclass。
+         httpx.Request 仅保留方法、URL、头部与请求体，extensions（如超时设置）不持久化；
+         httpx.Response 的正文为解码后的字节，不保留内容编码相关头部。
+"""
+
+import json
+import struct
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime
+from importlib import import_module
+from logging import getLogger
+from typing import Any
+
+import httpx
+
+from data.base import TaskBaseData
+
+logger = getLogger(__name__)
+
+# 允许还原的 dataclass 所在模块前缀
+_ALLOWED_MODULE_PREFIX: str = 'data.'
+# 响应正文已解码，还原时须去掉的头部
+_ENCODING_HEADERS: tuple[str, ...] = ('content-encoding', 'content-length')
+_LENGTH: struct.Struct = struct.Struct('<I')
+
+_class_cache: dict[str, type] = {}
+
+
+class CodecError(ValueError):
+    """
+    @brief 编码或解码失败
+    @details 遇到不支持的类型、不允许还原的类或损坏的数据时抛出。
+    """
+
+
+def encode_task(task: TaskBaseData) -> bytes:
+    """
+    @brief 将总线数据包编码为字节串
+    @param task 任意 data 包中的数据包
+    @return 编码后的字节串
+    @throws CodecError 数据包含有不支持的类型时
+    """
+    blobs: list[bytes] = []
+    offset: list[int] = [0]
+
+    def add_blob(value: bytes) -> dict[str, list[int]]:
+        ref = {'$b': [offset[0], len(value)]}
+        blobs.append(value)
+        offset[0] += len(value)
+        return ref
+
+    def encode(value: Any) -> Any:
+        match value:
+            case None | bool() | int() | float() | str():
+                return value
+            case bytes() | bytearray() | memoryview():
+                return add_blob(bytes(value))
+            case list():
+                return [encode(item) for item in value]
+            case tuple():
+                return {'$t': [encode(item) for item in value]}
+            case dict():
+                if not all(isinstance(key, str) for key in value):
+                    raise CodecError('仅支持字符串键的 dict')
+                return {'$d': {key: encode(item) for key, item in value.items()}}
+            case datetime():
+                return {'$dt': value.isoformat()}
+            case date():
+                return {'$date': value.isoformat()}
+            case httpx.Request():
+                return {'$req': [
+                    value.method,
+                    str(value.url),
+                    [[k, v] for k, v in value.headers.multi_items()],
+                    add_blob(value.content),
+                ]}
+            case httpx.Response():
+                return {'$resp': [
+                    value.status_code,
+                    [[k, v] for k, v in value.headers.multi_items() if k.lower() not in _ENCODING_HEADERS],
+                    add_blob(value.content),
+                    encode(value.request),
+                ]}
+            case _ if is_dataclass(value) and not isinstance(value, type):
+                cls = type(value)
+                return {'$c': [
+                    f'{cls.__module__}:{cls.__qualname__}',
+                    {f.name: encode(getattr(value, f.name)) for f in fields(value) if f.init},
+                ]}
+        raise CodecError(f'不支持序列化的类型：{type(value).__name__}')
+
+    try:
+        body: bytes = json.dumps(encode(task), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    except httpx.RequestNotRead as e:
+        raise CodecError(f'流式请求体无法序列化：{e}') from e
+    return b''.join((_LENGTH.pack(len(body)), body, *blobs))
+
+
+def decode_task(payload: bytes) -> TaskBaseData:
+    """
+    @brief 从字节串还原总线数据包
+    @param payload encode_task 的输出
+    @return 还原的数据包
+    @throws CodecError 数据损坏、引用了不允许还原的类或类的字段已变化时
+    """
+    view = memoryview(payload)
+    try:
+        (length,) = _LENGTH.unpack_from(view)
+        structure: Any = json.loads(bytes(view[_LENGTH.size:_LENGTH.size + length]))
+    except (struct.error, ValueError) as e:
+        raise CodecError(f'数据包结构损坏：{e}') from e
+    blob_area = view[_LENGTH.size + length:]
+
+    def blob(ref: dict[str, list[int]]) -> bytes:
+        start, size = ref['$b']
+        if start + size > len(blob_area):
+            raise CodecError('二进制区长度不足')
+        return bytes(blob_area[start:start + size])
+
+    def decode(value: Any) -> Any:
+        if isinstance(value, list):
+            return [decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if len(value) != 1:
+            raise CodecError(f'无法识别的对象：{list(value)}')
+
+        (tag, data), = value.items()
+        # 字段增删改名后构造参数不再匹配、元组长度或取值不符时，统一视为无法还原
+        try:
+            match tag:
+                case '$b':
+                    return blob(value)
+                case '$t':
+                    return tuple(decode(item) for item in data)
+                case '$d':
+                    return {key: decode(item) for key, item in data.items()}
+                case '$dt':
+                    return datetime.fromisoformat(data)
+                case '$date':
+                    return date.fromisoformat(data)
+                case '$req':
+                    method, url, headers, content = data
+                    return httpx.Request(method, url, headers=headers, content=blob(content))
+                case '$resp':
+                    status, headers, content, request = data
+                    return httpx.Response(status, headers=headers, content=blob(content), request=decode(request))
+                case '$c':
+                    name, kwargs = data
+                    return _resolve_class(name)(**{key: decode(item) for key, item in kwargs.items()})
+        except CodecError:
+            raise
+        except (TypeError, ValueError, KeyError) as e:
+            raise CodecError(f'无法还原 {tag} 对象：{e}') from e
+        raise CodecError(f'未知的类型标记：{tag}')
+
+    task = decode(structure)
+    if not isinstance(task, TaskBaseData):
+        raise CodecError(f'还原结果不是总线数据包：{type(task).__name__}')
+    return task
+
+
+def _resolve_class(name: str) -> type:
+    """
+    @brief 按 模块:限定名 查找 dataclass，结果缓存
+    @param name 形如 data.request:SingleHttpxRequestData 的类标识
+    @return dataclass 类型
+    @throws CodecError 模块不在允许范围内或类不存在时
+    """
+    cls: type | None = _class_cache.get(name)
+    if cls is not None:
+        return cls
+
+    module_name, _, qualname = name.partition(':')
+    if not module_name.startswith(_ALLOWED_MODULE_PREFIX):
+        raise CodecError(f'不允许还原 data 包以外的类：{name}')
+    try:
+        obj: Any = import_module(module_name)
+        for part in qualname.split('.'):
+            obj = getattr(obj, part)
+    except (ImportError, AttributeError) as e:
+        raise CodecError(f'找不到类 {name}：{e}') from e
+    if not (isinstance(obj, type) and is_dataclass(obj)):
+        raise CodecError(f'{name} 不是 dataclass')
+
+    _class_cache[name] = obj
+    return obj
+
+
+if __name__ == '__main__':
+    pass
@@ -5,7 +5,8 @@
 @details 包含请求根基类 RequestBaseData 及三个具体子类，分别对应三种请求策略：
          SingleHttpxRequestData 对应单条 HTTP 请求；
          BatchHttpxRequestData 对应并发发送的多条请求，并发量在数据类中声明；
-         ThrottledHttpxRequestData 对应间隔发送的多条请求，间隔在数据类中声明。
+         ThrottledHttpxRequestData 对应间隔发送的多条请求，间隔在数据类中声明；
+         StreamHttpxRequestData 对应响应体流式写入磁盘的单条请求，大小上限在数据类中声明。
          含 httpx.Request 字段的类使用 Httpx 前缀以标明第三方依赖。
          RequestBaseData 提供 meta 字段用于透传请求上下文，所有子类自动继承。
 """
@@ -30,10 +31,12 @@ class RequestBaseData(TaskBaseData):
     @param retry 剩余重试次数，耗尽后 Requester 将丢弃该任务
     @param meta 请求上下文，键值对形式，默认空字典；
                不参与哈希与比较，由调用方按需携带透传数据（如来源 ID、页码等）
+    @param revisit 为 True 时不查询已见集合，每次都发出请求（如内容随时间变化的种子请求）
     """
     retry: int  # 剩余重试次数
     # dict 不可哈希，kw_only 规避子类必填字段的排序约束
     meta: dict[str, Any] = field(default_factory=dict, hash=False, compare=False, kw_only=True)
+    revisit: bool = field(default=False, kw_only=True)  # 是否绕过已见集合
 
 
 @dataclass(frozen=True)
@@ -56,6 +59,17 @@ class SingleHttpxRequestData(RequestBaseData):
     request: httpx.Request = field(hash=False, compare=False)
 
 
+@dataclass(frozen=True)
+class StreamHttpxRequestData(SingleHttpxRequestData):
+    """
+    @brief 流式下载的单条 httpx HTTP 请求数据包
+    @details 适用于图片等二进制大响应：响应体分块写入临时文件，不在内存中完整驻留，
+             超过 max_bytes 时中止下载并丢弃任务。
+    @param max_bytes 响应体大小上限（字节，按解码后计）
+    """
+    max_bytes: int  # 响应体大小上限（字节）
+
+
 @dataclass(frozen=True)
 class MultiHttpxRequestData(RequestBaseData):
     """
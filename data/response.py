@@ -6,6 +6,7 @@
          ResponseBaseData 不含第三方类型，持有原始请求任务引用及上下文字段 meta。
          meta 由 Requester 从对应的 RequestBaseData.meta 复制，确保上下文在整条链路中不丢失。
          HttpxResponseData 携带 httpx.Response 对象，使用 Httpx 前缀标明依赖。
+         流式下载的响应体不驻留内存，写入磁盘文件后以 FileBody 引用随响应传递。
 """
 
 from dataclasses import dataclass, field
@@ -20,6 +21,18 @@ from data.request import RequestBaseData
 logger = getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class FileBody(object):
+    """
+    @brief 已落盘的响应体
+    @details 由流式下载请求器写入临时文件，下游阶段按需读取或映射，使用完毕后删除文件。
+    @param path 文件路径
+    @param size 响应体字节数（解码后）
+    """
+    path: str  # 文件路径
+    size: int  # 响应体字节数
+
+
 @dataclass(frozen=True)
 class ResponseBaseData(TaskBaseData):
     """
@@ -51,10 +64,13 @@ class HttpxResponseData(ResponseBaseData):
     @brief httpx HTTP 响应数据包
     @details 持有单个 httpx.Response 对象，由 HttpRequester 产出后投入总线，
              由 HttpxSiteRouter 消费。response 字段排除哈希与比较以兼容 frozen dataclass。
+             流式下载时响应体写入磁盘，response 不含响应体，body 指向落盘文件。
     @param response httpx 原始响应对象
+    @param body 落盘的响应体，None 表示响应体在 response 中
     """
     # httpx.Response 不可哈希，排除该字段的哈希与比较
     response: httpx.Response = field(hash=False, compare=False)
+    body: FileBody | None = field(default=None, hash=False, compare=False, kw_only=True)  # 落盘的响应体
 
 
 if __name__ == '__main__':
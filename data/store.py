@@ -11,6 +11,7 @@ from datetime import date
 from logging import getLogger
 
 from data.base import TaskBaseData
+from data.response import FileBody
 
 logger = getLogger(__name__)
 
@@ -111,11 +112,14 @@ class BangumiCoverStoreData(StoreBaseData):
     @details 由 BangumiCoverParser 产出，BangumiCoverStorage 执行
              UPDATE subjects SET cover_image = ? WHERE id = ?。
              image_bytes 排除哈希与比较以兼容 frozen dataclass。
+             流式下载的封面图以 image_file 引用落盘文件，此时 image_bytes 为空，由存储器映射文件后写入。
     @param db_id subjects 表自增主键（由 meta['db_id'] 透传）
     @param image_bytes 封面图原始字节
+    @param image_file 落盘的封面图，None 表示字节在 image_bytes 中
     """
-    db_id: int                                              # subjects 表自增主键
-    image_bytes: bytes = field(hash=False, compare=False)  # 封面图原始字节
+    db_id: int                                                                # subjects 表自增主键
+    image_bytes: bytes = field(default=b'', hash=False, compare=False)       # 封面图原始字节
+    image_file: FileBody | None = field(default=None, hash=False, compare=False)  # 落盘的封面图
 
 
 if __name__ == '__main__':
@@ -7,7 +7,7 @@
 """
 
 from database.models import Base, Rating, SeasonType, Subject
-from database.session import get_session, init_db
+from database.session import close_db, get_session, init_db
 
 __all__ = [
     'Base',
@@ -15,5 +15,6 @@ __all__ = [
     'Subject',
     'Rating',
     'init_db',
+    'close_db',
     'get_session',
 ]
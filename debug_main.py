@@ -2,37 +2,44 @@
 # AUTHOR: Sun
 """
 @brief 调试入口
-@details 包含 VCR 录制模式与正常启动模式的本地调试入口逻辑，
-         通过配置项 [app] use_vcr 控制是否注入 VCR 种子任务。
+@details 以录制 / 回放磁带运行的本地调试入口：首次运行访问网络并录制到 cassettes/bangumi，
+         之后已录制的请求直接从磁带回放。配置文件中存在 [cassette] 节时以其为准（如 mode = replay 完全离线运行）。
+         以一次性模式运行，种子任务链路全部处理完毕后进程自动退出。
 """
 
-import vcr as _vcr  # type: ignore[import-untyped]
 import httpx
 
 import asyncio
 
-from config import config, setup_logging
+from config import config, event_loop_factory, setup_logging
 from data.request import SingleHttpxRequestData
 from database import init_db
 from main import main
 
 if __name__ == '__main__':
     setup_logging()
-    init_db(config.get('bangumi', 'database_url'))
-
-    _vcr_instance = _vcr.VCR(
-        cassette_library_dir='cassettes',
-        record_mode='new_episodes'
+    init_db(
+        config.get('bangumi', 'database_url'),
+        connect_timeout=config.getfloat('database', 'connect_timeout', fallback=10.0),
+        command_timeout=config.getfloat('database', 'command_timeout', fallback=0.0),
+        pool_timeout=config.getfloat('database', 'pool_timeout', fallback=30.0),
     )
 
+    if not config.has_section('cassette'):
+        config.read_dict({'cassette': {
+            'enabled': 'true',
+            'path': 'cassettes/bangumi',
+            'mode': 'new_episodes',
+        }})
+
     seed = SingleHttpxRequestData(
         retry=config.getint('bangumi', 'retry'),
         request=httpx.Request(
             'GET',
             'https://api.bgm.tv/calendar',
             headers={'User-Agent': config.get('bangumi', 'user_agent')},
-        )
+        ),
+        revisit=True,
     )
 
-    with _vcr_instance.use_cassette('bangumi.yaml'):
-        asyncio.run(main(seed))
+    asyncio.run(main(seed, one_shot=True), loop_factory=event_loop_factory())
@@ -3,7 +3,7 @@
 """
 @brief gateway 包统一导出入口
 @details 导出 DISPATCH_REGISTRY 供外部注册站点数据类到处理器的映射。
-         build_site_handlers() 一次性实例化所有 SiteGatewayBase 子类，
+         build_site_handlers() 以共享的 httpx 路由表一次性实例化所有 SiteGatewayBase 子类，
          返回值可直接用 ** 解包合并到 main.py 的 dispatch_registry。
 """
 
@@ -12,6 +12,7 @@ from data.base import TaskBaseData
 from data.gateway import BangumiApiGatewayData, BangumiCoverGatewayData
 from gateway.bangumi import BangumiApiGateway, BangumiCoverGateway
 from gateway.base import SiteGatewayBase
+from router import httpx_route_table
 
 # 站点数据类 → 站点处理器类 的全局注册表
 DISPATCH_REGISTRY: dict[type[TaskBaseData], type[SiteGatewayBase]] = {
@@ -26,7 +27,8 @@ def build_site_handlers() -> dict[type[TaskBaseData], HandlerBase]:
     @details 返回值可直接用 ** 解包合并到 main.py 的 dispatch_registry。
     @return 类型 → 实例的映射，包含所有已注册站点处理器
     """
-    return {cls: handler_cls() for cls, handler_cls in DISPATCH_REGISTRY.items()}
+    routes = httpx_route_table()
+    return {cls: handler_cls(routes) for cls, handler_cls in DISPATCH_REGISTRY.items()}
 
 
 __all__ = [
@@ -5,17 +5,13 @@
 @details 提供两个站点处理器：
          BangumiApiGateway 处理 api.bgm.tv 域名的响应，根据 URL 路径路由至对应的
          解析输入数据包；BangumiCoverGateway 处理 lain.bgm.tv 域名的封面图响应，
-         无路径分支，直接产出 BangumiCoverParseData。
+         产出 BangumiCoverParseData。路径与解析数据类的对应关系声明在 router.HTTPX_ROUTES 中。
 """
 
 from logging import getLogger
 
 from data.gateway import BangumiApiGatewayData, BangumiCoverGatewayData
-from data.parse import (
-    BangumiCalendarParseData,
-    BangumiCoverParseData,
-    BangumiSubjectDetailParseData,
-)
+from data.parse import ParseBaseData
 from gateway.base import SiteGatewayBase
 
 logger = getLogger(__name__)
@@ -24,46 +20,33 @@ logger = getLogger(__name__)
 class BangumiApiGateway(SiteGatewayBase[BangumiApiGatewayData]):
     """
     @brief api.bgm.tv 域名站点处理器
-    @details 根据 URL 路径将响应路由至 BangumiCalendarParseData 或
+    @details 根据路由表将响应路由至 BangumiCalendarParseData 或
              BangumiSubjectDetailParseData，未知路径则记录警告并返回 None。
     """
 
-    async def _do_handle(self, task: BangumiApiGatewayData) -> BangumiCalendarParseData| BangumiSubjectDetailParseData | None:
+    async def _do_handle(self, task: BangumiApiGatewayData) -> ParseBaseData | None:
         """
         @brief 按 URL 路径分发至对应解析输入数据包
         @param task 携带 api.bgm.tv 响应的数据包
         @return 对应的 ParseBaseData 子类实例，未知路径时返回 None
         """
-        result: BangumiCalendarParseData| BangumiSubjectDetailParseData | None
-        match task.response.url.path:
-            case '/calendar':
-                result = BangumiCalendarParseData(task=task.task, response=task.response)
-                logger.info(f"站点 [{type(self).__name__}] URL [{task.response.url.path}] 命中类型 [{type(result).__name__}]")
-                return result
-            case path if path.startswith('/v0/subjects/'):
-                result = BangumiSubjectDetailParseData(task=task.task, response=task.response)
-                logger.info(f"站点 [{type(self).__name__}] URL [{task.response.url.path}] 命中类型 [{type(result).__name__}]")
-                return result
-            case _:
-                logger.warning(f"BangumiApiGateway 未知路径 [{task.response.url}]")
-                return None
+        return self._parse_data_of(task)
 
 
 class BangumiCoverGateway(SiteGatewayBase[BangumiCoverGatewayData]):
     """
     @brief lain.bgm.tv 封面图域名站点处理器
-    @details 无路径分支，所有来自 lain.bgm.tv 的响应均产出 BangumiCoverParseData。
+    @details 路由表中 lain.bgm.tv 的全部路径均对应 BangumiCoverParseData。
+             db_id 经 meta 透传，落盘响应体经 body 透传。
     """
 
-    async def _do_handle(self, task: BangumiCoverGatewayData) -> BangumiCoverParseData:
+    async def _do_handle(self, task: BangumiCoverGatewayData) -> ParseBaseData | None:
         """
-        @brief 直接产出封面图解析输入数据包
+        @brief 产出封面图解析输入数据包
         @param task 携带 lain.bgm.tv 响应的数据包
         @return BangumiCoverParseData 实例
         """
-        result = BangumiCoverParseData(task=task.task, response=task.response, meta=task.meta)
-        logger.info(f"站点 [{type(self).__name__}] URL [{task.response.url.path}] 命中类型 [{type(result).__name__}]")
-        return result
+        return self._parse_data_of(task)
 
 
 if __name__ == '__main__':
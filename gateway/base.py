@@ -6,7 +6,9 @@
          RequesterBase 完全对称的 Template Method 模式：
          handle() 作为纯兜底保护，捕获未预期异常后丢弃任务；
          子类在 _do_handle() 中实现路径路由逻辑，根据 URL 路径判断页面类型，
-         返回对应的 ParseBaseData 子类实例。
+         返回对应的 ParseBaseData 子类实例。路径与解析数据类的对应关系声明在 router.HTTPX_ROUTES 中，
+         子类通常直接调用 _parse_data_of() 按路由表产出，与路由器共享同一路由表与缓存。
+         路径路由是纯同步的查表与包装，声明 inline = True，由 Bus 在路由器产出站点数据包时直接内联执行。
 """
 
 from abc import ABC, abstractmethod
@@ -14,8 +16,9 @@ from logging import getLogger
 from collections.abc import Iterable
 
 from base import HandlerBase
-from data.gateway import SiteGatewayBaseData
+from data.gateway import HttpxSiteGatewayData, SiteGatewayBaseData
 from data.parse import ParseBaseData
+from router.table import Route, RouteTable
 
 logger = getLogger(__name__)
 
@@ -25,8 +28,18 @@ class SiteGatewayBase[T: SiteGatewayBaseData](HandlerBase[T], ABC):
     @brief 所有站点处理器的抽象基类
     @details 继承 HandlerBase 参与总线调度，继承 ABC 强制子类实现 _do_handle()。
              handle() 是具体方法，作为纯兜底保护；路径路由逻辑由子类在 _do_handle() 中完成。
+             子类的 _do_handle() 须保持不做 I/O，否则应覆写 inline = False。
     """
 
+    inline = True
+
+    def __init__(self, routes: RouteTable) -> None:
+        """
+        @brief 初始化站点处理器
+        @param routes 编译后的路由表，与路由器共享
+        """
+        self._routes: RouteTable = routes
+
     async def handle(self, task: T) -> Iterable[ParseBaseData] | ParseBaseData | None:
         """
         @brief 兜底保护：透传 _do_handle() 结果，捕获未预期异常后丢弃任务
@@ -44,7 +57,7 @@ class SiteGatewayBase[T: SiteGatewayBaseData](HandlerBase[T], ABC):
         """
         @brief 执行路径路由逻辑（子类实现）
         @details 子类须在此方法中根据 URL 路径判断页面类型，返回对应的 ParseBaseData 子类实例。
-                 建议使用 match...case 语法处理多路径分支。
+                 路径已在 HTTPX_ROUTES 中声明时直接返回 _parse_data_of(task)。
                  路径不匹配任何已知类型时，须在方法内部记录 logger.warning 并返回 None，
                  不向上抛出异常。
         @param task 携带站点响应信息的数据包，子类可访问 task.response 和 task.task
@@ -53,6 +66,23 @@ class SiteGatewayBase[T: SiteGatewayBaseData](HandlerBase[T], ABC):
                 None 路径未命中或处理终止
         """
 
+    def _parse_data_of(self, task: HttpxSiteGatewayData) -> ParseBaseData | None:
+        """
+        @brief 按路由表将响应包装为路径对应的解析数据包
+        @details 路由器已对同一 URL 做过路由决策，此处只查询（通常命中路由缓存），不重复计数。
+        @param task 携带 httpx 响应的站点数据包
+        @return 对应的 ParseBaseData 子类实例；路径未命中时记录 warning 并返回 None
+        """
+        url = task.response.url
+        route: Route | None = self._routes.match(url.host, url.path)
+        if route is None:
+            logger.warning(f"{type(self).__name__} 未知路径 [{url}]")
+            return None
+
+        result = route.target(task=task.task, response=task.response, meta=task.meta, body=task.body)
+        logger.info(f"站点 [{type(self).__name__}] URL [{url.path}] 命中类型 [{type(result).__name__}]")
+        return result
+
 
 if __name__ == '__main__':
     pass
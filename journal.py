@@ -0,0 +1,334 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 总线任务预写日志（write-ahead journal）
+@details TaskJournal 为 Bus 提供崩溃恢复能力：任务入队时编码并追加写入日志，
+         处理器完成后写入确认（ACK）记录；进程重启后 open() 扫描全部段文件，
+         尚未确认的任务由 Bus 重新投入队列，避免崩溃后重跑整轮采集。
+         日志由若干只追加的段文件组成（journal-000001.log …），每条记录为
+         13 字节头（CRC32、操作类型、记录 ID、正文长度）+ 正文，正文为 data.codec 编码的任务。
+         段文件写满 segment_bytes 后封存并切换新段；封存段按段序号从旧到新回收：最旧的封存段中的记录全部确认后直接删除，
+         存活比例低于 compact_ratio 时把存活记录复制到当前段再删除（压缩）。
+         只回收最旧的段，是因为确认记录可能写在比其入队记录更新的段中：较新的段先被删除会丢失这些确认记录，
+         重启后较旧段中已确认的任务会被误判为未确认而重放。最旧段中的确认记录只可能对应该段自身的入队记录，删除是安全的。
+         扫描时遇到 CRC 不符或截断的记录即停止读取该段，兼容写入中途崩溃留下的残缺尾部。
+         文件写入为同步调用，单条记录写入后立即 flush 到操作系统；fsync 开启时额外落盘。
+"""
+
+import os
+import struct
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import BinaryIO
+
+from data.base import TaskBaseData
+from data.codec import CodecError, decode_task, encode_task
+from metrics import metrics
+
+logger = getLogger(__name__)
+
+_OP_PUT: int = 1
+_OP_ACK: int = 2
+# CRC32(头部其余字段 + 正文)、操作类型、记录 ID、正文长度
+_HEADER: struct.Struct = struct.Struct('<IBQI')
+_SEGMENT_GLOB: str = 'journal-*.log'
+
+_RECORDS = metrics.counter('journal_records_total', '写入任务日志的记录数', ('op',))
+_LIVE = metrics.gauge('journal_live_records', '任务日志中尚未确认的任务数').labels()
+_SEGMENTS = metrics.gauge('journal_segments', '任务日志段文件数').labels()
+
+
+@dataclass(frozen=True)
+class JournalConfig(object):
+    """
+    @brief 任务日志配置
+    @param directory 段文件所在目录，不存在时自动创建
+    @param segment_bytes 单个段文件的大小上限（字节），写满后切换新段
+    @param compact_ratio 封存段的存活字节占比低于此值时触发压缩
+    @param fsync 每条记录写入后是否调用 os.fsync 落盘
+    """
+    directory: str                # 段文件目录
+    segment_bytes: int = 64 << 20 # 单个段文件大小上限（字节）
+    compact_ratio: float = 0.25   # 封存段存活字节占比低于此值时压缩
+    fsync: bool = False           # 每条记录写入后是否 fsync
+
+
+@dataclass
+class _Location(object):
+    """
+    @brief 未确认记录在段文件中的位置
+    """
+    segment: int  # 段序号
+    offset: int   # 记录头在段文件中的偏移
+    size: int     # 记录总长度（头 + 正文）
+
+
+class TaskJournal(object):
+    """
+    @brief 基于只追加段文件的任务日志
+    @details 使用顺序：open() 恢复索引并开启新段 → recovered() 取出待重放任务 →
+             运行期间 append() / ack() → close()。
+             内存中只保存未确认记录的位置索引，不缓存任务正文，重放与压缩时再从段文件读取。
+    """
+
+    def __init__(self, config: JournalConfig) -> None:
+        """
+        @brief 初始化任务日志，不做任何文件操作
+        @param config 任务日志配置
+        """
+        self._config: JournalConfig = config
+        self._directory: Path = Path(config.directory)
+        self._index: dict[int, _Location] = {}
+        self._segment_sizes: dict[int, int] = {}
+        self._segment_live: dict[int, int] = {}
+        self._segment_live_bytes: dict[int, int] = {}
+        self._recovered: list[int] = []
+        self._next_id: int = 1
+        self._active: int = 0
+        self._file: BinaryIO | None = None
+
+    @property
+    def pending(self) -> int:
+        """
+        @brief 尚未确认的任务数
+        """
+        return len(self._index)
+
+    def open(self) -> int:
+        """
+        @brief 扫描已有段文件、重建未确认索引，并开启一个新段供写入
+        @details 旧段不再追加，以免在残缺尾部之后继续写入；随后从最旧的段开始回收全部确认或存活比例过低的旧段。
+        @return 待重放的任务数
+        """
+        self._directory.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self._directory.glob(_SEGMENT_GLOB)):
+            self._scan(int(path.stem.split('-')[1]), path)
+
+        self._recovered = sorted(self._index)
+        self._roll()
+        self._reclaim()
+        _LIVE.set(len(self._index))
+
+        if self._recovered:
+            logger.info(f"任务日志 [{self._directory}] 中有 {len(self._recovered)} 个未确认任务待重放")
+        return len(self._recovered)
+
+    def recovered(self) -> Iterator[tuple[int, TaskBaseData]]:
+        """
+        @brief 依次读取并解码待重放的任务
+        @details 按记录 ID（即原入队顺序）返回。无法解码的记录（如数据类已改名）记录警告后直接确认丢弃。
+                 每个任务只返回一次，调用方重新入队时沿用原记录 ID，不再重复写入。
+        @return (记录 ID, 任务) 迭代器
+        """
+        record_ids, self._recovered = self._recovered, []
+        for record_id in record_ids:
+            location: _Location | None = self._index.get(record_id)
+            if location is None:
+                continue
+            try:
+                task = decode_task(self._read_payload(location))
+            except (CodecError, OSError) as e:
+                logger.warning(f"任务日志记录 {record_id} 无法还原，已丢弃：{e}")
+                self.ack(record_id)
+                continue
+            yield record_id, task
+
+    def append(self, task: TaskBaseData) -> int:
+        """
+        @brief 编码任务并追加一条入队记录
+        @param task 待持久化的任务
+        @return 记录 ID，处理完成后以此调用 ack()
+        @throws CodecError 任务无法编码时
+        """
+        payload: bytes = encode_task(task)
+        record_id: int = self._next_id
+        self._next_id += 1
+        self._index[record_id] = self._write(_OP_PUT, record_id, payload)
+        _RECORDS.labels('put').inc()
+        _LIVE.inc()
+        return record_id
+
+    def ack(self, record_id: int) -> None:
+        """
+        @brief 确认任务处理完毕
+        @details 写入确认记录并从索引移除，随后从最旧的封存段开始回收全部确认或存活比例过低的段。
+        @param record_id append() 返回的记录 ID
+        """
+        location: _Location | None = self._index.pop(record_id, None)
+        if location is None:
+            return
+        self._write(_OP_ACK, record_id, b'')
+        _RECORDS.labels('ack').inc()
+        _LIVE.dec()
+
+        segment: int = location.segment
+        self._segment_live[segment] -= 1
+        self._segment_live_bytes[segment] -= location.size
+        self._reclaim()
+
+    def close(self) -> None:
+        """
+        @brief 关闭当前段文件，未确认的任务留待下次启动重放
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        logger.info(f"任务日志已关闭，未确认任务 {len(self._index)} 个")
+
+    def _scan(self, segment: int, path: Path) -> None:
+        """
+        @brief 读取单个段文件，按记录顺序更新索引
+        @param segment 段序号
+        @param path 段文件路径
+        """
+        self._segment_sizes[segment] = path.stat().st_size
+        self._segment_live.setdefault(segment, 0)
+        self._segment_live_bytes.setdefault(segment, 0)
+
+        with path.open('rb') as f:
+            offset: int = 0
+            while header := f.read(_HEADER.size):
+                if len(header) < _HEADER.size:
+                    logger.warning(f"任务日志段 {path.name} 在偏移 {offset} 处截断，忽略其后内容")
+                    break
+                crc, op, record_id, length = _HEADER.unpack(header)
+                payload: bytes = f.read(length)
+                if len(payload) < length or zlib.crc32(header[4:] + payload) != crc:
+                    logger.warning(f"任务日志段 {path.name} 在偏移 {offset} 处校验失败，忽略其后内容")
+                    break
+
+                size: int = _HEADER.size + length
+                self._next_id = max(self._next_id, record_id + 1)
+                if op == _OP_PUT:
+                    # 压缩中途崩溃时同一记录可能出现在两个段，以后写入的位置为准
+                    self._forget(record_id)
+                    self._track(record_id, _Location(segment, offset, size))
+                elif op == _OP_ACK:
+                    self._forget(record_id)
+                offset += size
+
+    def _track(self, record_id: int, location: _Location) -> None:
+        """
+        @brief 登记未确认记录的位置
+        @param record_id 记录 ID
+        @param location 记录位置
+        """
+        self._index[record_id] = location
+        self._segment_live[location.segment] += 1
+        self._segment_live_bytes[location.segment] += location.size
+
+    def _forget(self, record_id: int) -> None:
+        """
+        @brief 扫描阶段移除记录的索引
+        @param record_id 记录 ID
+        """
+        location: _Location | None = self._index.pop(record_id, None)
+        if location is not None:
+            self._segment_live[location.segment] -= 1
+            self._segment_live_bytes[location.segment] -= location.size
+
+    def _write(self, op: int, record_id: int, payload: bytes) -> _Location:
+        """
+        @brief 向当前段追加一条记录，写满时先切换新段（封存段留待 _reclaim() 回收）
+        @param op 操作类型
+        @param record_id 记录 ID
+        @param payload 正文
+        @return 记录位置
+        """
+        if self._segment_sizes[self._active] >= self._config.segment_bytes:
+            self._roll()
+
+        body: bytes = _HEADER.pack(0, op, record_id, len(payload))[4:] + payload
+        record: bytes = struct.pack('<I', zlib.crc32(body)) + body
+        location = _Location(self._active, self._segment_sizes[self._active], len(record))
+
+        self._file.write(record)
+        self._file.flush()
+        if self._config.fsync:
+            os.fsync(self._file.fileno())
+
+        self._segment_sizes[self._active] += len(record)
+        if op == _OP_PUT:
+            self._segment_live[self._active] += 1
+            self._segment_live_bytes[self._active] += len(record)
+        return location
+
+    def _roll(self) -> None:
+        """
+        @brief 关闭当前段并创建下一个段
+        """
+        if self._file is not None:
+            self._file.close()
+        self._active = max(self._segment_sizes, default=0) + 1
+        self._file = self._path(self._active).open('ab')
+        self._segment_sizes[self._active] = 0
+        self._segment_live[self._active] = 0
+        self._segment_live_bytes[self._active] = 0
+        _SEGMENTS.set(len(self._segment_sizes))
+
+    def _reclaim(self) -> None:
+        """
+        @brief 从最旧的封存段开始依次回收，遇到仍需保留的段即停止
+        @details 最旧段全部确认时删除；存活字节占比过低时把存活记录复制到当前段后删除。
+                 压缩写入可能切换新段，新段总是当前段，不影响循环终止。
+        """
+        while (segment := min(self._segment_sizes)) != self._active:
+            live: int = self._segment_live[segment]
+            if live and self._segment_live_bytes[segment] >= self._segment_sizes[segment] * self._config.compact_ratio:
+                return
+            if live:
+                self._compact(segment)
+            else:
+                self._remove(segment)
+
+    def _compact(self, segment: int) -> None:
+        """
+        @brief 把段中的存活记录复制到当前段后删除该段
+        @param segment 最旧的封存段序号
+        """
+        moved: int = 0
+        for record_id, location in list(self._index.items()):
+            if location.segment == segment:
+                payload: bytes = self._read_payload(location)
+                self._segment_live[segment] -= 1
+                self._segment_live_bytes[segment] -= location.size
+                self._index[record_id] = self._write(_OP_PUT, record_id, payload)
+                moved += 1
+        self._remove(segment)
+        logger.debug(f"任务日志段 {segment} 已压缩，迁移存活记录 {moved} 条")
+
+    def _remove(self, segment: int) -> None:
+        """
+        @brief 删除段文件并清理统计
+        @param segment 段序号
+        """
+        self._path(segment).unlink(missing_ok=True)
+        del self._segment_sizes[segment], self._segment_live[segment], self._segment_live_bytes[segment]
+        _SEGMENTS.set(len(self._segment_sizes))
+
+    def _read_payload(self, location: _Location) -> bytes:
+        """
+        @brief 从段文件读取记录正文
+        @param location 记录位置
+        @return 记录正文
+        """
+        if location.segment == self._active and self._file is not None:
+            self._file.flush()
+        with self._path(location.segment).open('rb') as f:
+            f.seek(location.offset + _HEADER.size)
+            return f.read(location.size - _HEADER.size)
+
+    def _path(self, segment: int) -> Path:
+        """
+        @brief 段序号对应的文件路径
+        @param segment 段序号
+        @return 段文件路径
+        """
+        return self._directory / f'journal-{segment:06d}.log'
+
+
+if __name__ == '__main__':
+    pass
@@ -7,53 +7,221 @@
 """
 
 import asyncio
+from collections.abc import Callable, Iterable
+from contextlib import suppress
 from logging import getLogger
 
-from config import config, setup_logging
-from database import init_db
+from config import config, event_loop_factory, setup_logging
+from database import close_db, init_db
 from base import HandlerBase
 from data.base import TaskBaseData
 from scheduler.base import Scheduler
 from scheduler import SCHEDULE_REGISTRY
-from requester import build_http_requesters
+from requester import build_http_requesters, close_http_requesters
 from router import build_httpx_site_router
 from gateway import build_site_handlers
-from parser import build_parsers
+from parser import build_parsers, close_parsers
 from storage import build_storages
-from bus import Bus, BusConfig
+from bus import DEFAULT_RETRY_POLICIES, BatchPolicy, Bus, BusConfig, RetryPolicy
+from journal import JournalConfig, TaskJournal
+from metrics import log_snapshots, serve_metrics
+from spool import sweep_bodies
+from tracing import Tracer, TracerConfig
 
 logger = getLogger(__name__)
 
 
-async def main(debug_seed: TaskBaseData | None = None) -> None:
+def _load_class_options[T, V](section: str, classes: Iterable[type[T]], parse: Callable[[str], V] = int) -> dict[type[T], V]:
+    """
+    @brief 读取以类名为键的配置节
+    @details 键按类名匹配（INI 键不区分大小写），未出现在 classes 中的键忽略，由调用方按不同类族分别读取。
+    @param section 配置节名，如 bus.limits
+    @param classes 候选类型
+    @param parse 配置值解析函数，默认解析为整数
+    @return 类型 → 解析值 的映射，节不存在时为空
+    """
+    if not config.has_section(section):
+        return {}
+    by_name: dict[str, type[T]] = {cls.__name__.lower(): cls for cls in classes}
+    return {by_name[name]: parse(value) for name, value in config.items(section) if name in by_name}
+
+
+def _parse_batch_policy(value: str) -> BatchPolicy:
+    """
+    @brief 解析 [bus.batch] 配置值
+    @param value 形如 "50, 0.2" 的字符串：单批最大任务数, 最长等待秒数
+    @return 批量分发策略
+    @throws ValueError 格式不正确时
+    """
+    max_size, max_linger = (part.strip() for part in value.split(','))
+    return BatchPolicy(max_size=int(max_size), max_linger=float(max_linger))
+
+
+def _parse_retry_policy(value: str) -> RetryPolicy:
+    """
+    @brief 解析 [bus.retry] 配置值
+    @param value 形如 "1.0, 2.0, 60, 0.5" 的字符串：首次延迟秒数[, 放大倍数[, 延迟上限秒数[, 抖动比例]]]，
+                 省略的部分取默认值；首次延迟为 0 表示立即重试
+    @return 重试策略
+    @throws ValueError 格式不正确时
+    """
+    parts: list[float] = [float(part) for part in value.split(',')]
+    return RetryPolicy(*parts)
+
+
+def _check_class_options(section: str, classes: Iterable[type]) -> None:
+    """
+    @brief 检查类名配置节中是否存在无法识别的键，避免拼写错误被静默忽略
+    @param section 配置节名
+    @param classes 全部候选类型
+    @throws ValueError 存在无法匹配任何候选类型的键时
+    """
+    if not config.has_section(section):
+        return
+    names: set[str] = {cls.__name__.lower() for cls in classes}
+    unknown: list[str] = [name for name in config.options(section) if name not in names]
+    if unknown:
+        raise ValueError(f"[{section}] 中的键无法匹配任何已注册的任务类型或处理器类型：{', '.join(unknown)}")
+
+
+async def main(debug_seed: TaskBaseData | None = None, one_shot: bool = False) -> None:
     """
     @brief 装配所有处理器并启动事件总线
     @details 按阶段顺序调用各模块工厂方法，合并为单一 dispatch_registry，
              构造 BusConfig 与 Bus，再由 Bus.run() 与 Scheduler 并发运行。
+             one_shot 为 True 时改用 Bus.run_until_idle()：立即注入种子任务（debug_seed 优先，
+             否则为全部调度配置的种子任务），总线空闲后返回。
+             [journal] 节开启时启用任务日志：上次未确认的任务先于种子重放；一次性模式下若存在待重放任务，
+             视为续跑上次中断的采集，不再注入调度种子。
+             [tracing] 节开启时记录任务血缘与各阶段耗时，输出轮转 JSONL 文件。
+             [metrics] 节开启时同时启动本地指标端点与周期性日志快照。
+             配置 [http] spool_dir 且未启用任务日志时，启动前与退出后清扫其中遗留的落盘响应体；
+             启用任务日志时保留，待重放的任务仍需读取。
+             总线退出（含被取消）时关闭请求器共享的连接池、解析进程池、任务日志与数据库连接池。
+    @param debug_seed 调试用种子任务
+    @param one_shot 是否以一次性模式运行
     """
     dispatch_registry: dict[type[TaskBaseData], HandlerBase] = {
-        **build_http_requesters(),    # Single/Batch/ThrottledHttpxRequestData → 请求器实例
+        **build_http_requesters(),    # Single/Batch/Throttled/StreamHttpxRequestData → 请求器实例
         **build_httpx_site_router(),  # HttpxResponseData → HttpxSiteRouter 实例
         **build_site_handlers(),      # 各站点 GatewayData → 站点处理器实例
         **build_parsers(),            # 各解析数据类 → 解析器实例
         **build_storages(),           # 各存储数据类 → 存储器实例
     }
 
+    # 候选类包含注册表中各类型及其基类，使阶段基类（如 ParseBaseData、StorageBase）也可作为配置键
+    task_classes: set[type[TaskBaseData]] = {
+        cls for task_type in dispatch_registry for cls in task_type.__mro__ if issubclass(cls, TaskBaseData)
+    }
+    handler_classes: set[type[HandlerBase]] = {
+        cls for handler in dispatch_registry.values() for cls in type(handler).__mro__ if issubclass(cls, HandlerBase)
+    }
+    _check_class_options('bus.limits', task_classes | handler_classes)
+    _check_class_options('bus.reserved', task_classes)
+    _check_class_options('bus.batch', task_classes)
+    _check_class_options('bus.retry', task_classes)
+    _check_class_options('bus.deadlines', task_classes | handler_classes)
+
+    journal: TaskJournal | None = None
+    if config.getboolean('journal', 'enabled', fallback=False):
+        journal = TaskJournal(JournalConfig(
+            directory=config.get('journal', 'directory', fallback='journal'),
+            segment_bytes=config.getint('journal', 'segment_mb', fallback=64) << 20,
+            compact_ratio=config.getfloat('journal', 'compact_ratio', fallback=0.25),
+            fsync=config.getboolean('journal', 'fsync', fallback=False),
+        ))
+        journal.open()
+
+    # 未启用任务日志时，上次遗留的落盘响应体不再被任何任务引用
+    spool_dir: str | None = config.get('http', 'spool_dir', fallback=None) if journal is None else None
+    if spool_dir is not None:
+        sweep_bodies(spool_dir)
+
+    tracer: Tracer | None = None
+    if config.getboolean('tracing', 'enabled', fallback=False):
+        tracer = Tracer(TracerConfig(
+            path=config.get('tracing', 'path', fallback='logs/traces.jsonl'),
+            max_bytes=config.getint('tracing', 'max_mb', fallback=64) << 20,
+            backup_count=config.getint('tracing', 'backup_count', fallback=5),
+            sample_rate=config.getfloat('tracing', 'sample_rate', fallback=1.0),
+        ))
+
     bus_config: BusConfig = BusConfig(
         dispatch_registry=dispatch_registry,
         max_concurrent_tasks=config.getint('bus', 'max_concurrent_tasks'),
+        max_queue_size=config.getint('bus', 'max_queue_size', fallback=0),
+        max_pending_tasks=config.getint('bus', 'max_pending_tasks', fallback=0),
+        seed_priority=config.getint('bus', 'seed_priority', fallback=None),
+        task_limits=_load_class_options('bus.limits', task_classes),
+        handler_limits=_load_class_options('bus.limits', handler_classes),
+        reserved_slots=_load_class_options('bus.reserved', task_classes),
+        journal=journal,
+        tracer=tracer,
+        batch_policies=_load_class_options('bus.batch', task_classes, _parse_batch_policy),
+        retry_policies={**DEFAULT_RETRY_POLICIES, **_load_class_options('bus.retry', task_classes, _parse_retry_policy)},
+        task_deadlines=_load_class_options('bus.deadlines', task_classes, float),
+        handler_deadlines=_load_class_options('bus.deadlines', handler_classes, float),
+        run_deadline=config.getfloat('bus', 'run_deadline', fallback=0.0),
+        fuse_inline=config.getboolean('bus', 'fuse_inline', fallback=True),
     )
     bus: Bus = Bus(bus_config)
     scheduler: Scheduler = Scheduler(list(SCHEDULE_REGISTRY))
 
-    if debug_seed:
-        await bus.put(debug_seed)
+    metrics_server: asyncio.Server | None = None
+    if config.getboolean('metrics', 'enabled', fallback=False):
+        metrics_server = await serve_metrics(
+            config.get('metrics', 'host', fallback='127.0.0.1'),
+            config.getint('metrics', 'port', fallback=9108),
+        )
+
+    snapshot_task: asyncio.Task | None = None
+    snapshot_interval: float = config.getfloat('metrics', 'snapshot_interval_seconds', fallback=0)
+    if snapshot_interval > 0:
+        snapshot_task = asyncio.create_task(log_snapshots(snapshot_interval))
 
     logger.info("框架启动，开始运行事件总线")
-    await bus.run(scheduler)
+    try:
+        if one_shot:
+            if debug_seed:
+                seeds: list[TaskBaseData] = [debug_seed]
+            elif journal is not None and journal.pending:
+                logger.info("任务日志中存在未完成的任务，续跑上次采集，不注入调度种子")
+                seeds = []
+            else:
+                seeds = scheduler.seed_tasks()
+            await bus.run_until_idle(seeds)
+        else:
+            if debug_seed:
+                await bus.put(debug_seed)
+            await bus.run(scheduler)
+    finally:
+        if snapshot_task is not None:
+            snapshot_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await snapshot_task
+        if metrics_server is not None:
+            metrics_server.close()
+            await metrics_server.wait_closed()
+        await close_http_requesters()
+        close_parsers()
+        if spool_dir is not None:
+            sweep_bodies(spool_dir)
+        if journal is not None:
+            journal.close()
+        if tracer is not None:
+            tracer.close()
+        await close_db()
 
 
 if __name__ == '__main__':
     setup_logging()
-    init_db(config.get('bangumi', 'database_url'))
-    asyncio.run(main())
+    init_db(
+        config.get('bangumi', 'database_url'),
+        connect_timeout=config.getfloat('database', 'connect_timeout', fallback=10.0),
+        command_timeout=config.getfloat('database', 'command_timeout', fallback=0.0),
+        pool_timeout=config.getfloat('database', 'pool_timeout', fallback=30.0),
+    )
+    asyncio.run(
+        main(one_shot=config.getboolean('app', 'one_shot', fallback=False)),
+        loop_factory=event_loop_factory(),
+    )
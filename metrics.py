@@ -0,0 +1,367 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 轻量级运行时指标模块
+@details 以模块级单例 metrics 暴露进程内指标注册表，仿照 config.py 的单例模式，
+         Bus、Requester、Storage 等各层直接导入后记录计数器（Counter）、仪表（Gauge）
+         与直方图（Histogram）。指标均带标签，由 labels() 取得子指标后更新。
+         serve_metrics() 启动可选的本地 HTTP 端点，以 Prometheus 文本格式输出全部指标；
+         log_snapshots() 周期性地将指标快照写入日志。
+         本模块只依赖标准库，不导入任何项目内部模块，可被任意层级安全导入。
+"""
+
+import asyncio
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from logging import getLogger
+from math import inf
+
+logger = getLogger(__name__)
+
+# 默认耗时直方图桶（秒），覆盖从亚毫秒的内存处理到数十秒的网络请求
+DEFAULT_BUCKETS: tuple[float, ...] = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 指标抓取读取请求头的时限（秒），避免不发请求的连接拖住服务端关闭
+_SCRAPE_TIMEOUT: float = 5.0
+
+
+class _CounterChild(object):
+    """
+    @brief 计数器的单组标签取值
+    """
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value: float = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        @brief 累加计数
+        @param amount 增量，须为非负数
+        """
+        self.value += amount
+
+
+class _GaugeChild(object):
+    """
+    @brief 仪表的单组标签取值
+    """
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value: float = 0.0
+
+    def set(self, value: float) -> None:
+        """
+        @brief 设置当前值
+        @param value 新值
+        """
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        @brief 增加当前值
+        @param amount 增量
+        """
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """
+        @brief 减少当前值
+        @param amount 减量
+        """
+        self.value -= amount
+
+
+class _HistogramChild(object):
+    """
+    @brief 直方图的单组标签取值
+    @details counts[i] 为落入第 i 个桶（上界 buckets[i]）的观测数，末位为 +Inf 桶，输出时再做累加。
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets: tuple[float, ...] = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        """
+        @brief 记录一次观测
+        @param value 观测值
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric[C]:
+    """
+    @brief 指标族基类，按标签取值元组缓存子指标
+    """
+    kind: str = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], factory: Callable[[], C]) -> None:
+        """
+        @brief 初始化指标族
+        @param name 指标名
+        @param documentation 指标说明，输出到 HELP 行
+        @param labelnames 标签名元组
+        @param factory 子指标构造函数
+        """
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: tuple[str, ...] = labelnames
+        self._factory: Callable[[], C] = factory
+        self._children: dict[tuple[str, ...], C] = {}
+
+    def labels(self, *values: object) -> C:
+        """
+        @brief 取得指定标签取值的子指标，不存在时创建
+        @param values 与 labelnames 一一对应的标签取值
+        @return 子指标对象
+        @throws ValueError 标签取值数量与标签名不一致时
+        """
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f'指标 {self.name} 需要 {len(self.labelnames)} 个标签，实际传入 {len(key)} 个')
+            child = self._children.setdefault(key, self._factory())
+        return child
+
+    def children(self) -> Iterator[tuple[dict[str, str], C]]:
+        """
+        @brief 遍历全部子指标
+        @return (标签字典, 子指标) 迭代器
+        """
+        for key, child in self._children.items():
+            yield dict(zip(self.labelnames, key)), child
+
+
+class Counter(_Metric[_CounterChild]):
+    """
+    @brief 单调递增计数器
+    """
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]) -> None:
+        super().__init__(name, documentation, labelnames, _CounterChild)
+
+
+class Gauge(_Metric[_GaugeChild]):
+    """
+    @brief 可增可减的瞬时值
+    """
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]) -> None:
+        super().__init__(name, documentation, labelnames, _GaugeChild)
+
+
+class Histogram(_Metric[_HistogramChild]):
+    """
+    @brief 分桶直方图
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]) -> None:
+        super().__init__(name, documentation, labelnames, lambda: _HistogramChild(buckets))
+        self.buckets: tuple[float, ...] = buckets
+
+
+class MetricsRegistry(object):
+    """
+    @brief 进程内指标注册表
+    @details 同名指标只创建一次，重复获取返回同一对象，各模块可在导入时声明所需指标。
+             collector 回调在每次导出前调用，用于把外部统计（如连接池计数）同步为仪表值。
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """
+        @brief 获取或创建计数器
+        @param name 指标名
+        @param documentation 指标说明
+        @param labelnames 标签名元组
+        @return 计数器对象
+        """
+        return self._get_or_create(name, lambda: Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        """
+        @brief 获取或创建仪表
+        @param name 指标名
+        @param documentation 指标说明
+        @param labelnames 标签名元组
+        @return 仪表对象
+        """
+        return self._get_or_create(name, lambda: Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        @brief 获取或创建直方图
+        @param name 指标名
+        @param documentation 指标说明
+        @param labelnames 标签名元组
+        @param buckets 升序排列的桶上界
+        @return 直方图对象
+        """
+        return self._get_or_create(name, lambda: Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """
+        @brief 注册导出前回调
+        @param collector 无参回调，在 render() / snapshot() 前调用
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        @brief 以 Prometheus 文本格式（0.0.4）导出全部指标
+        @return 指标文本
+        """
+        self._collect()
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for labels, child in metric.children():
+                if isinstance(child, _HistogramChild):
+                    cumulative = 0
+                    for bound, bucket_count in zip((*child.buckets, inf), child.counts):
+                        cumulative += bucket_count
+                        le = '+Inf' if bound == inf else repr(bound)
+                        lines.append(f'{metric.name}_bucket{_format_labels({**labels, "le": le})} {cumulative}')
+                    lines.append(f'{metric.name}_sum{_format_labels(labels)} {child.sum}')
+                    lines.append(f'{metric.name}_count{_format_labels(labels)} {child.count}')
+                else:
+                    lines.append(f'{metric.name}{_format_labels(labels)} {child.value}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> list[str]:
+        """
+        @brief 生成便于写入日志的紧凑快照
+        @details 计数器与仪表输出当前值，直方图输出观测数与均值；值为 0 的计数器省略。
+        @return 每行一个样本的字符串列表
+        """
+        self._collect()
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            for labels, child in metric.children():
+                label_text = _format_labels(labels)
+                if isinstance(child, _HistogramChild):
+                    if child.count:
+                        lines.append(f'{metric.name}{label_text} count={child.count} mean={child.sum / child.count:.6g}')
+                elif child.value or metric.kind == 'gauge':
+                    lines.append(f'{metric.name}{label_text} {child.value:g}')
+        return lines
+
+    def _collect(self) -> None:
+        """
+        @brief 依次调用已注册的导出前回调，单个回调异常不影响导出
+        """
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f'指标采集回调执行失败：{e}', exc_info=True)
+
+    def _get_or_create[M: _Metric](self, name: str, factory: Callable[[], M]) -> M:
+        """
+        @brief 按名称获取指标，不存在时创建
+        @param name 指标名
+        @param factory 指标构造函数
+        @return 指标对象
+        """
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics.setdefault(name, factory())
+        return metric
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """
+    @brief 将标签字典格式化为 Prometheus 标签文本
+    @param labels 标签字典
+    @return 形如 {a="1",b="2"} 的文本，无标签时为空串
+    """
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + '}'
+
+
+def _escape_label(value: str) -> str:
+    """
+    @brief 按 Prometheus 文本格式转义标签值中的反斜杠、双引号与换行
+    @param value 原始标签值
+    @return 转义后的标签值
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# 进程级指标注册表单例
+metrics: MetricsRegistry = MetricsRegistry()
+
+
+async def _handle_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """
+    @brief 处理单次指标抓取请求
+    @details 仅支持 GET /metrics，其余路径返回 404。读取请求头后立即响应并关闭连接；
+             请求头在 _SCRAPE_TIMEOUT 内未读完时直接关闭连接。
+    @param reader 连接读端
+    @param writer 连接写端
+    """
+    try:
+        async with asyncio.timeout(_SCRAPE_TIMEOUT):
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+
+        parts = request_line.decode('latin-1').split()
+        if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+            status, body = '200 OK', metrics.render().encode('utf-8')
+        else:
+            status, body = '404 Not Found', b'not found\n'
+
+        writer.write(
+            f'HTTP/1.1 {status}\r\n'
+            f'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: close\r\n\r\n'.encode('latin-1') + body
+        )
+        await writer.drain()
+    except (ConnectionError, UnicodeDecodeError, TimeoutError) as e:
+        logger.debug(f'指标抓取连接异常：{e!r}')
+    finally:
+        writer.close()
+
+
+async def serve_metrics(host: str, port: int) -> asyncio.Server:
+    """
+    @brief 启动本地指标 HTTP 端点
+    @param host 监听地址
+    @param port 监听端口
+    @return 已启动的 asyncio.Server，调用方负责关闭
+    """
+    server = await asyncio.start_server(_handle_scrape, host, port)
+    logger.info(f"指标端点已启动：http://{host}:{port}/metrics")
+    return server
+
+
+async def log_snapshots(interval: float) -> None:
+    """
+    @brief 周期性地将指标快照写入日志，永不结束
+    @param interval 快照间隔（秒）
+    """
+    while True:
+        await asyncio.sleep(interval)
+        lines = metrics.snapshot()
+        logger.info("指标快照：\n" + '\n'.join(lines))
+
+
+if __name__ == '__main__':
+    pass
@@ -2,40 +2,73 @@
 # AUTHOR: Sun
 """
 @brief parser 包统一导出入口
-@details 导出 DISPATCH_REGISTRY 供外部注册解析数据类到解析器的映射。
+@details 导出 DISPATCH_REGISTRY 供外部注册解析数据类到解析器的映射，
+         每个条目同时声明解析器的执行模式（ExecutionMode）。
          build_parsers() 一次性实例化所有 ParserBase 子类，
          返回值可直接用 ** 解包合并到 main.py 的 dispatch_registry。
+         [parser] process_pool_workers 大于 0 时为 PROCESS 条目创建共享进程池，
+         否则全部解析器在事件循环内执行；close_parsers() 在进程退出前关闭进程池。
 """
 
+from concurrent.futures import ProcessPoolExecutor
+
+from config import config
 from base import HandlerBase
 from data.base import TaskBaseData
 from data.parse import BangumiCalendarParseData, BangumiCoverParseData, BangumiSubjectDetailParseData
-from parser.base import ParserBase
+from parser.base import ExecutionMode, ParserBase
 from parser.bangumi.calendar import BangumiCalendarParser
 from parser.bangumi.cover import BangumiCoverParser
 from parser.bangumi.subject import BangumiSubjectDetailParser
 
-# 解析数据类 → 解析器类 的全局注册表
-DISPATCH_REGISTRY: dict[type[TaskBaseData], type[ParserBase]] = {
-    BangumiCalendarParseData:      BangumiCalendarParser,
-    BangumiSubjectDetailParseData: BangumiSubjectDetailParser,
-    BangumiCoverParseData:         BangumiCoverParser,
+# 解析数据类 → (解析器类, 执行模式) 的全局注册表
+DISPATCH_REGISTRY: dict[type[TaskBaseData], tuple[type[ParserBase], ExecutionMode]] = {
+    BangumiCalendarParseData:      (BangumiCalendarParser,      ExecutionMode.PROCESS),
+    BangumiSubjectDetailParseData: (BangumiSubjectDetailParser, ExecutionMode.PROCESS),
+    BangumiCoverParseData:         (BangumiCoverParser,         ExecutionMode.INLINE),
 }
 
+# 进程级共享的解析进程池，由 build_parsers() 按需创建
+_executor: ProcessPoolExecutor | None = None
+
 
 def build_parsers() -> dict[type[TaskBaseData], HandlerBase]:
     """
     @brief 实例化并返回所有解析器的映射字典
-    @details 返回值可直接用 ** 解包合并到 main.py 的 dispatch_registry。
+    @details 进程池大小由 [parser] process_pool_workers 指定，为 0（默认）时不创建进程池，
+             PROCESS 条目退化为 INLINE 执行。返回值可直接用 ** 解包合并到 main.py 的 dispatch_registry。
     @return 类型 → 实例的映射，包含所有已注册解析器
     """
-    return {cls: parser_cls() for cls, parser_cls in DISPATCH_REGISTRY.items()}
+    global _executor
+    workers: int = config.getint('parser', 'process_pool_workers', fallback=0)
+    if workers > 0 and any(mode is ExecutionMode.PROCESS for _, mode in DISPATCH_REGISTRY.values()):
+        _executor = ProcessPoolExecutor(max_workers=workers)
+
+    return {
+        cls: parser_cls(_executor if mode is ExecutionMode.PROCESS else None)
+        for cls, (parser_cls, mode) in DISPATCH_REGISTRY.items()
+    }
+
+
+def close_parsers() -> None:
+    """
+    @brief 关闭 build_parsers() 创建的进程池
+    @details 由 main.py 在事件总线退出时调用；未创建进程池时直接返回。
+    """
+    global _executor
+    if _executor is None:
+        return
+
+    _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = None
 
 
 __all__ = [
     'ParserBase',
+    'ExecutionMode',
     'DISPATCH_REGISTRY',
     'build_parsers',
+    'close_parsers',
 ]
 
 if __name__ == '__main__':
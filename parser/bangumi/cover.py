@@ -4,6 +4,7 @@
 @brief 实现 Bangumi 封面图响应解析器
 @details 从 HttpxResponseData 中提取图片字节，并通过 meta['db_id'] 关联数据库记录，
          产出 BangumiCoverStoreData 供后续存储器写入 subjects.cover_image 列。
+         流式下载的响应体已落盘，只传递文件引用，不读入内存。
 """
 
 from logging import getLogger
@@ -12,6 +13,7 @@ from data.parse import BangumiCoverParseData
 from data.request import RequestBaseData
 from data.store import BangumiCoverStoreData, StoreBaseData
 from parser.base import ParserBase
+from spool import discard_body
 
 logger = getLogger(__name__)
 
@@ -33,9 +35,14 @@ class BangumiCoverParser(ParserBase[BangumiCoverParseData]):
 
         if db_id is None:
             logger.warning(f"BangumiCoverParser meta 缺少 db_id，丢弃响应")
+            if task.body is not None:
+                discard_body(task.body)
             return None
 
-        results = BangumiCoverStoreData(db_id=db_id, image_bytes=task.response.content)
+        if task.body is not None:
+            results = BangumiCoverStoreData(db_id=db_id, image_file=task.body)
+        else:
+            results = BangumiCoverStoreData(db_id=db_id, image_bytes=task.response.content)
 
         logger.info(f"解析 {type(task).__name__} 产出 {results.db_id} 的后续任务")
         return results
@@ -6,18 +6,64 @@
          handle() 作为纯兜底保护，捕获未预期异常后以 logger.error 记录并丢弃任务；
          子类在 _do_parse() 中实现实际解析逻辑，产出新的请求任务或落库数据。
          禁止在子类中使用 yield 生成器语法，必须构造完整列表后 return。
+         解析器可选以 ExecutionMode.PROCESS 模式运行：_do_parse() 被提交到进程池执行，
+         事件循环只负责收发数据。进程池模式下仅向子进程传递精简后的响应（状态码、头部与字节），
+         子进程返回普通的 dataclass 结果，Bus 始终运行在主事件循环上。
 """
 
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from dataclasses import replace
+from enum import Enum
 from logging import getLogger
 
+from httpx import Request, Response
+
 from base import HandlerBase
 from data.parse import ParseBaseData
 from data.request import RequestBaseData
+from data.response import HttpxResponseData
 from data.store import StoreBaseData
 
 logger = getLogger(__name__)
 
+# 子进程内按解析器类型缓存的实例，避免每个任务重复构造
+_worker_parsers: dict[type[ParserBase], ParserBase] = {}
+
+
+class ExecutionMode(Enum):
+    """
+    @brief 解析器执行模式
+    @details 在 parser/__init__.py 的 DISPATCH_REGISTRY 中按条目声明。
+    """
+    INLINE = 'inline'    # 在主事件循环内直接执行 _do_parse()
+    PROCESS = 'process'  # 提交到进程池执行 _do_parse()，适用于 CPU 密集型解析
+
+
+def _parse_in_worker[T: ParseBaseData](parser_cls: type[ParserBase[T]], task: T) -> list[RequestBaseData | StoreBaseData] | RequestBaseData | StoreBaseData | None:
+    """
+    @brief 进程池工作函数：在子进程内同步驱动 _do_parse() 协程
+    @details 进程池模式要求 _do_parse() 内部不 await 任何可挂起对象，
+             因此只需 send(None) 一次即可得到返回值，无需在子进程内创建事件循环。
+    @param parser_cls 解析器类型，子进程内按类型缓存实例
+    @param task 精简后的解析输入数据包
+    @return _do_parse() 的返回值
+    @throws RuntimeError _do_parse() 在子进程内发生挂起时
+    """
+    parser: ParserBase | None = _worker_parsers.get(parser_cls)
+    if parser is None:
+        parser = _worker_parsers.setdefault(parser_cls, parser_cls())
+
+    coro = parser._do_parse(task)
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+
+    coro.close()
+    raise RuntimeError(f'{parser_cls.__name__}._do_parse() 在进程池模式下不得 await 可挂起对象')
+
 
 class ParserBase[T: ParseBaseData](HandlerBase[T], ABC):
     """
@@ -25,20 +71,59 @@ class ParserBase[T: ParseBaseData](HandlerBase[T], ABC):
     @details 继承 HandlerBase 参与总线调度，继承 ABC 强制子类实现 _do_parse()。
              handle() 是具体方法，作为纯兜底保护；解析逻辑由子类在 _do_parse() 中完成。
              解析器是框架中产出最多样化结果的处理单元，可同时产出新请求与落库数据。
+             构造时传入进程池则以 PROCESS 模式运行，否则在事件循环内直接解析。
     """
 
+    def __init__(self, executor: Executor | None = None) -> None:
+        """
+        @brief 初始化解析器
+        @param executor 进程池；为 None 时在主事件循环内执行 _do_parse()
+        """
+        self._executor: Executor | None = executor
+
     async def handle(self, task: T) -> list[RequestBaseData | StoreBaseData] | RequestBaseData | StoreBaseData | None:
         """
         @brief 兜底保护：透传 _do_parse() 结果，捕获未预期异常后丢弃任务
+        @details 持有进程池时将精简后的任务提交给子进程解析，等待期间不阻塞事件循环。
         @param task 携带 HTTP 响应信息的解析输入数据包
         @return _do_parse() 的返回值；发生未预期异常时返回 None
         """
         try:
-            return await self._do_parse(task)
+            if self._executor is None:
+                return await self._do_parse(task)
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, _parse_in_worker, type(self), self._slim(task))
         except Exception as e:
             logger.error(f'解析任务 {type(task).__name__} 时发生未预期异常，任务已丢弃：{e}', exc_info=True)
             return None
 
+    @staticmethod
+    def _slim(task: T) -> T:
+        """
+        @brief 构造仅含响应字节的精简任务，降低跨进程序列化开销
+        @details httpx.Response 替换为只携带状态码、头部、字节与请求方法/URL 的新对象，
+                 丢弃连接、流等无法或无需跨进程传递的内部状态。非 httpx 响应任务原样返回。
+                 压缩传输的响应在此处已解码，故不保留内容编码相关头部。
+        @param task 原始解析输入数据包
+        @return 可安全 pickle 的解析输入数据包
+        """
+        if not isinstance(task, HttpxResponseData):
+            return task
+
+        response: Response = task.response
+        # content 已是解码后的字节，须去掉 Content-Encoding / Content-Length，否则新 Response 会再次解压
+        headers = [
+            (key, value) for key, value in response.headers.multi_items()
+            if key.lower() not in ('content-encoding', 'content-length')
+        ]
+        return replace(task, response=Response(
+            response.status_code,
+            headers=headers,
+            content=response.content,
+            request=Request(response.request.method, response.request.url),
+        ))
+
     @abstractmethod
     async def _do_parse(self, task: T) -> list[RequestBaseData | StoreBaseData] | RequestBaseData | StoreBaseData | None:
         """
@@ -48,6 +133,8 @@ class ParserBase[T: ParseBaseData](HandlerBase[T], ABC):
                  - 落库数据：构造 StoreBaseData 子类放入结果列表
                  两者可同时产出。正常业务异常（如页面结构变更）须在此方法内部处理，不向上抛出。
                  禁止使用 yield 生成器语法，必须构造完整列表后 return。
+                 声明为 ExecutionMode.PROCESS 的解析器须保证此方法不 await、不依赖实例状态，
+                 返回值须可 pickle。
         @param task 携带 HTTP 响应信息的解析输入数据包，通过双继承可访问 task.response
         @return list[RequestBaseData | StoreBaseData] 解析产出的后续任务列表；
                 None 无任何产出或解析失败
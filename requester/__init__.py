@@ -2,31 +2,276 @@
 # AUTHOR: Sun
 """
 @brief requester 包初始化
-@details 导出请求器基类、三个具体 HTTP 请求器、注册表及工厂函数。
+@details 导出请求器基类、四个具体 HTTP 请求器、注册表及工厂函数。
          DISPATCH_REGISTRY 可直接用于 Bus 的 dispatch_registry；
-         build_http_requesters() 一次性实例化全部请求器，返回值可 ** 解包合并。
+         build_http_requesters() 创建共享的 HttpClientRegistry 并一次性实例化全部请求器，
+         返回值可 ** 解包合并；close_http_requesters() 在进程退出前关闭全部连接池。
+         连接池、HTTP/2 与 connect_to 参数从 [http] 节读取默认值，[http:<host>] 节按主机覆盖；
+         自适应限速参数同理从 [limiter] 节读取默认值，[limiter:<host>] 节按主机覆盖；
+         [http_cache] 节启用时各请求器共享同一个条件请求缓存，在 close_http_requesters() 中关闭；
+         [http] spool_dir 指定流式下载的临时文件目录；
+         [dedup] 节控制在途请求合并与持久化的已见集合，已见集合文件在 close_http_requesters() 中刷写关闭；
+         熔断器参数从 [breaker] 节读取默认值，[breaker:<host>] 节按主机覆盖，各请求器共享同一个 BreakerRegistry；
+         [cassette] 节启用时全部主机经同一个磁带录制或回放，在 close_http_requesters() 中关闭并重建索引。
 """
 
+from pathlib import Path
+
+from config import config
+from metrics import metrics
 from base import HandlerBase
 from data.base import TaskBaseData
-from data.request import SingleHttpxRequestData, BatchHttpxRequestData, ThrottledHttpxRequestData
+from data.request import SingleHttpxRequestData, BatchHttpxRequestData, ThrottledHttpxRequestData, StreamHttpxRequestData
 from requester.base import RequesterBase
-from requester.http import SingleHttpRequester, BatchHttpRequester, ThrottledHttpRequester
+from requester.breaker import BreakerConfig, BreakerRegistry, BreakerState, CircuitOpenError, HostBreaker
+from requester.cache import CacheEntry, HttpCache, HttpCacheConfig
+from requester.cassette import Cassette, CassetteConfig, CassetteMissError, CassetteMode, CassetteTransport
+from requester.client import HostClientConfig, HttpClientRegistry, PoolStats
+from requester.dedup import DedupConfig, Deduplicator, SeenSet, fingerprint
+from requester.limiter import HostLimiter, LimiterConfig, LimiterRegistry
+from requester.http import SingleHttpRequester, BatchHttpRequester, ThrottledHttpRequester, StreamHttpRequester
+
+_HOST_SECTION_PREFIX: str = 'http:'
+_LIMITER_SECTION_PREFIX: str = 'limiter:'
+_BREAKER_SECTION_PREFIX: str = 'breaker:'
 
-DISPATCH_REGISTRY: dict[type[TaskBaseData], type[HandlerBase]] = {
+DISPATCH_REGISTRY: dict[type[TaskBaseData], type[RequesterBase]] = {
     SingleHttpxRequestData: SingleHttpRequester,
     BatchHttpxRequestData: BatchHttpRequester,
     ThrottledHttpxRequestData: ThrottledHttpRequester,
+    StreamHttpxRequestData: StreamHttpRequester,
 }
 
 
+# 进程级共享的客户端注册表与限速器注册表，由 build_http_requesters() 创建
+_clients: HttpClientRegistry | None = None
+_limiters: LimiterRegistry | None = None
+_breakers: BreakerRegistry | None = None
+_cache: HttpCache | None = None
+_dedup: Deduplicator | None = None
+_cassette: Cassette | None = None
+
+
+def _load_host_config(section: str, default: HostClientConfig) -> HostClientConfig:
+    """
+    @brief 从配置节读取连接池参数，缺失的键沿用 default
+    @param section 配置节名，如 http 或 http:api.bgm.tv
+    @param default 缺省值来源
+    @return 合并后的连接池配置
+    """
+    return HostClientConfig(
+        max_connections=config.getint(section, 'max_connections', fallback=default.max_connections),
+        max_keepalive_connections=config.getint(
+            section, 'max_keepalive_connections', fallback=default.max_keepalive_connections,
+        ),
+        keepalive_expiry=config.getfloat(section, 'keepalive_expiry', fallback=default.keepalive_expiry),
+        http1=config.getboolean(section, 'http1', fallback=default.http1),
+        http2=config.getboolean(section, 'http2', fallback=default.http2),
+        max_concurrent_streams=config.getint(section, 'max_concurrent_streams', fallback=default.max_concurrent_streams),
+        connect_to=config.get(section, 'connect_to', fallback=default.connect_to) or None,
+        connect_timeout=config.getfloat(section, 'connect_timeout', fallback=default.connect_timeout),
+        read_timeout=config.getfloat(section, 'read_timeout', fallback=default.read_timeout),
+        write_timeout=config.getfloat(section, 'write_timeout', fallback=default.write_timeout),
+        pool_timeout=config.getfloat(section, 'pool_timeout', fallback=default.pool_timeout),
+    )
+
+
+def _load_client_registry(cassette: Cassette | None) -> HttpClientRegistry:
+    """
+    @brief 按配置构造 HttpClientRegistry
+    @details [http] 节提供默认连接池参数，每个 [http:<host>] 节为对应主机单独覆盖。
+    @param cassette 已打开的磁带，未启用时为 None
+    @return 新建的客户端注册表
+    """
+    default = _load_host_config('http', HostClientConfig(
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=5.0,
+    ))
+    hosts: dict[str, HostClientConfig] = {
+        section.removeprefix(_HOST_SECTION_PREFIX): _load_host_config(section, default)
+        for section in config.sections()
+        if section.startswith(_HOST_SECTION_PREFIX)
+    }
+    return HttpClientRegistry(default, hosts, cassette)
+
+
+def _load_limiter_config(section: str, default: LimiterConfig) -> LimiterConfig:
+    """
+    @brief 从配置节读取限速器参数，缺失的键沿用 default
+    @param section 配置节名，如 limiter 或 limiter:api.bgm.tv
+    @param default 缺省值来源
+    @return 合并后的限速器配置
+    """
+    return LimiterConfig(
+        enabled=config.getboolean(section, 'enabled', fallback=default.enabled),
+        initial_concurrency=config.getint(section, 'initial_concurrency', fallback=default.initial_concurrency),
+        min_concurrency=config.getint(section, 'min_concurrency', fallback=default.min_concurrency),
+        max_concurrency=config.getint(section, 'max_concurrency', fallback=default.max_concurrency),
+        initial_rate=config.getfloat(section, 'initial_rate', fallback=default.initial_rate),
+        min_rate=config.getfloat(section, 'min_rate', fallback=default.min_rate),
+        max_rate=config.getfloat(section, 'max_rate', fallback=default.max_rate),
+        rate_step=config.getfloat(section, 'rate_step', fallback=default.rate_step),
+        backoff_factor=config.getfloat(section, 'backoff_factor', fallback=default.backoff_factor),
+        latency_tolerance=config.getfloat(section, 'latency_tolerance', fallback=default.latency_tolerance),
+        cooldown=config.getfloat(section, 'cooldown', fallback=default.cooldown),
+        max_retry_after=config.getfloat(section, 'max_retry_after', fallback=default.max_retry_after),
+    )
+
+
+def _load_limiter_registry() -> LimiterRegistry:
+    """
+    @brief 按配置构造 LimiterRegistry
+    @details [limiter] 节提供默认参数，每个 [limiter:<host>] 节为对应主机单独覆盖。
+    @return 新建的限速器注册表
+    """
+    default = _load_limiter_config('limiter', LimiterConfig())
+    hosts: dict[str, LimiterConfig] = {
+        section.removeprefix(_LIMITER_SECTION_PREFIX): _load_limiter_config(section, default)
+        for section in config.sections()
+        if section.startswith(_LIMITER_SECTION_PREFIX)
+    }
+    return LimiterRegistry(default, hosts)
+
+
+def _load_breaker_config(section: str, default: BreakerConfig) -> BreakerConfig:
+    """
+    @brief 从配置节读取熔断器参数，缺失的键沿用 default
+    @param section 配置节名，如 breaker 或 breaker:lain.bgm.tv
+    @param default 缺省值来源
+    @return 合并后的熔断器配置
+    """
+    return BreakerConfig(
+        enabled=config.getboolean(section, 'enabled', fallback=default.enabled),
+        window=config.getint(section, 'window', fallback=default.window),
+        min_requests=config.getint(section, 'min_requests', fallback=default.min_requests),
+        failure_rate=config.getfloat(section, 'failure_rate', fallback=default.failure_rate),
+        open_duration=config.getfloat(section, 'open_duration', fallback=default.open_duration),
+        max_open_duration=config.getfloat(section, 'max_open_duration', fallback=default.max_open_duration),
+        half_open_probes=config.getint(section, 'half_open_probes', fallback=default.half_open_probes),
+        park_trips=config.getint(section, 'park_trips', fallback=default.park_trips),
+    )
+
+
+def _load_breaker_registry() -> BreakerRegistry:
+    """
+    @brief 按配置构造 BreakerRegistry
+    @details [breaker] 节提供默认参数，每个 [breaker:<host>] 节为对应主机单独覆盖。
+    @return 新建的熔断器注册表
+    """
+    default = _load_breaker_config('breaker', BreakerConfig())
+    hosts: dict[str, BreakerConfig] = {
+        section.removeprefix(_BREAKER_SECTION_PREFIX): _load_breaker_config(section, default)
+        for section in config.sections()
+        if section.startswith(_BREAKER_SECTION_PREFIX)
+    }
+    return BreakerRegistry(default, hosts)
+
+
+def _load_http_cache() -> HttpCache | None:
+    """
+    @brief 按 [http_cache] 节创建并打开 HTTP 缓存
+    @return 已打开的缓存；未启用时返回 None
+    """
+    if not config.getboolean('http_cache', 'enabled', fallback=False):
+        return None
+    cache = HttpCache(HttpCacheConfig(
+        path=config.get('http_cache', 'path', fallback='cache/http.sqlite3'),
+        max_bytes=config.getint('http_cache', 'max_mb', fallback=512) << 20,
+        short_circuit=config.getboolean('http_cache', 'short_circuit', fallback=False),
+    ))
+    cache.open()
+    return cache
+
+
+def _load_deduplicator() -> Deduplicator:
+    """
+    @brief 按 [dedup] 节创建请求去重器
+    @details seen_path 为空时不启用已见集合，只合并在途请求。
+    @return 新建的去重器
+    """
+    default = DedupConfig()
+    return Deduplicator(DedupConfig(
+        coalesce=config.getboolean('dedup', 'coalesce', fallback=default.coalesce),
+        seen_path=config.get('dedup', 'seen_path', fallback='') or None,
+        seen_ttl=config.getfloat('dedup', 'seen_ttl_hours', fallback=default.seen_ttl / 3600) * 3600,
+        seen_slots=config.getint('dedup', 'seen_slots', fallback=default.seen_slots),
+    ))
+
+
+def _load_cassette() -> Cassette | None:
+    """
+    @brief 按 [cassette] 节创建并打开录制 / 回放磁带
+    @return 已打开的磁带；未启用时返回 None
+    """
+    if not config.getboolean('cassette', 'enabled', fallback=False):
+        return None
+    cassette = Cassette(CassetteConfig(
+        path=config.get('cassette', 'path', fallback='cassettes/bangumi'),
+        mode=CassetteMode(config.get('cassette', 'mode', fallback=CassetteMode.NEW_EPISODES.value)),
+        latency=config.getfloat('cassette', 'latency_ms', fallback=0.0) / 1000,
+    ))
+    cassette.open()
+    return cassette
+
+
 def build_http_requesters() -> dict[type[TaskBaseData], HandlerBase]:
     """
-    @brief 实例化并返回全部 HTTP 请求器的映射字典
-    @details 返回值可直接用 ** 解包合并到 main.py 的 dispatch_registry。
-    @return 类型 → 实例的映射，包含三种 httpx 请求策略的 Handler
+    @brief 创建共享客户端注册表，实例化并返回全部 HTTP 请求器的映射字典
+    @details 各请求器共享同一个 HttpClientRegistry、LimiterRegistry 与 BreakerRegistry，
+             同一主机的请求复用同一连接池，并受同一个自适应限速器与熔断器约束；启用缓存时共享同一个 HttpCache；
+             共享同一个 Deduplicator，不同请求器发出的相同请求也能合并。
+             返回值可直接用 ** 解包合并到 main.py 的 dispatch_registry。
+    @return 类型 → 实例的映射，包含四种 httpx 请求策略的 Handler
+    """
+    global _clients, _limiters, _breakers, _cache, _dedup, _cassette
+    _cassette = _load_cassette()
+    _clients = _load_client_registry(_cassette)
+    _limiters = _load_limiter_registry()
+    _breakers = _load_breaker_registry()
+    _cache = _load_http_cache()
+    _dedup = _load_deduplicator()
+    spool_dir: str | None = config.get('http', 'spool_dir', fallback=None)
+    if spool_dir is not None:
+        Path(spool_dir).mkdir(parents=True, exist_ok=True)
+    return {cls: requester_cls(_clients, _limiters, _cache, spool_dir, _dedup, _breakers) for cls, requester_cls in DISPATCH_REGISTRY.items()}
+
+
+def _collect_pool_metrics() -> None:
+    """
+    @brief 导出指标前同步连接池统计与限速器状态；注册表尚未创建时不做任何事
+    """
+    if _clients is not None:
+        _clients.collect_metrics()
+    if _limiters is not None:
+        _limiters.collect_metrics()
+
+
+metrics.register_collector(_collect_pool_metrics)
+
+
+async def close_http_requesters() -> None:
+    """
+    @brief 关闭 build_http_requesters() 创建的全部连接池、HTTP 缓存、已见集合与磁带
+    @details 由 main.py 在事件总线退出时调用；未创建注册表时直接返回。
     """
-    return {cls: parser_cls() for cls, parser_cls in DISPATCH_REGISTRY.items()}
+    global _clients, _limiters, _breakers, _cache, _dedup, _cassette
+    if _clients is None:
+        return
+
+    await _clients.aclose()
+    if _cache is not None:
+        _cache.close()
+    if _dedup is not None:
+        _dedup.close()
+    if _cassette is not None:
+        _cassette.close()
+    _clients = None
+    _limiters = None
+    _breakers = None
+    _cache = None
+    _dedup = None
+    _cassette = None
 
 
 __all__ = [
@@ -34,8 +279,33 @@ __all__ = [
     'SingleHttpRequester',
     'BatchHttpRequester',
     'ThrottledHttpRequester',
+    'StreamHttpRequester',
+    'HostClientConfig',
+    'HttpClientRegistry',
+    'PoolStats',
+    'HostLimiter',
+    'LimiterConfig',
+    'LimiterRegistry',
+    'BreakerConfig',
+    'BreakerRegistry',
+    'BreakerState',
+    'CircuitOpenError',
+    'HostBreaker',
+    'CacheEntry',
+    'HttpCache',
+    'HttpCacheConfig',
+    'DedupConfig',
+    'Deduplicator',
+    'SeenSet',
+    'fingerprint',
+    'Cassette',
+    'CassetteConfig',
+    'CassetteMissError',
+    'CassetteMode',
+    'CassetteTransport',
     'DISPATCH_REGISTRY',
     'build_http_requesters',
+    'close_http_requesters',
 ]
 
 if __name__ == '__main__':
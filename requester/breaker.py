@@ -0,0 +1,238 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 按主机的熔断器
+@details HostBreaker 统计单个主机最近 window 次请求的结果，网络异常（httpx.TransportError）与 5xx 响应计为失败：
+         - 关闭（closed）：请求照常发出；样本数达到 min_requests 且失败率达到 failure_rate 时打开；
+         - 打开（open）：请求在发出前即抛出 CircuitOpenError，不占用连接与限速器槽位；open_duration 秒后转为半开；
+         - 半开（half_open）：最多 half_open_probes 个探测请求同时发出，其余请求仍被拒绝；
+           探测成功 half_open_probes 次后关闭，任一探测失败则再次打开，打开时长按连续打开次数加倍，不超过 max_open_duration。
+         被拒绝的请求由请求器处理：连续打开次数未超过 park_trips 时，任务原样（不消耗重试次数）延迟到半开时刻再投递；
+         超过后主机视为长期不可用，按普通网络异常走重试递减，避免一次性任务无限期等待。
+         BreakerRegistry 按主机名懒加载熔断器，未启用的主机返回 None。状态变化即时写入指标。
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from logging import getLogger
+from time import time
+
+from httpx import Request, TransportError
+
+from metrics import metrics
+
+logger = getLogger(__name__)
+
+_BREAKER_STATE = metrics.gauge('http_breaker_state', '熔断器状态（0 关闭，1 打开，2 半开）', ('host',))
+_BREAKER_TRANSITIONS = metrics.counter('http_breaker_transitions_total', '熔断器状态变化次数', ('host', 'state'))
+_BREAKER_REJECTED = metrics.counter('http_breaker_rejected_total', '熔断器拒绝的请求数', ('host',))
+
+
+class BreakerState(Enum):
+    """
+    @brief 熔断器状态，取值即指标中的数值
+    """
+    CLOSED = 0     # 关闭，请求照常发出
+    OPEN = 1       # 打开，请求直接拒绝
+    HALF_OPEN = 2  # 半开，只放行探测请求
+
+
+@dataclass(frozen=True)
+class BreakerConfig(object):
+    """
+    @brief 单个主机的熔断器配置
+    @param enabled 是否启用
+    @param window 统计失败率的最近请求数
+    @param min_requests 计算失败率所需的最少样本数
+    @param failure_rate 打开熔断器的失败率阈值
+    @param open_duration 首次打开的时长（秒）
+    @param max_open_duration 连续打开时加倍后的时长上限（秒）
+    @param half_open_probes 半开状态同时放行的探测请求数，也是关闭所需的连续成功次数
+    @param park_trips 连续打开不超过该次数时，被拒绝的任务延迟到半开时刻重投而不消耗重试次数；0 表示直接按失败重试
+    """
+    enabled: bool = False              # 是否启用
+    window: int = 20                   # 统计窗口（请求数）
+    min_requests: int = 10             # 最少样本数
+    failure_rate: float = 0.5          # 失败率阈值
+    open_duration: float = 30.0        # 首次打开时长（秒）
+    max_open_duration: float = 300.0   # 打开时长上限（秒）
+    half_open_probes: int = 1          # 半开探测请求数
+    park_trips: int = 3                # 延迟重投的连续打开次数上限
+
+
+class CircuitOpenError(TransportError):
+    """
+    @brief 熔断器打开，请求未发出
+    @details 继承 httpx.TransportError，未单独处理时与网络异常一样进入重试流程。
+    @param retry_at 熔断器预计转为半开的时刻（Unix 秒）
+    @param park 是否应延迟重投而不消耗重试次数
+    """
+
+    def __init__(self, message: str, *, request: Request, retry_at: float, park: bool) -> None:
+        """
+        @brief 构造异常
+        @param message 异常信息
+        @param request 被拒绝的请求
+        @param retry_at 预计转为半开的时刻（Unix 秒）
+        @param park 是否应延迟重投
+        """
+        super().__init__(message, request=request)
+        self.retry_at: float = retry_at
+        self.park: bool = park
+
+
+class HostBreaker(object):
+    """
+    @brief 单个主机的熔断器
+    @details 调用方在发送前以 admit() 申请放行，请求结束后以 settle() 反馈结果（无论成功、失败或取消都须调用）。
+    """
+
+    def __init__(self, host: str, config: BreakerConfig) -> None:
+        """
+        @brief 初始化熔断器
+        @param host 主机名，用于日志与指标标签
+        @param config 熔断器配置
+        """
+        self._host: str = host
+        self._config: BreakerConfig = config
+        self._state: BreakerState = BreakerState.CLOSED
+        self._outcomes: deque[bool] = deque(maxlen=config.window)
+        self._failures: int = 0
+        self._trips: int = 0
+        self._open_until: float = 0.0
+        self._probes: int = 0
+        self._probe_successes: int = 0
+        _BREAKER_STATE.labels(host).set(BreakerState.CLOSED.value)
+
+    @property
+    def state(self) -> BreakerState:
+        """
+        @brief 当前状态
+        @return 熔断器状态（打开期满但尚未有请求到来时仍为 OPEN）
+        """
+        return self._state
+
+    def admit(self, request: Request) -> bool:
+        """
+        @brief 申请放行一个请求
+        @param request 待发送的请求
+        @return 放行的请求是否为半开状态的探测请求
+        @throws CircuitOpenError 熔断器打开，或半开状态下探测名额已满
+        """
+        now = asyncio.get_running_loop().time()
+        if self._state is BreakerState.OPEN and now >= self._open_until:
+            self._transition(BreakerState.HALF_OPEN)
+            self._probes = self._probe_successes = 0
+        if self._state is BreakerState.CLOSED:
+            return False
+        if self._state is BreakerState.HALF_OPEN and self._probes < self._config.half_open_probes:
+            self._probes += 1
+            return True
+
+        _BREAKER_REJECTED.labels(self._host).inc()
+        raise CircuitOpenError(
+            f'主机 [{self._host}] 熔断中，请求未发出：{request.method} {request.url}',
+            request=request,
+            retry_at=time() + max(self._open_until - now, 0.0),
+            park=self._trips <= self._config.park_trips,
+        )
+
+    def settle(self, probe: bool, success: bool | None) -> None:
+        """
+        @brief 反馈请求结果
+        @param probe admit() 的返回值
+        @param success 请求是否成功；None 表示请求被取消或因其他原因中止，不计入统计
+        """
+        if probe:
+            self._probes -= 1
+        if success is None:
+            return
+        if probe and self._state is BreakerState.HALF_OPEN:
+            if not success:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self._config.half_open_probes:
+                self._close()
+            return
+        if self._state is not BreakerState.CLOSED:
+            return
+
+        if len(self._outcomes) == self._outcomes.maxlen and not self._outcomes[0]:
+            self._failures -= 1
+        self._outcomes.append(success)
+        if not success:
+            self._failures += 1
+        if len(self._outcomes) >= self._config.min_requests and self._failures >= self._config.failure_rate * len(self._outcomes):
+            self._open()
+
+    def _open(self) -> None:
+        """
+        @brief 打开熔断器，打开时长按连续打开次数加倍
+        """
+        config = self._config
+        self._trips += 1
+        duration = min(config.open_duration * 2 ** (self._trips - 1), config.max_open_duration)
+        self._open_until = asyncio.get_running_loop().time() + duration
+        self._transition(BreakerState.OPEN)
+        logger.warning(
+            f"主机 [{self._host}] 熔断器打开（连续第 {self._trips} 次），{duration:g} 秒后探测，"
+            f"最近 {len(self._outcomes)} 次请求失败 {self._failures} 次"
+        )
+
+    def _close(self) -> None:
+        """
+        @brief 关闭熔断器并清空统计
+        """
+        self._trips = 0
+        self._outcomes.clear()
+        self._failures = 0
+        self._transition(BreakerState.CLOSED)
+        logger.info(f"主机 [{self._host}] 探测成功，熔断器关闭")
+
+    def _transition(self, state: BreakerState) -> None:
+        """
+        @brief 切换状态并写入指标
+        @param state 新状态
+        """
+        self._state = state
+        _BREAKER_STATE.labels(self._host).set(state.value)
+        _BREAKER_TRANSITIONS.labels(self._host, state.name.lower()).inc()
+
+
+class BreakerRegistry(object):
+    """
+    @brief 按主机名维护 HostBreaker 的注册表
+    @details 与 LimiterRegistry 相同，已配置主机使用各自配置，其余主机使用默认配置并懒加载；
+             配置未启用的主机返回 None。
+    """
+
+    def __init__(self, default: BreakerConfig, hosts: dict[str, BreakerConfig]) -> None:
+        """
+        @brief 初始化注册表
+        @param default 未单独配置主机时使用的默认配置
+        @param hosts 主机名 → 熔断器配置 的映射
+        """
+        self._default: BreakerConfig = default
+        self._hosts: dict[str, BreakerConfig] = hosts
+        self._breakers: dict[str, HostBreaker | None] = {}
+
+    def get(self, host: str) -> HostBreaker | None:
+        """
+        @brief 获取指定主机的熔断器
+        @param host 请求 URL 的主机名
+        @return 该主机的熔断器；未启用时返回 None
+        """
+        try:
+            return self._breakers[host]
+        except KeyError:
+            host_config = self._hosts.get(host, self._default)
+            breaker = HostBreaker(host, host_config) if host_config.enabled else None
+            self._breakers[host] = breaker
+            return breaker
+
+
+if __name__ == '__main__':
+    pass
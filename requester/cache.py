@@ -0,0 +1,280 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief HTTP 条件请求缓存
+@details 对带 ETag 或 Last-Modified 的 GET 200 响应，把校验器、响应头与解码后的响应体存入本地 SQLite 文件；
+         下次请求同一 URL 时附加 If-None-Match / If-Modified-Since，服务端返回 304 后用缓存内容
+         重建一个普通的 200 httpx.Response，Router / Gateway / Parser 无需任何改动。
+         存储按 LRU 淘汰：每次命中刷新访问时刻，总大小超过上限时删除最久未访问的条目。
+         SQLite 调用在单线程执行器中串行执行，不阻塞事件循环。
+         启用 short_circuit 时，重建的响应带 UNCHANGED 标记，请求器据此直接终止链路，跳过下游的解析与落库。
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+from httpx import Request, Response
+
+from metrics import metrics
+
+logger = getLogger(__name__)
+
+_CACHE_REQUESTS = metrics.counter('http_cache_requests_total', 'HTTP 缓存查询结果计数', ('host', 'result'))
+_CACHE_BYTES = metrics.gauge('http_cache_bytes', 'HTTP 缓存占用的响应体字节数').labels()
+_CACHE_ENTRIES = metrics.gauge('http_cache_entries', 'HTTP 缓存条目数').labels()
+
+# 重建响应的 extensions 键与取值：revalidated 照常下游处理，unchanged 由请求器终止链路
+EXTENSION_KEY: str = 'http_cache'
+REVALIDATED: str = 'revalidated'
+UNCHANGED: str = 'unchanged'
+
+# 不随响应体缓存的头部：响应体已解码，原编码与长度不再适用
+_DROPPED_HEADERS: frozenset[str] = frozenset({'content-encoding', 'content-length', 'transfer-encoding'})
+# 条件请求头：本地无缓存时须去掉，否则 304 无从重建
+_CONDITIONAL_HEADERS: tuple[str, ...] = ('If-None-Match', 'If-Modified-Since')
+
+_SCHEMA: str = '''
+CREATE TABLE IF NOT EXISTS entries (
+    url           TEXT PRIMARY KEY,
+    status        INTEGER NOT NULL,
+    headers       TEXT NOT NULL,
+    body          BLOB NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    size          INTEGER NOT NULL,
+    accessed      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+'''
+
+
+@dataclass(frozen=True)
+class HttpCacheConfig(object):
+    """
+    @brief HTTP 缓存配置
+    @param path SQLite 文件路径
+    @param max_bytes 响应体总大小上限（字节），超过后按 LRU 淘汰
+    @param short_circuit 304 命中时是否直接终止链路
+    """
+    path: str                    # SQLite 文件路径
+    max_bytes: int = 512 << 20   # 响应体总大小上限（字节）
+    short_circuit: bool = False  # 304 时是否终止链路
+
+
+@dataclass(frozen=True)
+class CacheEntry(object):
+    """
+    @brief 一条缓存记录
+    @param status 原响应状态码
+    @param headers 原响应头（已去除编码与长度相关头部）
+    @param body 解码后的响应体
+    @param etag ETag 校验器
+    @param last_modified Last-Modified 校验器
+    """
+    status: int                     # 原响应状态码
+    headers: list[tuple[str, str]]  # 原响应头
+    body: bytes                     # 解码后的响应体
+    etag: str | None                # ETag 校验器
+    last_modified: str | None       # Last-Modified 校验器
+
+
+class HttpCache(object):
+    """
+    @brief SQLite 持久化的条件请求缓存
+    @details prepare() 在发送前查询缓存并构造条件请求，resolve() 在收到响应后处理 304 命中或写入新条目。
+    """
+
+    def __init__(self, config: HttpCacheConfig) -> None:
+        """
+        @brief 初始化缓存，不打开文件
+        @param config 缓存配置
+        """
+        self._config: HttpCacheConfig = config
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='http-cache')
+        self._db: sqlite3.Connection | None = None
+        self._bytes: int = 0
+        self._entries: int = 0
+
+    def open(self) -> None:
+        """
+        @brief 打开（必要时创建）SQLite 文件并统计现有条目
+        """
+        Path(self._config.path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self._config.path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        self._entries, self._bytes = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        self._publish()
+        logger.info(f"HTTP 缓存已打开 [{self._config.path}]，{self._entries} 条，{self._bytes / (1 << 20):.1f} MB")
+
+    def close(self) -> None:
+        """
+        @brief 关闭执行器与数据库连接
+        """
+        self._executor.shutdown(wait=True)
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def prepare(self, request: Request) -> tuple[Request, CacheEntry | None]:
+        """
+        @brief 查询缓存，命中时构造附带校验器的条件请求
+        @details 不修改原请求，重试时原请求仍可按当时的缓存状态重新构造。
+                 未命中时去掉请求方自带的条件头，确保服务端返回完整响应，而不是本地无法重建的 304。
+        @param request 原请求
+        @return (实际发送的请求, 命中的缓存记录或 None)
+        """
+        if request.method != 'GET':
+            return request, None
+
+        entry: CacheEntry | None = await self._run(self._lookup, str(request.url))
+        if entry is None:
+            _CACHE_REQUESTS.labels(request.url.host, 'miss').inc()
+            if not any(name in request.headers for name in _CONDITIONAL_HEADERS):
+                return request, None
+            headers = request.headers.copy()
+            for name in _CONDITIONAL_HEADERS:
+                headers.pop(name, None)
+            return Request(request.method, request.url, headers=headers, extensions=request.extensions), None
+
+        headers = request.headers.copy()
+        if entry.etag is not None:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified is not None:
+            headers['If-Modified-Since'] = entry.last_modified
+        conditional = Request(request.method, request.url, headers=headers, extensions=request.extensions)
+        return conditional, entry
+
+    async def resolve(self, request: Request, response: Response, entry: CacheEntry | None) -> Response:
+        """
+        @brief 处理响应：304 命中时用缓存重建 200 响应，带校验器的 200 响应写入缓存
+        @param request 原请求（重建响应时关联到原请求）
+        @param response 服务端响应
+        @param entry prepare() 返回的缓存记录
+        @return 交给下游的响应
+        """
+        host: str = request.url.host
+        if response.status_code == 304 and entry is not None:
+            _CACHE_REQUESTS.labels(host, 'not_modified').inc()
+            await self._run(self._touch, str(request.url))
+            return self._rebuild(request, response, entry)
+
+        if response.status_code == 304:
+            # prepare() 已去掉未命中时的条件头，仅服务端违规时到此，无法重建，原样交给下游
+            return response
+
+        etag: str | None = response.headers.get('ETag')
+        last_modified: str | None = response.headers.get('Last-Modified')
+        if request.method == 'GET' and response.status_code == 200 and (etag or last_modified):
+            if entry is not None:
+                _CACHE_REQUESTS.labels(host, 'modified').inc()
+            headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROPPED_HEADERS]
+            await self._run(self._store, str(request.url), CacheEntry(200, headers, response.content, etag, last_modified))
+        return response
+
+    def _rebuild(self, request: Request, not_modified: Response, entry: CacheEntry) -> Response:
+        """
+        @brief 用缓存记录重建响应，304 携带的头部（如新的 Date、Cache-Control）覆盖缓存中的同名头部
+        @details 头部保持为键值对列表，Set-Cookie、Link 等可重复的头部不会合并或丢失。
+        @param request 原请求
+        @param not_modified 304 响应
+        @param entry 缓存记录
+        @return 重建的响应
+        """
+        updated: list[tuple[str, str]] = [
+            (k, v) for k, v in not_modified.headers.multi_items() if k.lower() not in _DROPPED_HEADERS
+        ]
+        replaced: set[str] = {k.lower() for k, _ in updated}
+        headers: list[tuple[str, str]] = [(k, v) for k, v in entry.headers if k.lower() not in replaced] + updated
+        mark: str = UNCHANGED if self._config.short_circuit else REVALIDATED
+        return Response(entry.status, headers=headers, content=entry.body, request=request, extensions={EXTENSION_KEY: mark})
+
+    async def _run[R](self, fn: Callable[..., R], *args: Any) -> R:
+        """
+        @brief 在缓存专用线程中执行同步数据库操作
+        @param fn 同步函数
+        @param args 位置参数
+        @return 函数返回值
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _lookup(self, url: str) -> CacheEntry | None:
+        """
+        @brief 查询缓存记录
+        @param url 请求 URL
+        @return 缓存记录；不存在时返回 None
+        """
+        row = self._db.execute(
+            'SELECT status, headers, body, etag, last_modified FROM entries WHERE url = ?', (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, etag, last_modified = row
+        return CacheEntry(status, [tuple(pair) for pair in json.loads(headers)], body, etag, last_modified)
+
+    def _touch(self, url: str) -> None:
+        """
+        @brief 刷新访问时刻
+        @param url 请求 URL
+        """
+        self._db.execute('UPDATE entries SET accessed = ? WHERE url = ?', (time.time(), url))
+
+    def _store(self, url: str, entry: CacheEntry) -> None:
+        """
+        @brief 写入或覆盖缓存记录，之后按 LRU 淘汰至大小上限以内
+        @details 单条超过上限的响应不缓存。
+        @param url 请求 URL
+        @param entry 缓存记录
+        """
+        size = len(entry.body)
+        if size > self._config.max_bytes:
+            return
+
+        old = self._db.execute('SELECT size FROM entries WHERE url = ?', (url,)).fetchone()
+        self._db.execute(
+            'INSERT OR REPLACE INTO entries (url, status, headers, body, etag, last_modified, size, accessed) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (url, entry.status, json.dumps(entry.headers), entry.body, entry.etag, entry.last_modified, size, time.time()),
+        )
+        if old is None:
+            self._entries += 1
+            self._bytes += size
+        else:
+            self._bytes += size - old[0]
+        self._evict()
+        self._publish()
+
+    def _evict(self) -> None:
+        """
+        @brief 删除最久未访问的条目，直到总大小不超过上限
+        """
+        while self._bytes > self._config.max_bytes:
+            victims = self._db.execute('SELECT url, size FROM entries ORDER BY accessed LIMIT 64').fetchall()
+            if not victims:
+                break
+            for url, size in victims:
+                self._db.execute('DELETE FROM entries WHERE url = ?', (url,))
+                self._entries -= 1
+                self._bytes -= size
+                if self._bytes <= self._config.max_bytes:
+                    break
+
+    def _publish(self) -> None:
+        """
+        @brief 同步缓存规模指标
+        """
+        _CACHE_BYTES.set(self._bytes)
+        _CACHE_ENTRIES.set(self._entries)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,373 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 录制 / 回放 HTTP 传输层
+@details CassetteTransport 包裹真实传输层：录制时把请求与原始响应（未解码的线上字节与完整响应头）写入磁带，
+         回放时按请求键从磁带取出响应，不访问网络，可注入固定延迟模拟网络往返。
+         磁带是一个目录，包含三个文件：
+         - bodies.bin：响应体依次追加；
+         - records.jsonl：每行一条交互的元数据（请求键、方法、URL、状态码、响应头、响应体偏移与长度）；
+         - index.bin：按 (请求键, 记录偏移) 排序的定长索引，回放时内存映射后二分查找，无需加载全部记录。
+         请求键为方法、URL 各组成部分（查询参数排序，不含片段）与请求体摘要的 64 位 BLAKE2b。同一请求键录制了多次时按录制顺序依次回放，
+         超出次数后重复最后一次。响应体文件同样以内存映射读取，按分块产出。
+         模式：replay 只回放，缺失的请求抛出 CassetteMissError（httpx.TransportError 子类，按网络异常重试后丢弃）；
+         record 总是访问网络并追加录制；new_episodes 已录制的请求回放，其余访问网络并追加录制。
+         索引在 close() 时按 records.jsonl 重建；打开时发现索引与记录不一致也会重建。
+"""
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from enum import Enum
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+from httpx import AsyncBaseTransport, AsyncByteStream, Request, Response, TransportError
+
+logger = getLogger(__name__)
+
+# 索引文件：头部为魔数、版本、条目数与 records.jsonl 的字节数；条目为 (请求键, 记录偏移)
+_MAGIC: bytes = b'CIDX'
+_VERSION: int = 1
+_HEADER = struct.Struct('<4sIQQ')
+_ENTRY = struct.Struct('<QQ')
+
+# 回放时响应体的分块大小
+_CHUNK_BYTES: int = 64 << 10
+
+
+class CassetteMode(Enum):
+    """
+    @brief 磁带模式
+    """
+    REPLAY = 'replay'              # 只回放，缺失时报错
+    RECORD = 'record'              # 总是访问网络并录制
+    NEW_EPISODES = 'new_episodes'  # 已录制的回放，缺失的访问网络并录制
+
+
+@dataclass(frozen=True)
+class CassetteConfig(object):
+    """
+    @brief 磁带配置
+    @param path 磁带目录
+    @param mode 磁带模式
+    @param latency 每次回放前等待的秒数，模拟网络往返
+    """
+    path: str                                      # 磁带目录
+    mode: CassetteMode = CassetteMode.NEW_EPISODES  # 磁带模式
+    latency: float = 0.0                           # 回放延迟（秒）
+
+
+class CassetteMissError(TransportError):
+    """
+    @brief 回放模式下磁带中没有该请求
+    """
+
+
+def request_key(request: Request, body: bytes) -> int:
+    """
+    @brief 计算请求键
+    @param request httpx 请求
+    @param body 请求体
+    @return 64 位请求键
+    """
+    url = request.url
+    path, _, _ = url.raw_path.partition(b'?')
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (
+        request.method.encode(),
+        url.raw_scheme,
+        url.raw_host,
+        str(url.port or '').encode(),
+        path,
+        b'&'.join(sorted(url.query.split(b'&'))),
+        hashlib.blake2b(body, digest_size=16).digest(),
+    ):
+        digest.update(part)
+        digest.update(b'\0')
+    return int.from_bytes(digest.digest(), 'little')
+
+
+class _MappedStream(AsyncByteStream):
+    """
+    @brief 以分块产出内存映射中的一段响应体
+    """
+
+    def __init__(self, view: memoryview) -> None:
+        """
+        @brief 包装响应体视图
+        @param view 响应体所在的内存映射切片
+        """
+        self._view: memoryview = view
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """
+        @brief 按分块产出响应体
+        """
+        for offset in range(0, len(self._view), _CHUNK_BYTES):
+            yield bytes(self._view[offset:offset + _CHUNK_BYTES])
+
+    async def aclose(self) -> None:
+        """
+        @brief 释放视图
+        """
+        self._view.release()
+
+
+class Cassette(object):
+    """
+    @brief 磁带存储
+    @details open() 打开目录并映射索引与响应体文件，find() 按请求键取第 n 次录制，append() 追加一条录制。
+             回放只读取 open() 时已建立索引的录制。
+    """
+
+    def __init__(self, config: CassetteConfig) -> None:
+        """
+        @brief 初始化磁带，不打开文件
+        @param config 磁带配置
+        """
+        self.config: CassetteConfig = config
+        self._dir: Path = Path(config.path)
+        self._records = None
+        self._bodies = None
+        self._records_map: mmap.mmap | None = None
+        self._bodies_map: mmap.mmap | None = None
+        self._index_map: mmap.mmap | None = None
+        self._count: int = 0
+        self._dirty: bool = False
+
+    def open(self) -> None:
+        """
+        @brief 打开（必要时创建）磁带目录，索引缺失或过期时重建
+        """
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._records = open(self._dir / 'records.jsonl', 'ab')
+        self._bodies = open(self._dir / 'bodies.bin', 'ab')
+        if not self._index_fresh():
+            self._build_index()
+        self._map()
+        logger.info(f"磁带已打开 [{self._dir}]，{self._count} 条录制")
+
+    def close(self) -> None:
+        """
+        @brief 关闭文件；有新录制时重建索引
+        """
+        self._unmap()
+        for file in (self._records, self._bodies):
+            if file is not None:
+                file.close()
+        self._records = self._bodies = None
+        if self._dirty:
+            self._build_index()
+            self._dirty = False
+
+    def find(self, key: int, occurrence: int) -> tuple[dict[str, Any], memoryview] | None:
+        """
+        @brief 取请求键的第 occurrence 次录制，超出录制次数时取最后一次
+        @param key 请求键
+        @param occurrence 从 0 开始的回放序号
+        @return (记录元数据, 响应体视图)；未录制时返回 None
+        """
+        if not self._count:
+            return None
+        first = self._bisect(key)
+        if first == self._count or self._entry(first)[0] != key:
+            return None
+        last = first
+        while last + 1 < self._count and last - first < occurrence and self._entry(last + 1)[0] == key:
+            last += 1
+        _, line_offset = self._entry(last)
+        line_end = self._records_map.find(b'\n', line_offset)
+        record: dict[str, Any] = json.loads(self._records_map[line_offset:line_end])
+        if not record['length']:
+            return record, memoryview(b'')
+        whole = memoryview(self._bodies_map)
+        body = whole[record['offset']:record['offset'] + record['length']]
+        whole.release()
+        return record, body
+
+    def append(self, key: int, request: Request, response: Response, body: bytes) -> None:
+        """
+        @brief 追加一条录制；新录制在下次 open() 后才可回放
+        @param key 请求键
+        @param request 请求
+        @param response 响应（取状态码、响应头与协议版本）
+        @param body 原始响应体（未解码的线上字节）
+        """
+        offset: int = self._bodies.tell()
+        self._bodies.write(body)
+        record = {
+            'key': f'{key:016x}',
+            'method': request.method,
+            'url': str(request.url),
+            'status': response.status_code,
+            'headers': [[k.decode('latin-1'), v.decode('latin-1')] for k, v in response.headers.raw],
+            'http_version': response.extensions.get('http_version', b'HTTP/1.1').decode('ascii'),
+            'offset': offset,
+            'length': len(body),
+        }
+        self._records.write(json.dumps(record, ensure_ascii=False).encode() + b'\n')
+        self._dirty = True
+
+    def flush(self) -> None:
+        """
+        @brief 将已追加的录制写入磁盘
+        """
+        self._bodies.flush()
+        self._records.flush()
+
+    def _index_fresh(self) -> bool:
+        """
+        @brief 检查索引是否与 records.jsonl 一致
+        @return 索引存在且记录的字节数一致时返回 True
+        """
+        try:
+            with open(self._dir / 'index.bin', 'rb') as file:
+                magic, version, _, records_size = _HEADER.unpack(file.read(_HEADER.size))
+        except (FileNotFoundError, struct.error):
+            return False
+        return magic == _MAGIC and version == _VERSION and records_size == (self._dir / 'records.jsonl').stat().st_size
+
+    def _build_index(self) -> None:
+        """
+        @brief 扫描 records.jsonl，按 (请求键, 记录偏移) 排序写出索引
+        """
+        entries: list[tuple[int, int]] = []
+        offset: int = 0
+        with open(self._dir / 'records.jsonl', 'rb') as file:
+            for line in file:
+                entries.append((int(json.loads(line)['key'], 16), offset))
+                offset += len(line)
+        entries.sort()
+        tmp = self._dir / 'index.bin.tmp'
+        with open(tmp, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, len(entries), offset))
+            for entry in entries:
+                file.write(_ENTRY.pack(*entry))
+        os.replace(tmp, self._dir / 'index.bin')
+        logger.info(f"磁带索引已重建 [{self._dir}]，{len(entries)} 条")
+
+    def _map(self) -> None:
+        """
+        @brief 内存映射索引、记录与响应体文件
+        """
+        def mapped(name: str) -> mmap.mmap | None:
+            with open(self._dir / name, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+        self._index_map = mapped('index.bin')
+        self._records_map = mapped('records.jsonl')
+        self._bodies_map = mapped('bodies.bin')
+        self._count = _HEADER.unpack_from(self._index_map)[2]
+
+    def _unmap(self) -> None:
+        """
+        @brief 解除内存映射；仍被回放响应引用的映射由垃圾回收释放
+        """
+        for name in ('_index_map', '_records_map', '_bodies_map'):
+            mapped: mmap.mmap | None = getattr(self, name)
+            if mapped is not None:
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass
+            setattr(self, name, None)
+        self._count = 0
+
+    def _entry(self, i: int) -> tuple[int, int]:
+        """
+        @brief 读取第 i 个索引条目
+        @param i 条目序号
+        @return (请求键, 记录偏移)
+        """
+        return _ENTRY.unpack_from(self._index_map, _HEADER.size + i * _ENTRY.size)
+
+    def _bisect(self, key: int) -> int:
+        """
+        @brief 二分查找请求键的第一个条目
+        @param key 请求键
+        @return 第一个不小于 key 的条目序号
+        """
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class CassetteTransport(AsyncBaseTransport):
+    """
+    @brief 录制 / 回放 httpx 传输层
+    @details 包裹真实传输层，按磁带模式决定回放或访问网络；录制的是传输层看到的原始响应，
+             回放的响应与真实响应一样由 httpx 客户端解码。
+    """
+
+    def __init__(self, cassette: Cassette, inner: AsyncBaseTransport) -> None:
+        """
+        @brief 初始化传输层
+        @param cassette 已 open() 的磁带，多个主机的传输层可共享
+        @param inner 真实传输层
+        """
+        self._cassette: Cassette = cassette
+        self._config: CassetteConfig = cassette.config
+        self._inner: AsyncBaseTransport = inner
+        self._replayed: dict[int, int] = {}
+
+    async def handle_async_request(self, request: Request) -> Response:
+        """
+        @brief 回放或访问网络并录制
+        @param request httpx 请求
+        @return 回放或真实的响应
+        @throws CassetteMissError 回放模式下磁带中没有该请求
+        """
+        key: int = request_key(request, await request.aread())
+        if self._config.mode is not CassetteMode.RECORD:
+            occurrence: int = self._replayed.get(key, 0)
+            found = self._cassette.find(key, occurrence)
+            if found is not None:
+                self._replayed[key] = occurrence + 1
+                if self._config.latency:
+                    await asyncio.sleep(self._config.latency)
+                record, body = found
+                return Response(
+                    record['status'],
+                    headers=record['headers'],
+                    stream=_MappedStream(body),
+                    extensions={'http_version': record['http_version'].encode('ascii')},
+                )
+            if self._config.mode is CassetteMode.REPLAY:
+                raise CassetteMissError(f'磁带中没有该请求：{request.method} {request.url}', request=request)
+
+        response = await self._inner.handle_async_request(request)
+        try:
+            body: bytes = b''.join([chunk async for chunk in response.stream])
+        finally:
+            await response.stream.aclose()
+        self._cassette.append(key, request, response, body)
+        return Response(
+            response.status_code,
+            headers=response.headers.raw,
+            content=body,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        """
+        @brief 关闭真实传输层并刷写磁带
+        """
+        self._cassette.flush()
+        await self._inner.aclose()
+
+
+if __name__ == '__main__':
+    pass
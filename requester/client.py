@@ -0,0 +1,319 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief HTTP 客户端注册表
+@details HttpClientRegistry 由 requester 包持有，按主机名维护长生命周期的 httpx.AsyncClient，
+         同一主机的所有请求共享一个连接池，避免每次请求重新进行 TCP + TLS 握手。
+         各主机的连接上限与 keep-alive 参数由 HostClientConfig 描述，
+         未单独配置的主机使用默认配置并在首次请求时懒加载创建客户端。
+         连接池复用情况通过 httpcore 的 trace 扩展统计，由 PoolStats 对外暴露。
+         主机可单独启用 HTTP/2：同一主机的并发请求在一条连接上多路复用，只需一次 TLS 握手；
+         http1 = false 时以 prior knowledge 方式直接使用 HTTP/2（h2c，适用于本地明文服务）。
+         HTTP/2 依赖可选的 h2 包，未安装时记录警告并回退到 HTTP/1.1。
+         传入磁带时各主机的传输层外包一层 CassetteTransport，按磁带模式录制或回放。
+         主机可配置 connect_to，把连接改为以明文 HTTP 发往指定地址（如本地替身服务器），
+         请求 URL 与 Host 头保持不变，响应仍按原主机名路由。
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, replace
+from importlib.util import find_spec
+from logging import getLogger
+from typing import Any
+
+from httpx import AsyncByteStream, AsyncClient, AsyncHTTPTransport, Limits, Request, Response, Timeout
+
+from metrics import metrics
+from requester.cassette import Cassette, CassetteTransport
+
+logger = getLogger(__name__)
+
+_POOL_REQUESTS = metrics.gauge('http_pool_requests', '经连接池发出的请求数', ('host',))
+_POOL_CONNECTIONS = metrics.gauge('http_pool_connections', '连接池新建的 TCP 连接数', ('host',))
+_POOL_REUSE_RATIO = metrics.gauge('http_pool_reuse_ratio', '连接复用率', ('host',))
+_POOL_HANDSHAKES_AVOIDED = metrics.gauge('http_pool_handshakes_avoided', '因连接复用省去的握手次数', ('host',))
+_POOL_PROTOCOL_CONNECTIONS = metrics.gauge('http_pool_protocol_connections', '按协议统计的新建连接数', ('host', 'protocol'))
+_POOL_PROTOCOL_REQUESTS = metrics.gauge('http_pool_protocol_requests', '按协议统计的请求数', ('host', 'protocol'))
+
+
+@dataclass(frozen=True)
+class HostClientConfig(object):
+    """
+    @brief 单个主机的连接池配置
+    @details frozen=True 防止配置在运行时被意外修改。
+    @param max_connections 连接池最大连接数
+    @param max_keepalive_connections 最大空闲保活连接数
+    @param keepalive_expiry 空闲连接保活时长（秒）
+    @param http1 是否允许 HTTP/1.1；与 http2 同时为真时经 ALPN 协商，为假时以 prior knowledge 使用 HTTP/2
+    @param http2 是否启用 HTTP/2
+    @param max_concurrent_streams 启用 HTTP/2 时该主机同时在途的请求上限（另受服务端 SETTINGS 与 httpcore 的 100 约束）
+    @param connect_to 实际连接的 host:port，以明文 HTTP 发送；None 表示按 URL 连接
+    @param connect_timeout 建立连接的超时（秒）
+    @param read_timeout 两次读取响应数据之间的超时（秒）
+    @param write_timeout 两次写出请求数据之间的超时（秒）
+    @param pool_timeout 等待连接池空闲连接的超时（秒）
+    """
+    max_connections: int                # 连接池最大连接数
+    max_keepalive_connections: int      # 最大空闲保活连接数
+    keepalive_expiry: float             # 空闲连接保活时长（秒）
+    http1: bool = True                  # 是否允许 HTTP/1.1
+    http2: bool = False                 # 是否启用 HTTP/2
+    max_concurrent_streams: int = 100   # HTTP/2 在途请求上限
+    connect_to: str | None = None       # 实际连接地址
+    connect_timeout: float = 5.0        # 建立连接超时（秒）
+    read_timeout: float = 5.0           # 读取超时（秒）
+    write_timeout: float = 5.0          # 写出超时（秒）
+    pool_timeout: float = 5.0           # 等待连接池超时（秒）
+
+
+@dataclass
+class PoolStats(object):
+    """
+    @brief 单个主机连接池的复用统计
+    @details 非 frozen，计数在请求过程中由 trace 回调累加。
+             每条请求计入 requests，新建 TCP 连接计入 connections，完成 TLS 握手计入 tls_handshakes；
+             HTTP/2 连接在发送连接前言时计入 h2_connections，请求按实际使用的协议计入 h1_requests / h2_requests。
+    """
+    requests: int = 0        # 经连接池发出的请求数
+    connections: int = 0     # 新建的 TCP 连接数
+    tls_handshakes: int = 0  # 完成的 TLS 握手数
+    h2_connections: int = 0  # 其中的 HTTP/2 连接数
+    h1_requests: int = 0     # 经 HTTP/1.1 发出的请求数
+    h2_requests: int = 0     # 经 HTTP/2 发出的请求数
+
+    @property
+    def reuse_ratio(self) -> float:
+        """
+        @brief 连接复用率
+        @return 复用已有连接的请求占比，无请求时为 0.0
+        """
+        if not self.requests:
+            return 0.0
+        return max(self.requests - self.connections, 0) / self.requests
+
+    @property
+    def handshakes_avoided(self) -> int:
+        """
+        @brief 因连接复用而省去的握手次数
+        @return 请求数与新建连接数之差
+        """
+        return max(self.requests - self.connections, 0)
+
+
+class _ReleasingStream(AsyncByteStream):
+    """
+    @brief 响应体关闭时回调一次的字节流包装
+    @details HTTP/2 在途上限的许可需持有到响应体读完（流式下载在传输层返回后才读取响应体）。
+    """
+
+    def __init__(self, stream: AsyncByteStream, release: Callable[[], None]) -> None:
+        """
+        @brief 包装响应字节流
+        @param stream 传输层返回的响应字节流
+        @param release 关闭时调用的回调
+        """
+        self._stream: AsyncByteStream = stream
+        self._release: Callable[[], None] | None = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """
+        @brief 透传响应字节
+        """
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        """
+        @brief 关闭底层字节流并回调（只回调一次）
+        """
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _TracingTransport(AsyncHTTPTransport):
+    """
+    @brief 带连接统计的 httpx 传输层
+    @details 在每条请求的 extensions 中注入 trace 回调，根据 httpcore 上报的
+             connect_tcp / start_tls / HTTP/2 连接前言与各协议发送请求头事件累加 PoolStats，不改变请求行为。
+             配置 max_streams 时以信号量限制同时在途的请求数，许可在响应体关闭时归还。
+             配置 connect_to 时以改写了目标地址的请求副本发送，客户端返回的响应仍关联原请求。
+    """
+
+    def __init__(self, stats: PoolStats, max_streams: int | None = None, connect_to: str | None = None, **kwargs: Any) -> None:
+        """
+        @brief 初始化传输层
+        @param stats 当前主机的统计对象
+        @param max_streams 同时在途的请求上限，None 表示不限
+        @param connect_to 实际连接的 host:port，None 表示按 URL 连接
+        @param kwargs 透传给 AsyncHTTPTransport 的参数
+        """
+        super().__init__(**kwargs)
+        self._stats: PoolStats = stats
+        self._streams: asyncio.Semaphore | None = asyncio.Semaphore(max_streams) if max_streams is not None else None
+        self._connect_to: tuple[str, int] | None = None
+        if connect_to is not None:
+            host, _, port = connect_to.rpartition(':')
+            self._connect_to = (host, int(port))
+
+    async def handle_async_request(self, request: Request) -> Response:
+        """
+        @brief 注入 trace 回调后发送请求
+        @param request 待发送的 httpx.Request
+        @return httpx 响应对象
+        """
+        self._stats.requests += 1
+        request.extensions = {**request.extensions, 'trace': self._trace}
+        if self._connect_to is not None:
+            host, port = self._connect_to
+            request = Request(
+                request.method,
+                request.url.copy_with(scheme='http', host=host, port=port),
+                headers=request.headers,
+                stream=request.stream,
+                extensions=request.extensions,
+            )
+        if self._streams is None:
+            return await super().handle_async_request(request)
+
+        await self._streams.acquire()
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self._streams.release()
+            raise
+        response.stream = _ReleasingStream(response.stream, self._streams.release)
+        return response
+
+    async def _trace(self, event_name: str, info: dict[str, Any]) -> None:
+        """
+        @brief httpcore trace 回调，统计新建连接与 TLS 握手
+        @param event_name httpcore 事件名，如 connection.connect_tcp.complete
+        @param info 事件附带信息（未使用）
+        """
+        match event_name:
+            case 'connection.connect_tcp.complete':
+                self._stats.connections += 1
+            case 'connection.start_tls.complete':
+                self._stats.tls_handshakes += 1
+            case 'http2.send_connection_init.complete':
+                self._stats.h2_connections += 1
+            case 'http11.send_request_headers.complete':
+                self._stats.h1_requests += 1
+            case 'http2.send_request_headers.complete':
+                self._stats.h2_requests += 1
+
+
+class HttpClientRegistry(object):
+    """
+    @brief 按主机名维护共享 AsyncClient 的注册表
+    @details 构造时为已配置的主机预先创建客户端，其余主机在首次 get() 时按默认配置创建。
+             所有客户端在 aclose() 时统一关闭，由 requester 包在进程退出前调用。
+    """
+
+    def __init__(self, default: HostClientConfig, hosts: dict[str, HostClientConfig], cassette: Cassette | None = None) -> None:
+        """
+        @brief 初始化注册表并创建已配置主机的客户端
+        @param default 未单独配置主机时使用的默认连接池配置
+        @param hosts 主机名 → 连接池配置 的映射
+        @param cassette 已打开的录制 / 回放磁带；为 None 时直接访问网络
+        """
+        self._default: HostClientConfig = default
+        self._hosts: dict[str, HostClientConfig] = hosts
+        self._cassette: Cassette | None = cassette
+        self._clients: dict[str, AsyncClient] = {}
+        self._stats: dict[str, PoolStats] = {}
+
+        for host in hosts:
+            self._create(host)
+
+    def get(self, host: str) -> AsyncClient:
+        """
+        @brief 获取指定主机的共享客户端，不存在时按配置创建
+        @param host 请求 URL 的主机名
+        @return 该主机专属的 AsyncClient
+        """
+        client: AsyncClient | None = self._clients.get(host)
+        if client is None:
+            client = self._create(host)
+        return client
+
+    def stats(self) -> dict[str, PoolStats]:
+        """
+        @brief 返回各主机连接池的复用统计
+        @return 主机名 → PoolStats 的映射（浅拷贝）
+        """
+        return dict(self._stats)
+
+    def collect_metrics(self) -> None:
+        """
+        @brief 将各主机的 PoolStats 同步到指标仪表，供导出前回调使用
+        """
+        for host, stats in self._stats.items():
+            _POOL_REQUESTS.labels(host).set(stats.requests)
+            _POOL_CONNECTIONS.labels(host).set(stats.connections)
+            _POOL_REUSE_RATIO.labels(host).set(stats.reuse_ratio)
+            _POOL_HANDSHAKES_AVOIDED.labels(host).set(stats.handshakes_avoided)
+            _POOL_PROTOCOL_CONNECTIONS.labels(host, 'h1').set(stats.connections - stats.h2_connections)
+            _POOL_PROTOCOL_CONNECTIONS.labels(host, 'h2').set(stats.h2_connections)
+            _POOL_PROTOCOL_REQUESTS.labels(host, 'h1').set(stats.h1_requests)
+            _POOL_PROTOCOL_REQUESTS.labels(host, 'h2').set(stats.h2_requests)
+
+    async def aclose(self) -> None:
+        """
+        @brief 关闭全部客户端并输出复用统计
+        """
+        for host, client in self._clients.items():
+            await client.aclose()
+            stats = self._stats[host]
+            logger.info(
+                f"关闭主机 [{host}] 连接池，请求 {stats.requests} 条，新建连接 {stats.connections} 个，"
+                f"复用率 {stats.reuse_ratio:.2%}，省去握手 {stats.handshakes_avoided} 次，"
+                f"HTTP/2 连接 {stats.h2_connections} 个、请求 {stats.h2_requests} 条"
+            )
+        self._clients.clear()
+
+    def _create(self, host: str) -> AsyncClient:
+        """
+        @brief 按主机配置创建 AsyncClient 并登记
+        @param host 主机名
+        @return 新建的 AsyncClient
+        """
+        host_config: HostClientConfig = self._hosts.get(host, self._default)
+        if host_config.http2 and find_spec('h2') is None:
+            logger.warning(f"主机 [{host}] 配置了 HTTP/2 但未安装 h2，回退到 HTTP/1.1")
+            host_config = replace(host_config, http1=True, http2=False)
+        stats = self._stats.setdefault(host, PoolStats())
+        limits = Limits(
+            max_connections=host_config.max_connections,
+            max_keepalive_connections=host_config.max_keepalive_connections,
+            keepalive_expiry=host_config.keepalive_expiry,
+        )
+
+        transport = _TracingTransport(
+            stats,
+            host_config.max_concurrent_streams if host_config.http2 else None,
+            host_config.connect_to,
+            limits=limits,
+            http1=host_config.http1 or not host_config.http2,
+            http2=host_config.http2,
+        )
+        if self._cassette is not None:
+            transport = CassetteTransport(self._cassette, transport)
+        timeout = Timeout(
+            connect=host_config.connect_timeout,
+            read=host_config.read_timeout,
+            write=host_config.write_timeout,
+            pool=host_config.pool_timeout,
+        )
+        client = AsyncClient(transport=transport, timeout=timeout)
+        self._clients[host] = client
+        return client
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,311 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 请求去重
+@details 以请求指纹（方法 + 规范化 URL）识别相同请求，只对 GET / HEAD 生效，分两层：
+         - 在途合并：同一指纹已有请求在途时，后来者不再发出请求，等待首个请求的结果；
+           首个请求失败时后来者收到同一个异常，被取消时后来者改为自行发送；
+         - 已见集合（可选）：成功取得的 URL 记入内存映射文件中的定长哈希表，
+           TTL 内再次出现时请求器直接跳过，进程重启后依然有效。
+           已见集合的键在请求指纹之外混入任务的 meta：同一 URL 服务于不同下游记录（如多个条目共用一张封面图）时各自记录，
+           不会因其中一个已取得而跳过其余记录的请求。
+         已见集合为有损结构：每个指纹只在固定长度的探测窗口内存放，窗口占满时覆盖最久的记录，
+         因此只会漏判（重新抓取），不会把未抓取的 URL 误判为已见（除 64 位指纹碰撞外）。
+         两层各自按主机统计命中与未命中次数。
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import struct
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+from httpx import Request
+
+from metrics import metrics
+
+logger = getLogger(__name__)
+
+_DEDUP_LOOKUPS = metrics.counter('http_dedup_total', '请求去重查询结果计数', ('host', 'kind', 'result'))
+
+# 参与去重的请求方法（幂等且无请求体）
+_DEDUP_METHODS: frozenset[str] = frozenset({'GET', 'HEAD'})
+
+# 已见集合文件格式：头部为魔数、版本与槽位数，之后每个槽位为 (指纹, 记录时刻)
+_MAGIC: bytes = b'SEEN'
+_VERSION: int = 1
+_HEADER = struct.Struct('<4sIQ')
+_SLOT = struct.Struct('<QI')
+
+# 每个指纹的探测窗口长度
+_PROBE: int = 8
+
+
+@dataclass(frozen=True)
+class DedupConfig(object):
+    """
+    @brief 请求去重配置
+    @param coalesce 是否合并在途的相同请求
+    @param seen_path 已见集合文件路径，None 表示不启用
+    @param seen_ttl 已见记录的有效期（秒）
+    @param seen_slots 已见集合的槽位数，文件大小约为 12 字节 × 槽位数
+    """
+    coalesce: bool = True          # 是否合并在途请求
+    seen_path: str | None = None   # 已见集合文件路径
+    seen_ttl: float = 43200.0      # 已见记录有效期（秒）
+    seen_slots: int = 1 << 20      # 已见集合槽位数
+
+
+def fingerprint(request: Request) -> int | None:
+    """
+    @brief 计算请求指纹
+    @details 查询参数排序、去掉片段后与方法一起取 64 位 BLAKE2b 摘要；请求头不参与。
+    @param request httpx 请求
+    @return 非零的 64 位指纹；不参与去重的请求方法返回 None
+    """
+    if request.method not in _DEDUP_METHODS:
+        return None
+    url = request.url
+    query: bytes = urlencode(sorted(url.params.multi_items())).encode()
+    canonical: bytes = url.copy_with(query=query or None, fragment=None).raw_path
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (request.method.encode(), url.raw_scheme, url.raw_host, str(url.port or '').encode(), canonical):
+        digest.update(part)
+        digest.update(b'\0')
+    # 0 表示空槽位
+    return int.from_bytes(digest.digest(), 'little') or 1
+
+
+def _seen_key(request: Request, meta: Mapping[str, Any]) -> int | None:
+    """
+    @brief 计算已见集合的键：请求指纹再混入按键排序的 meta
+    @param request httpx 请求
+    @param meta 发起请求的任务上下文
+    @return 非零的 64 位键；不参与去重的请求方法返回 None；meta 为空时即为请求指纹
+    """
+    fp = fingerprint(request)
+    if fp is None or not meta:
+        return fp
+    digest = hashlib.blake2b(fp.to_bytes(8, 'little'), digest_size=8)
+    digest.update(repr(sorted(meta.items())).encode())
+    return int.from_bytes(digest.digest(), 'little') or 1
+
+
+class SeenSet(object):
+    """
+    @brief 内存映射文件上的定长开放寻址哈希表
+    @details 槽位 = (64 位指纹, 32 位 Unix 秒)，指纹为 0 表示空槽位。查询与写入只触及探测窗口内的槽位，
+             读写由操作系统按页换入换出，文件大小固定，不随记录数增长。
+    """
+
+    def __init__(self, path: str, slots: int, ttl: float) -> None:
+        """
+        @brief 打开（必要时创建）已见集合文件
+        @details 已有文件的槽位数与配置不符时重建，原有记录丢弃。
+        @param path 文件路径
+        @param slots 槽位数
+        @param ttl 记录有效期（秒）
+        """
+        self._slots: int = slots
+        self._ttl: float = ttl
+        size: int = _HEADER.size + _SLOT.size * slots
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            header = os.pread(fd, _HEADER.size, 0)
+            if len(header) < _HEADER.size or _HEADER.unpack(header) != (_MAGIC, _VERSION, slots) or os.fstat(fd).st_size != size:
+                if header:
+                    logger.warning(f"已见集合文件 [{path}] 格式或槽位数不符，已重建")
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _HEADER.pack(_MAGIC, _VERSION, slots), 0)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        logger.info(f"已见集合已打开 [{path}]，{slots} 个槽位，有效期 {ttl:.0f} 秒")
+
+    def contains(self, fp: int, now: float) -> bool:
+        """
+        @brief 查询指纹是否在有效期内出现过
+        @param fp 请求指纹
+        @param now 当前 Unix 时刻
+        @return 有效期内出现过时返回 True
+        """
+        for offset in self._window(fp):
+            slot_fp, seen_at = _SLOT.unpack_from(self._map, offset)
+            if slot_fp == fp:
+                return now - seen_at < self._ttl
+            if slot_fp == 0:
+                return False
+        return False
+
+    def add(self, fp: int, now: float) -> None:
+        """
+        @brief 记录指纹
+        @details 窗口内已有该指纹时刷新时刻；否则依次选用空槽位、已过期槽位、最久的槽位。
+        @param fp 请求指纹
+        @param now 当前 Unix 时刻
+        """
+        victim: int = -1
+        victim_at: float = float('inf')
+        for offset in self._window(fp):
+            slot_fp, seen_at = _SLOT.unpack_from(self._map, offset)
+            if slot_fp == fp or slot_fp == 0:
+                victim = offset
+                break
+            if now - seen_at >= self._ttl:
+                seen_at = 0
+            if seen_at < victim_at:
+                victim, victim_at = offset, seen_at
+        _SLOT.pack_into(self._map, victim, fp, int(now))
+
+    def close(self) -> None:
+        """
+        @brief 刷写并关闭映射
+        """
+        self._map.flush()
+        self._map.close()
+
+    def _window(self, fp: int) -> range:
+        """
+        @brief 指纹对应的探测窗口
+        @param fp 请求指纹
+        @return 窗口内各槽位的字节偏移
+        """
+        first: int = fp % (self._slots - _PROBE + 1)
+        start: int = _HEADER.size + first * _SLOT.size
+        return range(start, start + _PROBE * _SLOT.size, _SLOT.size)
+
+
+class _Abandoned(Exception):
+    """
+    @brief 在途请求的发起者被取消，等待者需自行发送
+    """
+
+
+class Deduplicator(object):
+    """
+    @brief 请求去重器
+    @details 由各 HTTP 请求器共享。coalesce() 包裹实际发送，seen() / mark() 查询与记录已见集合。
+    """
+
+    def __init__(self, config: DedupConfig) -> None:
+        """
+        @brief 初始化去重器，启用已见集合时打开文件
+        @param config 去重配置
+        """
+        self._config: DedupConfig = config
+        self._flights: dict[tuple[int, object], list[asyncio.Future]] = {}
+        self._seen: SeenSet | None = (
+            SeenSet(config.seen_path, config.seen_slots, config.seen_ttl) if config.seen_path else None
+        )
+
+    def seen(self, request: Request, meta: Mapping[str, Any]) -> bool:
+        """
+        @brief 查询请求是否以同一任务上下文在有效期内成功取得过
+        @param request httpx 请求
+        @param meta 发起请求的任务上下文
+        @return 未启用已见集合或请求不参与去重时返回 False
+        """
+        if self._seen is None:
+            return False
+        fp = _seen_key(request, meta)
+        if fp is None:
+            return False
+        hit = self._seen.contains(fp, time.time())
+        _DEDUP_LOOKUPS.labels(request.url.host, 'seen', 'hit' if hit else 'miss').inc()
+        if hit:
+            logger.info(f"有效期内已取得，跳过请求 [{request.url}]")
+        return hit
+
+    def mark(self, request: Request, meta: Mapping[str, Any], status: int) -> None:
+        """
+        @brief 请求成功（2xx / 3xx）或资源不存在（404）时记入已见集合
+        @param request httpx 请求
+        @param meta 发起请求的任务上下文
+        @param status 响应状态码
+        """
+        if self._seen is None or (status >= 400 and status != 404):
+            return
+        fp = _seen_key(request, meta)
+        if fp is not None:
+            self._seen.add(fp, time.time())
+
+    async def coalesce[R](
+        self,
+        request: Request,
+        variant: object,
+        send: Callable[[], Awaitable[R]],
+        share: Callable[[R], R] | None = None,
+        unshare: Callable[[R], None] | None = None,
+    ) -> R:
+        """
+        @brief 合并在途的相同请求
+        @details 同一指纹与变体已有请求在途时等待其结果，否则调用 send() 发送并把结果分发给等待者。
+                 等待者在结果送达后、取走之前被取消时，以 unshare() 释放为其复制的结果（如落盘响应体的硬链接）。
+        @param request httpx 请求
+        @param variant 区分同一请求的不同取用方式（如是否落盘），不同变体不合并
+        @param send 实际发送请求的协程函数
+        @param share 为每个等待者复制结果的函数，None 表示共享同一结果
+        @param unshare 释放未被取走的复制结果的函数，None 表示无需释放
+        @return 本请求或在途请求的结果
+        """
+        fp = fingerprint(request) if self._config.coalesce else None
+        if fp is None:
+            return await send()
+
+        key = (fp, variant)
+        host: str = request.url.host
+        while (followers := self._flights.get(key)) is not None:
+            waiter: asyncio.Future[R] = asyncio.get_running_loop().create_future()
+            followers.append(waiter)
+            _DEDUP_LOOKUPS.labels(host, 'inflight', 'hit').inc()
+            try:
+                return await waiter
+            except _Abandoned:
+                continue
+            except asyncio.CancelledError:
+                if unshare is not None and waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                    unshare(waiter.result())
+                raise
+
+        _DEDUP_LOOKUPS.labels(host, 'inflight', 'miss').inc()
+        followers = self._flights[key] = []
+        try:
+            result = await send()
+        except BaseException as e:
+            error = _Abandoned() if isinstance(e, asyncio.CancelledError) else e
+            for waiter in followers:
+                if not waiter.done():
+                    waiter.set_exception(error)
+            raise
+        finally:
+            del self._flights[key]
+
+        for waiter in followers:
+            if waiter.done():
+                continue
+            try:
+                waiter.set_result(share(result) if share is not None else result)
+            except Exception as e:
+                waiter.set_exception(e)
+        return result
+
+    def close(self) -> None:
+        """
+        @brief 关闭已见集合文件
+        """
+        if self._seen is not None:
+            self._seen.close()
+            self._seen = None
+
+
+if __name__ == '__main__':
+    pass
@@ -1,18 +1,35 @@
 # -*- coding:utf-8 -*-
 # AUTHOR: Sun
 """
-@brief 实现三种 HTTP 请求策略的具体请求器
+@brief 实现各种 HTTP 请求策略的具体请求器
 @details 包含 SingleHttpRequester（单条请求）、BatchHttpRequester（并发批次）、
-         ThrottledHttpRequester（节流顺序）三个 RequesterBase 子类。
+         ThrottledHttpRequester（节流顺序）、StreamHttpRequester（流式下载）四个 RequesterBase 子类。
          每个子类仅处理对应的一种请求数据包类型，通过 _do_request() 完成
-         请求执行、异常捕获及重试递减，httpx.AsyncClient 在每次调用内创建销毁。
+         请求执行、异常捕获及重试递减。所有请求统一经 HttpRequesterMixin._send() 发出，
+         按 URL 主机名从共享的 HttpClientRegistry 取得长生命周期的 AsyncClient，复用连接池，
+         并按主机记录请求耗时、状态码、下载字节数与网络异常指标。
+         启用自适应限速的主机，请求在 HostLimiter 的槽位内发出并把状态码、耗时与 Retry-After 反馈给限速器；
+         此时节流请求器不再按固定间隔顺序发送，而是与批次请求器一样并发提交，由限速器决定实际的速率与并发。
+         启用 HTTP 缓存时，GET 请求附带缓存的校验器发出，304 响应在 _send() 内还原为完整的 200 响应。
+         流式下载经 _download() 发出，200 响应体分块写入临时文件，不经过 HTTP 缓存。
+         启用请求去重时，相同的在途请求只发出一次，其余等待者共享结果（落盘响应体各得一个硬链接）；
+         启用已见集合时，有效期内以同一任务上下文（meta）成功取得的 URL 在发送前即被剔除，不产生下游任务；
+         声明 revisit 的任务（如每日种子请求）不受已见集合影响。
+         批次与节流请求器返回异步迭代器，每条请求完成即产出响应，失败子集在末尾汇总为一个重试任务；
+         迭代被取消（如 Bus 的处理期限到期）时，先产出由未完成与已失败请求组成的重试任务再重新抛出取消。
+         启用熔断器的主机熔断时请求不发出，任务（或批次中被拒绝的子集）原样延迟到半开时刻重投，不消耗重试次数；
+         主机连续熔断次数过多时改为按网络异常重试递减。
 """
 
 import asyncio
+from collections.abc import AsyncIterator, Mapping
+from contextlib import AbstractAsyncContextManager, nullcontext
 from dataclasses import replace
 from logging import getLogger
+from time import perf_counter
+from typing import Any
 
-from httpx import AsyncClient, Request, Response, HTTPError
+from httpx import Request, Response, HTTPError, TimeoutException, TransportError
 
 from data.request import (
     RequestBaseData,
@@ -20,46 +37,331 @@ from data.request import (
     SingleHttpxRequestData,
     BatchHttpxRequestData,
     ThrottledHttpxRequestData,
+    StreamHttpxRequestData,
 )
-from data.response import HttpxResponseData
+from data.response import FileBody, HttpxResponseData
 from requester.base import RequesterBase
+from metrics import metrics
+from requester.breaker import BreakerRegistry, CircuitOpenError, HostBreaker
+from requester.cache import EXTENSION_KEY, UNCHANGED, CacheEntry, HttpCache
+from requester.client import HttpClientRegistry
+from requester.dedup import Deduplicator
+from requester.limiter import HostLimiter, LimiterRegistry
+from spool import CHUNK_BYTES, BodyTooLargeError, discard_body, link_body, write_body
 
 logger = getLogger(__name__)
 
+_REQUEST_LATENCY = metrics.histogram('http_request_duration_seconds', 'HTTP 请求耗时', ('host',))
+_RESPONSES = metrics.counter('http_responses_total', 'HTTP 响应计数', ('host', 'status'))
+_RESPONSE_BYTES = metrics.counter('http_response_bytes_total', '下载的响应字节数（线上字节）', ('host',))
+_REQUEST_ERRORS = metrics.counter('http_request_errors_total', 'HTTP 网络或协议异常计数', ('host', 'error'))
+
+# 响应体落盘后不再适用的头部
+_SPOOLED_HEADERS: frozenset[str] = frozenset({'content-encoding', 'content-length', 'transfer-encoding'})
+
 
 class HttpRequesterMixin(object):
     """
     @brief HTTP 请求器工具 Mixin
-    @details 提供三个请求器共用的无状态工具方法：响应包装、单条重试判断、批量重试追加。
-             所有方法均为 @staticmethod，不携带任何实例状态。
+    @details 持有各请求器共享的 HttpClientRegistry、LimiterRegistry、可选的 HttpCache、落盘目录、Deduplicator 与 BreakerRegistry，
+             并提供共用的工具方法：请求发送、流式下载、并发发送、已见过滤、响应包装与结果归类、单条重试判断、批量重试追加、熔断延迟重投、
+             取消时的剩余请求汇总。
+             除 _send()、_download()、_transfer()、_exchange()、_as_completed()、_adaptive()、_seen()、_unseen() 外
+             均为 @staticmethod，不依赖实例状态。
     """
 
+    def __init__(
+        self,
+        clients: HttpClientRegistry,
+        limiters: LimiterRegistry,
+        cache: HttpCache | None = None,
+        spool_dir: str | None = None,
+        dedup: Deduplicator | None = None,
+        breakers: BreakerRegistry | None = None,
+    ) -> None:
+        """
+        @brief 注入共享客户端注册表、限速器注册表、HTTP 缓存、落盘目录、去重器与熔断器注册表
+        @param clients 由 build_http_requesters() 创建的客户端注册表
+        @param limiters 由 build_http_requesters() 创建的限速器注册表
+        @param cache 由 build_http_requesters() 创建的 HTTP 缓存，None 表示不启用
+        @param spool_dir 流式下载的临时文件目录，None 表示系统临时目录
+        @param dedup 由 build_http_requesters() 创建的去重器，None 表示不去重
+        @param breakers 由 build_http_requesters() 创建的熔断器注册表，None 表示不熔断
+        """
+        self._clients: HttpClientRegistry = clients
+        self._limiters: LimiterRegistry = limiters
+        self._cache: HttpCache | None = cache
+        self._spool_dir: str | None = spool_dir
+        self._dedup: Deduplicator | None = dedup
+        self._breakers: BreakerRegistry | None = breakers
+
+    async def _send(self, request: Request, meta: Mapping[str, Any]) -> Response:
+        """
+        @brief 通过请求主机对应的共享 AsyncClient 发送请求，响应体读入内存
+        @param request 待发送的 httpx.Request
+        @param meta 发起请求的任务上下文，参与已见集合的记录
+        @return httpx 响应对象
+        @throws httpx.HTTPError 网络或协议异常
+        """
+        response, _ = await self._transfer(request, None, meta)
+        return response
+
+    async def _download(self, request: Request, max_bytes: int, meta: Mapping[str, Any]) -> tuple[Response, FileBody | None]:
+        """
+        @brief 流式下载：200 响应体分块写入临时文件，其余状态码的响应体照常读入内存
+        @param request 待发送的 httpx.Request
+        @param max_bytes 响应体大小上限（字节）
+        @param meta 发起请求的任务上下文，参与已见集合的记录
+        @return (不含响应体的 httpx 响应, 落盘的响应体)；非 200 时为 (完整响应, None)
+        @throws httpx.HTTPError 网络或协议异常
+        @throws BodyTooLargeError 响应体超过上限
+        """
+        return await self._transfer(request, max_bytes, meta)
+
+    async def _transfer(self, request: Request, max_bytes: int | None, meta: Mapping[str, Any]) -> tuple[Response, FileBody | None]:
+        """
+        @brief 经去重器发送请求：相同的在途请求合并为一次，完成后以各自的任务上下文记入已见集合
+        @param request 待发送的 httpx.Request
+        @param max_bytes 落盘时的响应体大小上限，None 表示响应体读入内存
+        @param meta 发起请求的任务上下文
+        @return (httpx 响应, 落盘的响应体或 None)
+        @throws httpx.HTTPError 网络或协议异常
+        @throws BodyTooLargeError 响应体超过上限
+        """
+        if self._dedup is None:
+            return await self._exchange(request, max_bytes)
+
+        response, body = await self._dedup.coalesce(
+            request, max_bytes, lambda: self._exchange(request, max_bytes), self._share, self._unshare,
+        )
+        self._dedup.mark(request, meta, response.status_code)
+        return response, body
+
+    @staticmethod
+    def _share(result: tuple[Response, FileBody | None]) -> tuple[Response, FileBody | None]:
+        """
+        @brief 为合并请求的等待者复制结果：响应对象共享，落盘响应体另建硬链接
+        @param result 首个请求的结果
+        @return 等待者使用的结果
+        """
+        response, body = result
+        return response, link_body(body) if body is not None else None
+
+    @staticmethod
+    def _unshare(result: tuple[Response, FileBody | None]) -> None:
+        """
+        @brief 删除等待者未取走的结果副本中的硬链接
+        @param result _share() 为等待者复制的结果
+        """
+        if result[1] is not None:
+            discard_body(result[1])
+
+    async def _exchange(self, request: Request, max_bytes: int | None) -> tuple[Response, FileBody | None]:
+        """
+        @brief 发送请求并记录请求指标，按需将响应体落盘
+        @details 启用 HTTP 缓存且非流式下载时先构造条件请求，304 响应由缓存还原为完整响应；
+                 主机启用熔断器时，先申请放行（熔断中直接抛出 CircuitOpenError），并在结束后反馈成败；
+                 主机启用自适应限速时，先取得限速器槽位，并在完成后反馈结果。
+                 请求耗时指标包含响应体的下载（与非流式的 send() 一致）；反馈给限速器的延迟只计到 send() 返回，
+                 流式下载即响应头到达为止，不含响应体传输，以免大小不一的响应体被限速器当作拥塞。
+        @param request 待发送的 httpx.Request
+        @param max_bytes 落盘时的响应体大小上限，None 表示响应体读入内存
+        @return (httpx 响应, 落盘的响应体或 None)
+        @throws httpx.HTTPError 网络或协议异常（含 CircuitOpenError）
+        @throws BodyTooLargeError 响应体超过上限
+        """
+        host: str = request.url.host
+        original: Request = request
+        entry: CacheEntry | None = None
+        cache: HttpCache | None = self._cache if max_bytes is None else None
+        if cache is not None:
+            request, entry = await cache.prepare(request)
+
+        body: FileBody | None = None
+        breaker: HostBreaker | None = self._breakers.get(host) if self._breakers is not None else None
+        probe: bool = breaker.admit(original) if breaker is not None else False
+        success: bool | None = None
+        limiter: HostLimiter | None = self._limiters.get(host)
+        gate: AbstractAsyncContextManager[None] = limiter.slot() if limiter is not None else nullcontext()
+        try:
+            async with gate:
+                start: float = perf_counter()
+                try:
+                    response = await self._clients.get(host).send(request, stream=max_bytes is not None)
+                    latency: float = perf_counter() - start
+                    success = response.status_code < 500
+                    if max_bytes is not None:
+                        try:
+                            body = await self._spool(response, max_bytes)
+                        finally:
+                            await response.aclose()
+                except HTTPError as e:
+                    _REQUEST_ERRORS.labels(host, type(e).__name__).inc()
+                    if isinstance(e, TransportError):
+                        success = False
+                    if limiter is not None and isinstance(e, TimeoutException):
+                        limiter.record_timeout()
+                    raise
+                finally:
+                    elapsed: float = perf_counter() - start
+                    _REQUEST_LATENCY.labels(host).observe(elapsed)
+
+                if limiter is not None:
+                    limiter.record_response(response.status_code, latency, response.headers.get('Retry-After'))
+        except BaseException:
+            # 落盘后关闭响应时被取消，文件尚未交给任何人
+            if body is not None:
+                discard_body(body)
+            raise
+        finally:
+            if breaker is not None:
+                breaker.settle(probe, success)
+
+        _RESPONSES.labels(host, response.status_code).inc()
+        _RESPONSE_BYTES.labels(host).inc(response.num_bytes_downloaded)
+        if cache is not None:
+            response = await cache.resolve(original, response, entry)
+        if body is not None:
+            # 响应体已落盘，交给下游的响应只保留状态码与头部
+            headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _SPOOLED_HEADERS]
+            response = Response(response.status_code, headers=headers, request=original)
+        return response, body
+
+    async def _spool(self, response: Response, max_bytes: int) -> FileBody | None:
+        """
+        @brief 将流式响应的响应体写入临时文件；非 200 响应读入内存后返回 None
+        @param response 以 stream=True 取得的响应
+        @param max_bytes 响应体大小上限（字节）
+        @return 落盘的响应体；非 200 时为 None
+        @throws BodyTooLargeError 响应体超过上限
+        """
+        if response.status_code != 200:
+            await response.aread()
+            return None
+        declared: str | None = response.headers.get('Content-Length')
+        return await write_body(
+            response.aiter_bytes(CHUNK_BYTES), self._spool_dir, max_bytes,
+            int(declared) if declared is not None and declared.isdigit() else None,
+        )
+
+    async def _as_completed(
+        self, requests: list[Request], max_concurrent: int | None, meta: Mapping[str, Any],
+    ) -> AsyncIterator[tuple[Request, Response | Exception]]:
+        """
+        @brief 并发发送一组请求，按完成顺序逐条产出结果，可选地以 Semaphore 限制本组的最大并发数
+        @details 迭代被提前关闭时取消尚未完成的请求。
+        @param requests 待发送的请求列表
+        @param max_concurrent 本组最大并发数，None 表示仅受限速器约束
+        @param meta 发起请求的任务上下文
+        @return 异步迭代器，产出 (请求, 响应或异常)
+        """
+        semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent is not None else nullcontext()
+
+        async def send(request: Request) -> tuple[Request, Response | Exception]:
+            async with semaphore:
+                try:
+                    return request, await self._send(request, meta)
+                except Exception as e:
+                    return request, e
+
+        pending: list[asyncio.Task[tuple[Request, Response | Exception]]] = [
+            asyncio.create_task(send(request)) for request in requests
+        ]
+        try:
+            for completed in asyncio.as_completed(pending):
+                yield await completed
+        finally:
+            for pending_task in pending:
+                pending_task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _seen(self, task: RequestBaseData, request: Request) -> bool:
+        """
+        @brief 判断任务的请求是否以同一任务上下文在已见集合的有效期内成功取得过
+        @param task 发起请求的任务
+        @param request 请求
+        @return 未启用去重或任务声明 revisit 时返回 False
+        """
+        return self._dedup is not None and not task.revisit and self._dedup.seen(request, task.meta)
+
+    def _unseen[T: MultiHttpxRequestData](self, task: T) -> T:
+        """
+        @brief 剔除批量请求中已见的请求
+        @param task 批量请求任务
+        @return 无剔除时返回原任务，否则返回只含未见请求的副本
+        """
+        requests: list[Request] = [request for request in task.requests if not self._seen(task, request)]
+        return task if len(requests) == len(task.requests) else replace(task, requests=requests)
+
+    def _adaptive(self, requests: list[Request]) -> bool:
+        """
+        @brief 判断一组请求的主机是否都启用了自适应限速
+        @param requests 请求列表
+        @return 全部启用时返回 True
+        """
+        return all(self._limiters.get(request.url.host) is not None for request in requests)
+
     @staticmethod
     def _handle_response(task: RequestBaseData, response: Response) -> HttpxResponseData | None:
         """
         @brief 将 httpx.Response 包装为 HttpxResponseData，并从请求任务复制 meta
         @param task 发起本次请求的任务数据包
         @param response httpx 响应对象
-        @return 成功时返回 HttpxResponseData（meta 从 task.meta 复制）；404 时返回 None（资源不存在，链路终止）
+        @return 成功时返回 HttpxResponseData（meta 从 task.meta 复制）；404 时返回 None（资源不存在，链路终止）；
+                HTTP 缓存确认内容未变且启用了 short_circuit 时返回 None（无需重新解析与落库）
         @throws httpx.HTTPStatusError 当响应状态为非 404 的错误码时由 raise_for_status() 抛出
         """
         if response.status_code == 404:
             return None
+        if response.extensions.get(EXTENSION_KEY) == UNCHANGED:
+            logger.info(f"内容未变，跳过下游处理 [{response.request.url}]")
+            return None
 
         response.raise_for_status()
         return HttpxResponseData(task=task, response=response, meta=task.meta)
 
+    @classmethod
+    def _classify[T: MultiHttpxRequestData](
+        cls, task: T, request: Request, outcome: Response | Exception, failed: list[Request], parked: list[CircuitOpenError],
+    ) -> HttpxResponseData | None:
+        """
+        @brief 归类单条请求的结果：成功响应包装后返回，网络异常与错误状态码的请求追加到 failed，
+               熔断拒绝且可延迟重投的请求追加到 parked
+        @param task 批量请求任务
+        @param request 本条请求
+        @param outcome 本条请求的响应或异常
+        @param failed 失败请求输出列表
+        @param parked 熔断拒绝的异常输出列表
+        @return 包装后的响应；失败、熔断、404 或内容未变时返回 None
+        @throws Exception 非 httpx.HTTPError 的异常原样抛出
+        """
+        try:
+            if isinstance(outcome, Exception):
+                raise outcome
+            return cls._handle_response(task, outcome)
+        except CircuitOpenError as e:
+            if e.park:
+                parked.append(e)
+            else:
+                failed.append(request)
+            return None
+        except HTTPError as e:
+            logger.warning(f'{request.url} 请求失败：{e}')
+            failed.append(request)
+            return None
+
     @staticmethod
     def _retry_single[T: RequestBaseData](task: T, exc: Exception) -> T | None:
         """
         @brief 单条请求的重试判断：retry > 1 时递减返回，否则记录日志后丢弃
+        @details 重试副本的 attempt 递增、not_before 清零，由 Bus 按重试策略计算退避后的到期时刻
         @param task 发生异常的请求任务
         @param exc 捕获到的异常
         @return 递减 retry 后的新任务；retry 耗尽时返回 None
         """
         if task.retry > 1:
             logger.warning(f'{type(task).__name__} 请求失败，剩余重试 {task.retry - 1} 次：{exc}')
-            return replace(task, retry=task.retry - 1)
+            return replace(task, retry=task.retry - 1, attempt=task.attempt + 1, not_before=0.0)
 
         logger.warning(f'{type(task).__name__} 请求失败且重试耗尽，任务已丢弃：{exc}')
         return None
@@ -68,6 +370,7 @@ class HttpRequesterMixin(object):
     def _retry_batch[T: MultiHttpxRequestData](task: T, failed: list[Request]) -> None | T:
         """
         @brief 批量请求的重试追加：有失败时追加重试任务或记录丢弃日志
+        @details 与 _retry_single() 相同，重试批次由 Bus 按重试策略延迟执行
         @param task 原始批量请求任务
         @param failed 本轮失败的请求列表
         @return 无失败或 retry 耗尽时返回 None；有失败且 retry > 1 时返回递减后的新批次任务
@@ -76,11 +379,56 @@ class HttpRequesterMixin(object):
             return None
 
         if task.retry > 1:
-            return replace(task, requests=failed, retry=task.retry - 1)
+            return replace(task, requests=failed, retry=task.retry - 1, attempt=task.attempt + 1, not_before=0.0)
 
         logger.warning(f'{type(task).__name__} {len(failed)} 条请求失败且重试耗尽，已丢弃')
         return None
 
+    @classmethod
+    def _park_single[T: RequestBaseData](cls, task: T, exc: CircuitOpenError) -> T | None:
+        """
+        @brief 熔断拒绝的单条请求：可延迟重投时原样延迟到半开时刻，否则按失败重试递减
+        @param task 被拒绝的请求任务
+        @param exc 熔断器抛出的异常
+        @return 延迟重投或递减后的任务；retry 耗尽时返回 None
+        """
+        if not exc.park:
+            return cls._retry_single(task, exc)
+        logger.info(f'{type(task).__name__} 主机熔断中，延迟到半开时刻重投：{exc}')
+        return replace(task, not_before=exc.retry_at)
+
+    @staticmethod
+    def _park_batch[T: MultiHttpxRequestData](task: T, parked: list[CircuitOpenError]) -> None | T:
+        """
+        @brief 熔断拒绝的批量请求子集：原样（不递减 retry）延迟到最晚的半开时刻重投
+        @param task 原始批量请求任务
+        @param parked 熔断拒绝的异常列表
+        @return 无拒绝时返回 None，否则返回只含被拒绝请求的新批次任务
+        """
+        if not parked:
+            return None
+
+        logger.info(f'{type(task).__name__} {len(parked)} 条请求因主机熔断延迟重投')
+        return replace(task, requests=[e.request for e in parked], not_before=max(e.retry_at for e in parked))
+
+    @classmethod
+    def _salvage[T: MultiHttpxRequestData](
+        cls, task: T, unanswered: list[Request], failed: list[Request], parked: list[CircuitOpenError],
+    ) -> list[T]:
+        """
+        @brief 批量请求被取消时汇总剩余工作：未完成的请求与已失败的请求一并按 _retry_batch() 重试，熔断拒绝的子集照常延迟重投
+        @details 未完成的请求与超时的整任务重试一致，消耗一次重试次数。
+        @param task 原始批量请求任务
+        @param unanswered 取消时尚未得到结果的请求
+        @param failed 已失败的请求
+        @param parked 熔断拒绝的异常列表
+        @return 需要投回总线的任务，可能为空
+        """
+        logger.warning(f'{type(task).__name__} 被取消，{len(unanswered)} 条请求未完成，与 {len(failed)} 条失败请求一并重试')
+        return [
+            retry for retry in (cls._retry_batch(task, failed + unanswered), cls._park_batch(task, parked)) if retry is not None
+        ]
+
 
 class SingleHttpRequester(RequesterBase[SingleHttpxRequestData], HttpRequesterMixin):
     """
@@ -93,16 +441,18 @@ class SingleHttpRequester(RequesterBase[SingleHttpxRequestData], HttpRequesterMi
         """
         @brief 执行单条 HTTP 请求
         @param task 携带单条 httpx.Request 的请求数据包
-        @return HttpxResponseData 请求成功；SingleHttpxRequestData retry 递减重试；None 耗尽重试
+        @return HttpxResponseData 请求成功；SingleHttpxRequestData retry 递减重试或熔断延迟重投；None 耗尽重试或已见
         """
+        if self._seen(task, task.request):
+            return None
         try:
-            async with AsyncClient() as client:
-                response = await client.send(task.request)
-
+            response = await self._send(task.request, task.meta)
             result = self._handle_response(task, response)
             if result is not None:
                 logger.info(f"请求成功 [{task.request.url}]")
             return result
+        except CircuitOpenError as e:
+            return self._park_single(task, e)
         except HTTPError as e:
             logger.warning(f'{task.request.url} 请求失败：{e}')
             return self._retry_single(task, e)
@@ -111,94 +461,156 @@ class SingleHttpRequester(RequesterBase[SingleHttpxRequestData], HttpRequesterMi
 class BatchHttpRequester(RequesterBase[BatchHttpxRequestData], HttpRequesterMixin):
     """
     @brief 并发批次 HTTP 请求器
-    @details 用 asyncio.Semaphore 控制本批次最大并发数，asyncio.gather 并发执行所有请求。
-             失败子集在 retry > 1 时构造新的 BatchHttpxRequestData 投回总线重试。
+    @details 用 asyncio.Semaphore 控制本批次最大并发数，全部请求并发发出，每条完成即产出响应，
+             Bus 随即将其投入下游，不等待整批结束；
+             启用自适应限速的主机还受限速器的并发上限与速率约束，task.max_concurrent 作为本批次的硬上限。
+             失败子集在全部请求结束后汇总，retry > 1 时构造新的 BatchHttpxRequestData 投回总线重试；
+             熔断拒绝的子集另行汇总为不递减 retry、延迟到半开时刻的 BatchHttpxRequestData。
+             迭代被取消时，尚未完成的请求并入失败子集，先产出重试任务再重新抛出取消。
     """
 
-    async def _do_request(self, task: BatchHttpxRequestData) -> list[HttpxResponseData | BatchHttpxRequestData | None]:
+    async def _do_request(self, task: BatchHttpxRequestData) -> AsyncIterator[HttpxResponseData | BatchHttpxRequestData]:
         """
         @brief 并发执行批次中所有 HTTP 请求
         @param task 携带多条 httpx.Request 及并发控制参数的批次请求数据包
-        @return 成功响应列表，retry > 1 时末尾追加重试任务
+        @return 异步迭代器：按完成顺序产出成功响应，retry > 1 时末尾产出重试任务
+        """
+        return self._stream(self._unseen(task))
+
+    async def _stream(self, task: BatchHttpxRequestData) -> AsyncIterator[HttpxResponseData | BatchHttpxRequestData]:
+        """
+        @brief 按完成顺序产出批次结果
+        @param task 已剔除已见请求的批次请求数据包
+        @return 异步迭代器：成功响应，末尾可含重试任务
         """
-        results: list[HttpxResponseData | BatchHttpxRequestData | None] = []
         failed_requests: list[Request] = []
-        semaphore = asyncio.Semaphore(task.max_concurrent)
-
-        async with AsyncClient() as client:
-            raw_results = await asyncio.gather(
-                *[self._send(request, client, semaphore) for request in task.requests],
-                return_exceptions=True,
-            )
-
-        for request, result in zip(task.requests, raw_results):
-            if isinstance(result, HTTPError):
-                logger.warning(f'{request.url} 请求失败：{result}')
-                failed_requests.append(request)
-            elif isinstance(result, BaseException):
-                raise result
-            else:
-                results.append(self._handle_response(task, result))
+        parked: list[CircuitOpenError] = []
+        success_count: int = 0
+        # 尚未得到结果的请求，按对象身份索引并保持原顺序
+        unanswered: dict[int, Request] = {id(request): request for request in task.requests}
+        try:
+            async for request, outcome in self._as_completed(task.requests, task.max_concurrent, task.meta):
+                del unanswered[id(request)]
+                result = self._classify(task, request, outcome, failed_requests, parked)
+                if result is not None:
+                    success_count += 1
+                    yield result
+        except asyncio.CancelledError:
+            for retry in self._salvage(task, list(unanswered.values()), failed_requests, parked):
+                yield retry
+            raise
 
-        success_count = sum(1 for r in results if r is not None)
         logger.info(
             f"批量请求完成，共 {len(task.requests)} 条，"
-            f"成功 {success_count} 条，失败 {len(failed_requests)} 条"
+            f"成功 {success_count} 条，失败 {len(failed_requests)} 条，熔断 {len(parked)} 条"
         )
-        results.append(self._retry_batch(task, failed_requests))
-        return results
-
-    @staticmethod
-    async def _send(request: Request, client: AsyncClient, semaphore: asyncio.Semaphore) -> Response:
-        """
-        @brief 在 Semaphore 许可下发送单条请求
-        @param request 待发送的 httpx.Request
-        @param client 当前批次共享的 AsyncClient
-        @param semaphore 控制最大并发数的信号量
-        @return httpx 响应对象
-        """
-        async with semaphore:
-            return await client.send(request)
+        for retry in (self._retry_batch(task, failed_requests), self._park_batch(task, parked)):
+            if retry is not None:
+                yield retry
 
 
 class ThrottledHttpRequester(RequesterBase[ThrottledHttpxRequestData], HttpRequesterMixin):
     """
     @brief 节流顺序 HTTP 请求器
-    @details 按列表顺序依次发送请求，每条完成后等待 task.interval 秒（末条不等待）。
+    @details 按列表顺序依次发送请求，每条完成后立即产出响应，再等待 task.interval 秒（末条不等待）。
              interval 语义为"上一条请求完成后开始计时"。
-             失败子集在 retry > 1 时构造新的 ThrottledHttpxRequestData 投回总线重试。
+             若所有请求的主机都启用了自适应限速，则改为并发提交，由限速器按服务端反馈调节速率与并发，
+             interval 不再生效，响应按完成顺序产出。
+             失败子集在全部请求结束后汇总，retry > 1 时构造新的 ThrottledHttpxRequestData 投回总线重试；
+             熔断拒绝的子集另行汇总为不递减 retry、延迟到半开时刻的 ThrottledHttpxRequestData。
+             迭代被取消时，尚未完成的请求并入失败子集，先产出重试任务再重新抛出取消。
     """
 
-    async def _do_request(self, task: ThrottledHttpxRequestData) -> list[HttpxResponseData | ThrottledHttpxRequestData | None]:
+    async def _do_request(self, task: ThrottledHttpxRequestData) -> AsyncIterator[HttpxResponseData | ThrottledHttpxRequestData]:
         """
         @brief 节流顺序执行所有 HTTP 请求
         @param task 携带多条 httpx.Request 及节流间隔的请求数据包
-        @return 成功响应列表，retry > 1 时末尾追加重试任务
+        @return 异步迭代器：逐条产出成功响应，retry > 1 时末尾产出重试任务
         """
-        results: list[HttpxResponseData | ThrottledHttpxRequestData | None] = []
-        failed_requests: list[Request] = []
-        last_index = len(task.requests) - 1
+        return self._stream(self._unseen(task))
 
-        async with AsyncClient() as client:
-            for i, request in enumerate(task.requests):
-                try:
-                    response = await client.send(request)
-                    results.append(self._handle_response(task, response))
-                except HTTPError as e:
-                    logger.warning(f'{request.url} 请求失败：{e}')
-                    failed_requests.append(request)
+    async def _stream(self, task: ThrottledHttpxRequestData) -> AsyncIterator[HttpxResponseData | ThrottledHttpxRequestData]:
+        """
+        @brief 逐条产出节流请求的结果
+        @param task 已剔除已见请求的节流请求数据包
+        @return 异步迭代器：成功响应，末尾可含重试任务
+        """
+        failed_requests: list[Request] = []
+        parked: list[CircuitOpenError] = []
+        success_count: int = 0
+        # 尚未得到结果的请求，按对象身份索引并保持原顺序
+        unanswered: dict[int, Request] = {id(request): request for request in task.requests}
 
-                # interval 语义：上一条完成后计时，末条不等待
-                if i < last_index:
-                    await asyncio.sleep(task.interval)
+        try:
+            if self._adaptive(task.requests):
+                async for request, outcome in self._as_completed(task.requests, None, task.meta):
+                    del unanswered[id(request)]
+                    result = self._classify(task, request, outcome, failed_requests, parked)
+                    if result is not None:
+                        success_count += 1
+                        yield result
+            else:
+                last_index = len(task.requests) - 1
+                for i, request in enumerate(task.requests):
+                    try:
+                        outcome: Response | Exception = await self._send(request, task.meta)
+                    except HTTPError as e:
+                        outcome = e
+                    del unanswered[id(request)]
+                    result = self._classify(task, request, outcome, failed_requests, parked)
+                    if result is not None:
+                        success_count += 1
+                        yield result
+
+                    # interval 语义：上一条完成后计时，末条不等待
+                    if i < last_index:
+                        await asyncio.sleep(task.interval)
+        except asyncio.CancelledError:
+            for retry in self._salvage(task, list(unanswered.values()), failed_requests, parked):
+                yield retry
+            raise
 
-        success_count = sum(1 for r in results if r is not None)
         logger.info(
             f"节流请求完成，共 {len(task.requests)} 条，"
-            f"成功 {success_count} 条，失败 {len(failed_requests)} 条"
+            f"成功 {success_count} 条，失败 {len(failed_requests)} 条，熔断 {len(parked)} 条"
         )
-        results.append(self._retry_batch(task, failed_requests))
-        return results
+        for retry in (self._retry_batch(task, failed_requests), self._park_batch(task, parked)):
+            if retry is not None:
+                yield retry
+
+
+class StreamHttpRequester(RequesterBase[StreamHttpxRequestData], HttpRequesterMixin):
+    """
+    @brief 流式下载 HTTP 请求器
+    @details 与 SingleHttpRequester 相同地发送单条请求并处理重试，但 200 响应体分块写入临时文件，
+             产出的 HttpxResponseData 以 body 引用该文件，内存中不保留完整响应体。
+             响应体超过 task.max_bytes 时中止下载、删除已写入部分并丢弃任务（重试也无济于事）。
+    """
+
+    async def _do_request(self, task: StreamHttpxRequestData) -> HttpxResponseData | StreamHttpxRequestData | None:
+        """
+        @brief 执行流式下载
+        @param task 携带单条 httpx.Request 及大小上限的请求数据包
+        @return HttpxResponseData 下载成功（body 指向落盘文件）；StreamHttpxRequestData retry 递减重试或熔断延迟重投；None 耗尽重试、超过上限或已见
+        """
+        if self._seen(task, task.request):
+            return None
+        try:
+            response, body = await self._download(task.request, task.max_bytes, task.meta)
+            result = self._handle_response(task, response)
+        except BodyTooLargeError as e:
+            logger.warning(f'{task.request.url} 下载中止，任务已丢弃：{e}')
+            return None
+        except CircuitOpenError as e:
+            return self._park_single(task, e)
+        except HTTPError as e:
+            logger.warning(f'{task.request.url} 请求失败：{e}')
+            return self._retry_single(task, e)
+
+        if result is None:
+            return None
+        logger.info(f"下载成功 [{task.request.url}]，{body.size if body is not None else len(response.content)} 字节")
+        return replace(result, body=body) if body is not None else result
 
 
 if __name__ == '__main__':
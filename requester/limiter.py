@@ -0,0 +1,312 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 按主机自适应的请求限速器
+@details HostLimiter 同时控制单个主机的在途并发数与每秒请求数，采用 AIMD 策略：
+         - 响应正常且延迟平稳时加性增长：并发上限每轮（约一个窗口的请求）+1，速率每秒 +rate_step；
+         - 收到 429 / 502 / 503 / 504、请求超时或延迟 EWMA 超过基线的 latency_tolerance 倍时，
+           并发上限与速率同时乘以 backoff_factor；cooldown 秒内的重复信号只退避一次，
+           避免同一波并发失败把上限一次压到底；
+         - 响应带 Retry-After（秒数或 HTTP 日期）时，在该时刻之前暂停向该主机发出新请求。
+         速率以"下一次可发送时刻"实现匀速发放，不产生突发；并发槽位按等待顺序 FIFO 交接。
+         LimiterRegistry 按主机名懒加载限速器，未启用的主机返回 None，调用方照常直接发送。
+         各主机的当前上限、速率、在途数、延迟与暂停剩余时间通过指标导出。
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from logging import getLogger
+
+from metrics import metrics
+
+logger = getLogger(__name__)
+
+_LIMIT_CONCURRENCY = metrics.gauge('http_limiter_concurrency', '自适应限速器当前并发上限', ('host',))
+_LIMIT_RATE = metrics.gauge('http_limiter_rate', '自适应限速器当前速率（请求/秒）', ('host',))
+_LIMIT_IN_FLIGHT = metrics.gauge('http_limiter_in_flight', '经限速器发出的在途请求数', ('host',))
+_LIMIT_LATENCY = metrics.gauge('http_limiter_latency_seconds', '请求延迟 EWMA', ('host', 'kind'))
+_LIMIT_BLOCKED = metrics.gauge('http_limiter_blocked_seconds', 'Retry-After 暂停的剩余秒数', ('host',))
+_LIMIT_BACKOFFS = metrics.counter('http_limiter_backoffs_total', '限速器退避次数', ('host', 'reason'))
+
+# 视为服务端过载、需要退避的状态码
+_OVERLOAD_STATUSES: frozenset[int] = frozenset({429, 502, 503, 504})
+
+# 延迟 EWMA 的平滑系数，以及基线向 EWMA 回升的速度
+_LATENCY_ALPHA: float = 0.2
+_BASELINE_DRIFT: float = 0.01
+
+
+@dataclass(frozen=True)
+class LimiterConfig(object):
+    """
+    @brief 单个主机的限速器配置
+    @param enabled 是否启用
+    @param initial_concurrency / min_concurrency / max_concurrency 并发上限的初值与范围
+    @param initial_rate / min_rate / max_rate 每秒请求数的初值与范围
+    @param rate_step 健康时速率每秒的加性增量
+    @param backoff_factor 退避时的乘性系数
+    @param latency_tolerance 延迟 EWMA 超过基线多少倍视为拥塞
+    @param cooldown 两次退避的最小间隔（秒）
+    @param max_retry_after Retry-After 的上限（秒），防止异常响应长时间阻塞
+    """
+    enabled: bool = False             # 是否启用
+    initial_concurrency: int = 4      # 初始并发上限
+    min_concurrency: int = 1          # 最小并发上限
+    max_concurrency: int = 32         # 最大并发上限
+    initial_rate: float = 5.0         # 初始速率（请求/秒）
+    min_rate: float = 0.5             # 最小速率
+    max_rate: float = 50.0            # 最大速率
+    rate_step: float = 1.0            # 健康时速率每秒增量
+    backoff_factor: float = 0.5       # 退避乘性系数
+    latency_tolerance: float = 2.0    # 延迟拥塞阈值（相对基线）
+    cooldown: float = 1.0             # 两次退避最小间隔（秒）
+    max_retry_after: float = 300.0    # Retry-After 上限（秒）
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    @brief 解析 Retry-After 响应头
+    @param value 头部取值，秒数或 HTTP 日期
+    @return 需等待的秒数；缺失或无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class HostLimiter(object):
+    """
+    @brief 单个主机的 AIMD 限速器
+    @details 通过 slot() 异步上下文管理器占用并发槽位并等待发送时刻，
+             请求结束后由调用方以 record_response() / record_timeout() 反馈结果。
+    """
+
+    def __init__(self, host: str, config: LimiterConfig) -> None:
+        """
+        @brief 初始化限速器
+        @param host 主机名，用于日志与指标标签
+        @param config 限速器配置
+        """
+        self._host: str = host
+        self._config: LimiterConfig = config
+        self._limit: float = float(config.initial_concurrency)
+        self._rate: float = config.initial_rate
+        self._in_flight: int = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._next_send: float = 0.0
+        self._blocked_until: float = 0.0
+        self._latency: float = 0.0
+        self._baseline: float = 0.0
+        self._last_backoff: float = float('-inf')
+
+    @property
+    def limit(self) -> int:
+        """
+        @brief 当前并发上限
+        @return 向下取整的并发上限
+        """
+        return int(self._limit)
+
+    @property
+    def rate(self) -> float:
+        """
+        @brief 当前速率
+        @return 每秒请求数
+        """
+        return self._rate
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        @brief 占用一个并发槽位并等待到可发送时刻，退出时释放槽位
+        """
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def record_response(self, status: int, latency: float, retry_after: str | None) -> None:
+        """
+        @brief 根据响应调整上限
+        @details 过载状态码触发退避并处理 Retry-After；其余 5xx 只更新 Retry-After，不增不减；
+                 2xx / 3xx / 4xx 更新延迟统计，延迟未超阈值时加性增长。
+        @param status HTTP 状态码
+        @param latency 请求延迟（秒），流式下载只计到响应头到达
+        @param retry_after Retry-After 响应头
+        """
+        now = asyncio.get_running_loop().time()
+        delay = parse_retry_after(retry_after)
+        if delay:
+            self._blocked_until = max(self._blocked_until, now + min(delay, self._config.max_retry_after))
+
+        if status in _OVERLOAD_STATUSES:
+            self._backoff(now, str(status))
+            return
+        if status >= 500:
+            return
+
+        self._observe_latency(latency)
+        if self._latency > self._baseline * self._config.latency_tolerance:
+            self._backoff(now, 'latency')
+            return
+
+        config = self._config
+        self._limit = min(float(config.max_concurrency), self._limit + 1.0 / self._limit)
+        self._rate = min(config.max_rate, self._rate + config.rate_step / self._rate)
+        self._wake()
+
+    def record_timeout(self) -> None:
+        """
+        @brief 请求超时视为过载信号
+        """
+        self._backoff(asyncio.get_running_loop().time(), 'timeout')
+
+    def collect_metrics(self, now: float) -> None:
+        """
+        @brief 将当前状态同步到指标仪表
+        @param now 事件循环当前时刻
+        """
+        _LIMIT_CONCURRENCY.labels(self._host).set(self._limit)
+        _LIMIT_RATE.labels(self._host).set(self._rate)
+        _LIMIT_IN_FLIGHT.labels(self._host).set(self._in_flight)
+        _LIMIT_LATENCY.labels(self._host, 'ewma').set(self._latency)
+        _LIMIT_LATENCY.labels(self._host, 'baseline').set(self._baseline)
+        _LIMIT_BLOCKED.labels(self._host).set(max(self._blocked_until - now, 0.0))
+
+    async def _acquire(self) -> None:
+        """
+        @brief 取得并发槽位后按速率与 Retry-After 等待发送时刻
+        @details 有排队者时新请求排在其后，保证 FIFO；等待中被取消时归还已交接的槽位。
+        """
+        loop = asyncio.get_running_loop()
+        if self._waiters or self._in_flight >= int(self._limit):
+            waiter: asyncio.Future[None] = loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+        else:
+            self._in_flight += 1
+
+        now = loop.time()
+        start = max(now, self._next_send, self._blocked_until)
+        self._next_send = start + 1.0 / self._rate
+        if start > now:
+            try:
+                await asyncio.sleep(start - now)
+            except asyncio.CancelledError:
+                self._release()
+                raise
+
+    def _release(self) -> None:
+        """
+        @brief 归还并发槽位并唤醒排队者
+        """
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """
+        @brief 在并发上限允许范围内按 FIFO 顺序把槽位交接给排队者
+        """
+        while self._waiters and self._in_flight < int(self._limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    def _observe_latency(self, latency: float) -> None:
+        """
+        @brief 更新延迟 EWMA 与基线
+        @details 基线取历史最低延迟，并以很慢的速度向 EWMA 回升，适应服务端长期变化。
+        @param latency 本次请求耗时（秒）
+        """
+        if not self._latency:
+            self._latency = self._baseline = latency
+            return
+        self._latency += (latency - self._latency) * _LATENCY_ALPHA
+        self._baseline = min(latency, self._baseline + (self._latency - self._baseline) * _BASELINE_DRIFT)
+
+    def _backoff(self, now: float, reason: str) -> None:
+        """
+        @brief 乘性退避；cooldown 内的重复信号忽略
+        @param now 事件循环当前时刻
+        @param reason 退避原因，用于日志与指标标签
+        """
+        if now - self._last_backoff < self._config.cooldown:
+            return
+        config = self._config
+        self._last_backoff = now
+        self._limit = max(float(config.min_concurrency), self._limit * config.backoff_factor)
+        self._rate = max(config.min_rate, self._rate * config.backoff_factor)
+        _LIMIT_BACKOFFS.labels(self._host, reason).inc()
+        logger.info(f"主机 [{self._host}] 限速退避（{reason}）：并发上限 {self._limit:.1f}，速率 {self._rate:.2f}/s")
+
+
+class LimiterRegistry(object):
+    """
+    @brief 按主机名维护 HostLimiter 的注册表
+    @details 与 HttpClientRegistry 相同，已配置主机使用各自配置，其余主机使用默认配置并懒加载；
+             配置未启用的主机返回 None。
+    """
+
+    def __init__(self, default: LimiterConfig, hosts: dict[str, LimiterConfig]) -> None:
+        """
+        @brief 初始化注册表
+        @param default 未单独配置主机时使用的默认配置
+        @param hosts 主机名 → 限速器配置 的映射
+        """
+        self._default: LimiterConfig = default
+        self._hosts: dict[str, LimiterConfig] = hosts
+        self._limiters: dict[str, HostLimiter | None] = {}
+
+    def get(self, host: str) -> HostLimiter | None:
+        """
+        @brief 获取指定主机的限速器
+        @param host 请求 URL 的主机名
+        @return 该主机的限速器；未启用时返回 None
+        """
+        try:
+            return self._limiters[host]
+        except KeyError:
+            host_config = self._hosts.get(host, self._default)
+            limiter = HostLimiter(host, host_config) if host_config.enabled else None
+            self._limiters[host] = limiter
+            return limiter
+
+    def collect_metrics(self) -> None:
+        """
+        @brief 将各主机限速器状态同步到指标仪表，供导出前回调使用
+        """
+        try:
+            now = asyncio.get_running_loop().time()
+        except RuntimeError:
+            return
+        for limiter in self._limiters.values():
+            if limiter is not None:
+                limiter.collect_metrics(now)
+
+
+if __name__ == '__main__':
+    pass
@@ -2,26 +2,43 @@
 # AUTHOR: Sun
 """
 @brief router 包统一导出入口
-@details 导出 HTTPX_DOMAIN_REGISTRY 供外部注册站点域名映射。
+@details 导出 HTTPX_ROUTES 供外部以 主机模式 + 路径模板 声明站点路由。
+         httpx_route_table() 按 [router] 配置懒编译唯一的 RouteTable，路由器与站点处理器共享同一实例以复用路由缓存。
          build_httpx_site_router() 一次性实例化 HttpxSiteRouter，
          返回值可直接用 ** 解包合并到 main.py 的 dispatch_registry。
 """
 
-from re import Pattern
-
 from base import HandlerBase
+from config import config
 from data.base import TaskBaseData
 from data.response import HttpxResponseData
-from data.gateway import BangumiApiGatewayData, BangumiCoverGatewayData, HttpxSiteGatewayData
+from data.gateway import BangumiApiGatewayData, BangumiCoverGatewayData
+from data.parse import BangumiCalendarParseData, BangumiCoverParseData, BangumiSubjectDetailParseData
 from router.base import SiteRouterBase
 from router.httpx_router import HttpxSiteRouter
+from router.table import Route, RouteTable
+
+# 主机模式 + 路径模板 → 站点数据类 / 解析数据类 的全局路由声明
+# 主机模式：str 精确匹配；*.example.com 匹配任意子域名；re.Pattern 以 fullmatch 匹配（按注册顺序首个命中）
+# 路径模板：{name} 匹配单个路径段，{name*} 匹配剩余路径；同一主机下按注册顺序首个命中
+HTTPX_ROUTES: list[Route] = [
+    Route('api.bgm.tv',  '/calendar',         BangumiApiGatewayData,   BangumiCalendarParseData),
+    Route('api.bgm.tv',  '/v0/subjects/{id}', BangumiApiGatewayData,   BangumiSubjectDetailParseData),
+    Route('lain.bgm.tv', '/{path*}',          BangumiCoverGatewayData, BangumiCoverParseData),
+]
+
+_route_table: RouteTable | None = None
 
-# 域名 → 站点数据类 的全局注册表
-# 键类型：str（精确匹配，优先级高）或 re.Pattern（正则匹配，按注册顺序首个命中）
-HTTPX_DOMAIN_REGISTRY: dict[str | Pattern[str], type[HttpxSiteGatewayData]] = {
-    'api.bgm.tv':  BangumiApiGatewayData,
-    'lain.bgm.tv': BangumiCoverGatewayData,
-}
+
+def httpx_route_table() -> RouteTable:
+    """
+    @brief 获取编译后的 httpx 路由表，首次调用时按 HTTPX_ROUTES 编译
+    @return 全局唯一的 RouteTable
+    """
+    global _route_table
+    if _route_table is None:
+        _route_table = RouteTable(HTTPX_ROUTES, config.getint('router', 'cache_size', fallback=4096))
+    return _route_table
 
 
 def build_httpx_site_router() -> dict[type[TaskBaseData], HandlerBase]:
@@ -30,13 +47,16 @@ def build_httpx_site_router() -> dict[type[TaskBaseData], HandlerBase]:
     @details 返回值可直接用 ** 解包合并到 main.py 的 dispatch_registry。
     @return 类型 → 实例的映射，包含 HttpxSiteRouter 处理 HttpxResponseData
     """
-    return {HttpxResponseData: HttpxSiteRouter(HTTPX_DOMAIN_REGISTRY)}
+    return {HttpxResponseData: HttpxSiteRouter(httpx_route_table())}
 
 
 __all__ = [
     'SiteRouterBase',
     'HttpxSiteRouter',
-    'HTTPX_DOMAIN_REGISTRY',
+    'Route',
+    'RouteTable',
+    'HTTPX_ROUTES',
+    'httpx_route_table',
     'build_httpx_site_router',
 ]
 
@@ -5,6 +5,7 @@
 @details SiteRouterBase 采用 Template Method 模式，与 requester/base.py 的
          RequesterBase 风格一致：handle() 为具体方法提供兜底保护，
          _do_route() 为抽象方法由子类实现域名提取、匹配与包装的完整流程。
+         路由是纯同步的查表与包装，声明 inline = True，由 Bus 在上游产出响应时直接内联执行。
 """
 
 from abc import ABC, abstractmethod
@@ -22,8 +23,11 @@ class SiteRouterBase[T: ResponseBaseData](HandlerBase[T], ABC):
     @brief 所有站点路由器的抽象基类
     @details 继承 HandlerBase 参与总线调度，继承 ABC 强制子类实现 _do_route()。
              handle() 是具体方法，作为纯兜底保护；路由逻辑由子类在 _do_route() 中完成。
+             子类的 _do_route() 须保持不做 I/O，否则应覆写 inline = False。
     """
 
+    inline = True
+
     async def handle(self, task: T) -> SiteGatewayBaseData | None:
         """
         @brief 兜底保护：透传 _do_route() 结果，捕获未预期异常后丢弃任务
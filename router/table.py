@@ -0,0 +1,309 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 编译后的两级路由表（主机 + 路径）
+@details 路由以声明式 Route 列出：主机模式 + 路径模板 → 站点数据类与解析数据类。RouteTable 构造时编译为：
+         - 主机级：精确主机名字典 → 通配主机（*.example.com）的后缀字典树 → 其余正则合并为分支正则，
+           依次尝试，首个命中的主机组决定站点，不再回退到后面的组；
+           含捕获组（及反向引用）或带无法改写为作用域标志的正则不参与合并，按注册顺序单独 fullmatch；
+         - 路径级：每个主机组内先查精确路径字典，再以该组全部模板合并成的单个分支正则匹配。
+         同组内按注册顺序优先，合并正则以 fullmatch 匹配，首个整体命中的分支生效。
+         解析结果按 (主机, 路径) 缓存在有界 LRU 中（含未命中），路由器与站点处理器两跳查询同一 URL 时第二跳直接命中。
+         resolve() 在查询之外按路由计数并统计缓存命中，match() 只查询，供同一次路由决策的后续环节使用。
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from logging import getLogger
+from re import Pattern
+
+from data.gateway import SiteGatewayBaseData
+from data.parse import ParseBaseData
+from metrics import metrics
+
+logger = getLogger(__name__)
+
+_ROUTED = metrics.counter('router_routes_total', '按路由统计的路由决策数，未命中记为 unmatched', ('route',))
+_CACHE = metrics.counter('router_cache_total', '路由缓存查询结果', ('result',))
+
+# 路径模板中的占位符：{name} 匹配单个路径段，{name*} 匹配剩余路径
+_PLACEHOLDER: Pattern[str] = re.compile(r'\{(\w+)(\*?)\}')
+# 可在合并正则中以作用域内联标志保留的正则标志
+_SCOPED_FLAGS: tuple[tuple[re.RegexFlag, str], ...] = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+# 可合并的正则标志；str 正则总带 re.UNICODE
+_SCOPABLE: int = re.UNICODE | re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE
+# 正则开头的全局内联标志，如 (?i)；其标志已体现在 Pattern.flags 中
+_GLOBAL_FLAGS: Pattern[str] = re.compile(r'\(\?[aiLmsux]+\)')
+
+
+@dataclass(frozen=True)
+class Route(object):
+    """
+    @brief 一条声明式路由
+    @details host 为纯字符串时精确匹配；以 *. 开头时匹配该域名的任意子域名（不含其自身）；
+             re.Pattern 时以 fullmatch 匹配。path 为路径模板，{name} 匹配单个路径段，{name*} 匹配剩余路径。
+             同一主机模式下的全部路由须指向同一站点数据类。
+    @param host 主机模式
+    @param path 路径模板
+    @param site 主机命中后包装成的站点数据类
+    @param target 路径命中后产出的解析数据类
+    @param name 指标与日志中的路由名，默认为主机模式与路径模板拼接
+    """
+    host: str | Pattern[str]                  # 主机模式
+    path: str                                 # 路径模板
+    site: type[SiteGatewayBaseData]           # 站点数据类
+    target: type[ParseBaseData]               # 解析数据类
+    name: str = ''                            # 路由名
+
+    def __post_init__(self) -> None:
+        """
+        @brief 缺省路由名取主机模式与路径模板
+        """
+        if not self.name:
+            host = self.host if isinstance(self.host, str) else self.host.pattern
+            object.__setattr__(self, 'name', f'{host}{self.path}')
+
+
+@dataclass
+class _HostGroup(object):
+    """
+    @brief 同一主机模式下的路径匹配器
+    """
+    site: type[SiteGatewayBaseData]                                     # 站点数据类
+    routes: list[Route] = field(default_factory=list)                   # 按注册顺序的路由
+    exact: dict[str, Route] = field(default_factory=dict)               # 精确路径 → 路由
+    templates: list[Route] = field(default_factory=list)                # 含占位符的路由
+    pattern: Pattern[str] | None = None                                 # 模板合并后的分支正则
+
+    def compile(self) -> None:
+        """
+        @brief 拆分精确路径与模板，模板合并为单个分支正则，分支名 _<序号> 对应 templates 下标
+        """
+        for route in self.routes:
+            if _PLACEHOLDER.search(route.path) is None:
+                self.exact.setdefault(route.path, route)
+            else:
+                self.templates.append(route)
+        if self.templates:
+            self.pattern = re.compile('|'.join(
+                f'(?P<_{index}>{_template_regex(route.path)})' for index, route in enumerate(self.templates)
+            ))
+
+    def match(self, path: str) -> Route | None:
+        """
+        @brief 先查精确路径，再匹配合并正则
+        @param path URL 路径
+        @return 命中的路由；未命中返回 None
+        """
+        route = self.exact.get(path)
+        if route is not None or self.pattern is None:
+            return route
+        matched = self.pattern.fullmatch(path)
+        return self.templates[int(matched.lastgroup[1:])] if matched else None
+
+
+class _SuffixTrie(object):
+    """
+    @brief 通配主机的后缀字典树
+    @details 按域名标签自右向左逐级下降，*.bgm.tv 登记在 tv → bgm 节点上；
+             查询时沿主机名的标签下降，取最深（最具体）且仍有剩余标签的登记节点。
+    """
+
+    def __init__(self) -> None:
+        """
+        @brief 初始化空树
+        """
+        self._children: dict[str, _SuffixTrie] = {}
+        self._group: _HostGroup | None = None
+
+    def insert(self, suffix: str, group: _HostGroup) -> None:
+        """
+        @brief 登记通配主机
+        @param suffix 去掉 *. 前缀后的域名，如 bgm.tv
+        @param group 主机组
+        """
+        node = self
+        for label in reversed(suffix.split('.')):
+            node = node._children.setdefault(label, _SuffixTrie())
+        node._group = group
+
+    def find(self, host: str) -> _HostGroup | None:
+        """
+        @brief 查找匹配主机名的最具体通配主机组
+        @param host 主机名
+        @return 命中的主机组；未命中返回 None
+        """
+        labels = host.split('.')
+        node, found = self, None
+        for depth in range(len(labels) - 1, 0, -1):
+            node = node._children.get(labels[depth])
+            if node is None:
+                break
+            if node._group is not None:
+                found = node._group
+        return found
+
+
+def _template_regex(template: str) -> str:
+    """
+    @brief 将路径模板转换为正则（不含捕获组，以免干扰分支名定位）
+    @param template 路径模板
+    @return 正则源码
+    """
+    parts: list[str] = []
+    position = 0
+    for placeholder in _PLACEHOLDER.finditer(template):
+        parts.append(re.escape(template[position:placeholder.start()]))
+        parts.append('.*' if placeholder.group(2) else '[^/]+')
+        position = placeholder.end()
+    parts.append(re.escape(template[position:]))
+    return ''.join(parts)
+
+
+def _scoped(pattern: Pattern[str]) -> str | None:
+    """
+    @brief 以作用域内联标志包裹正则，使其并入合并正则后仍保留自身标志
+    @details 开头的全局内联标志（如 (?i)）在合并正则中间不合法，先去掉再按 Pattern.flags 改写为作用域标志。
+             含捕获组的正则并入后组号会偏移、反向引用随之失效，与带其他标志（如 re.ASCII）的正则一样不参与合并。
+    @param pattern 已编译正则
+    @return 正则源码；无法合并时返回 None
+    """
+    if pattern.groups or pattern.flags & ~_SCOPABLE:
+        return None
+
+    source = pattern.pattern
+    while (flags := _GLOBAL_FLAGS.match(source)) is not None:
+        source = source[flags.end():]
+    letters = ''.join(letter for flag, letter in _SCOPED_FLAGS if pattern.flags & flag)
+    scoped = f'(?{letters}:{source})' if letters else f'(?:{source})'
+    try:
+        re.compile(scoped)
+    except re.error:
+        # 如 VERBOSE 正则末尾的注释会吞掉包裹用的右括号
+        return None
+    return scoped
+
+
+class RouteTable(object):
+    """
+    @brief 编译后的两级路由表
+    @details 构造后只读；缓存为单事件循环内使用的 OrderedDict，无需加锁。
+    """
+
+    def __init__(self, routes: list[Route], cache_size: int = 4096) -> None:
+        """
+        @brief 编译路由表
+        @param routes 声明式路由列表，同组内按列表顺序优先
+        @param cache_size LRU 缓存容量，0 表示不缓存
+        @throws ValueError 同一主机模式下的路由指向不同站点数据类
+        """
+        groups: dict[str | Pattern[str], _HostGroup] = {}
+        for route in routes:
+            group = groups.setdefault(route.host, _HostGroup(route.site))
+            if group.site is not route.site:
+                host = route.host if isinstance(route.host, str) else route.host.pattern
+                raise ValueError(f"主机模式 [{host}] 的路由指向不同站点数据类：{group.site.__name__} / {route.site.__name__}")
+            group.routes.append(route)
+
+        self._exact: dict[str, _HostGroup] = {}
+        self._wildcards: _SuffixTrie = _SuffixTrie()
+        # 按注册顺序排列的 (正则, 主机组)：连续可合并的正则合为一个分支正则，分支名 _<序号> 对应组下标
+        self._patterned: list[tuple[Pattern[str], list[_HostGroup]]] = []
+        patterns: list[str] = []
+        merged: list[_HostGroup] = []
+        for host, group in groups.items():
+            group.compile()
+            if isinstance(host, str):
+                if host.startswith('*.'):
+                    self._wildcards.insert(host[2:], group)
+                else:
+                    self._exact[host] = group
+                continue
+            scoped = _scoped(host)
+            if scoped is not None:
+                patterns.append(f'(?P<_{len(merged)}>{scoped})')
+                merged.append(group)
+                continue
+            if patterns:
+                self._patterned.append((re.compile('|'.join(patterns)), merged))
+                patterns, merged = [], []
+            self._patterned.append((host, [group]))
+        if patterns:
+            self._patterned.append((re.compile('|'.join(patterns)), merged))
+
+        self._cache: OrderedDict[tuple[str, str], Route | None] = OrderedDict()
+        self._cache_size: int = cache_size
+
+    def site_of(self, host: str) -> type[SiteGatewayBaseData] | None:
+        """
+        @brief 只按主机级查找站点数据类
+        @param host 主机名
+        @return 命中的站点数据类；未命中返回 None
+        """
+        group = self._group_of(host)
+        return group.site if group is not None else None
+
+    def match(self, host: str, path: str) -> Route | None:
+        """
+        @brief 查询路由，不计数
+        @param host 主机名
+        @param path URL 路径
+        @return 命中的路由；未命中返回 None
+        """
+        return self._lookup(host, path)[0]
+
+    def resolve(self, host: str, path: str) -> Route | None:
+        """
+        @brief 查询路由并计入路由与缓存指标，每次路由决策调用一次
+        @param host 主机名
+        @param path URL 路径
+        @return 命中的路由；未命中返回 None
+        """
+        route, hit = self._lookup(host, path)
+        _CACHE.labels('hit' if hit else 'miss').inc()
+        _ROUTED.labels(route.name if route is not None else 'unmatched').inc()
+        return route
+
+    def _lookup(self, host: str, path: str) -> tuple[Route | None, bool]:
+        """
+        @brief 经 LRU 缓存查询路由
+        @param host 主机名
+        @param path URL 路径
+        @return (命中的路由或 None, 是否命中缓存)
+        """
+        key = (host, path)
+        try:
+            route = self._cache[key]
+        except KeyError:
+            pass
+        else:
+            self._cache.move_to_end(key)
+            return route, True
+
+        group = self._group_of(host)
+        route = group.match(path) if group is not None else None
+        if self._cache_size > 0:
+            self._cache[key] = route
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return route, False
+
+    def _group_of(self, host: str) -> _HostGroup | None:
+        """
+        @brief 主机级匹配：精确字典 → 后缀字典树 → 按注册顺序的合并正则与单独正则
+        @param host 主机名
+        @return 命中的主机组；未命中返回 None
+        """
+        group = self._exact.get(host) or self._wildcards.find(host)
+        if group is not None:
+            return group
+        for pattern, candidates in self._patterned:
+            matched = pattern.fullmatch(host)
+            if matched is not None:
+                return candidates[0] if len(candidates) == 1 else candidates[int(matched.lastgroup[1:])]
+        return None
+
+
+if __name__ == '__main__':
+    pass
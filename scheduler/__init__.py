@@ -30,6 +30,8 @@ SCHEDULE_REGISTRY: tuple[SiteScheduleConfig, ...] = (
                     'https://api.bgm.tv/calendar',
                     headers={'User-Agent': config.get('bangumi', 'user_agent')},
                 ),
+                # /calendar 每日更新，不受已见集合有效期影响
+                revisit=True,
             ),
         ),
     ),
@@ -80,6 +80,15 @@ class Scheduler(object):
                 ))
 
         self._slots: tuple[_TriggerSlot, ...] = tuple(slots)
+        self._configs: tuple[SiteScheduleConfig, ...] = tuple(configs)
+
+    def seed_tasks(self) -> list[TaskBaseData]:
+        """
+        @brief 返回全部站点配置的种子任务，供一次性运行模式立即注入
+        @details 同一站点配置的多个触发时刻只计一次，任务顺序与配置顺序一致。
+        @return 种子任务列表
+        """
+        return [task for config in self._configs for task in config.seed_tasks]
 
     async def run(self, bus: Bus) -> None:
         """
@@ -0,0 +1,173 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 响应体落盘工具
+@details 流式下载请求器通过 write_body() 将响应体分块写入临时文件，内存中最多驻留一个分块，
+         超过大小上限时中止并删除文件；下游阶段通过 map_body() 以只读内存映射取得 memoryview，
+         由操作系统按页加载，不在进程堆上复制整份数据；用完后调用 discard_body() 删除文件。
+         同一响应体交给多个下游时，以 link_body() 为每个下游建立独立的硬链接，各自删除互不影响。
+         响应体文件归持有它的数据包所有：Bus 在数据包处理完毕（含异常、超时与无处理器丢弃）后以 release_bodies()
+         删除未转交给后续数据包的文件，链路在任意环节终止都不会遗留文件；sweep_bodies() 供进程启停时清扫落盘目录。
+         写入经 asyncio.to_thread() 在线程池中进行，不阻塞事件循环。
+         本模块只依赖标准库与 data 包，可被请求器、解析器、存储器与 Bus 共同导入。
+"""
+
+import asyncio
+import mmap
+import os
+import shutil
+import tempfile
+from collections.abc import AsyncIterator, Iterable
+from contextlib import suppress
+from dataclasses import fields, is_dataclass
+from functools import cache
+from logging import getLogger
+from pathlib import Path
+
+from data.response import FileBody
+
+logger = getLogger(__name__)
+
+# 单次写入的分块大小
+CHUNK_BYTES: int = 64 << 10
+# 落盘文件名前缀
+_PREFIX: str = 'body-'
+
+
+class BodyTooLargeError(ValueError):
+    """
+    @brief 响应体超过大小上限
+    """
+
+
+async def write_body(chunks: AsyncIterator[bytes], directory: str | None, max_bytes: int, declared: int | None = None) -> FileBody:
+    """
+    @brief 将分块响应体写入临时文件
+    @param chunks 响应体分块（已解码）
+    @param directory 临时文件目录，None 表示系统临时目录
+    @param max_bytes 大小上限（字节）
+    @param declared 响应头声明的长度，超过上限时不开始下载
+    @return 落盘的响应体
+    @throws BodyTooLargeError 声明长度或实际长度超过上限时，已写入的部分被删除
+    """
+    if declared is not None and declared > max_bytes:
+        raise BodyTooLargeError(f'响应体声明长度 {declared} 超过上限 {max_bytes}')
+
+    fd, path = tempfile.mkstemp(prefix=_PREFIX, dir=directory)
+    size: int = 0
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise BodyTooLargeError(f'响应体超过上限 {max_bytes}')
+                await asyncio.to_thread(file.write, chunk)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(path)
+        raise
+    return FileBody(path=path, size=size)
+
+
+def map_body(body: FileBody) -> memoryview:
+    """
+    @brief 以只读内存映射打开落盘的响应体
+    @details 空文件无法映射，返回空 memoryview。映射不显式关闭：驱动或 SQL 语句对象可能仍持有切片，
+             强行关闭会抛出 BufferError；最后一个切片被回收时映射随之释放。
+    @param body 落盘的响应体
+    @return 覆盖整个文件的只读 memoryview
+    """
+    if body.size == 0:
+        return memoryview(b'')
+    with open(body.path, 'rb') as file:
+        return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def link_body(body: FileBody) -> FileBody:
+    """
+    @brief 为落盘的响应体建立同目录下的另一个文件名
+    @details 优先使用硬链接，不复制数据；文件系统不支持硬链接时退化为复制。
+    @param body 落盘的响应体
+    @return 指向新文件名的响应体，大小相同
+    """
+    fd, path = tempfile.mkstemp(prefix=_PREFIX, dir=os.path.dirname(body.path))
+    os.close(fd)
+    try:
+        os.unlink(path)
+        os.link(body.path, path)
+    except OSError:
+        shutil.copyfile(body.path, path)
+    return FileBody(path=path, size=body.size)
+
+
+def discard_body(body: FileBody) -> None:
+    """
+    @brief 删除落盘的响应体，文件不存在时忽略
+    @param body 落盘的响应体
+    """
+    with suppress(FileNotFoundError):
+        os.unlink(body.path)
+
+
+def bodies_of(task: object) -> list[FileBody]:
+    """
+    @brief 取出数据包字段引用的落盘响应体
+    @param task 任意数据包
+    @return 字段值为 FileBody 的列表，按字段顺序
+    """
+    return [value for name in _body_fields(type(task)) if isinstance(value := getattr(task, name), FileBody)]
+
+
+def release_bodies(consumed: Iterable[object], kept: Iterable[object]) -> int:
+    """
+    @brief 删除已处理完的数据包持有、且未转交给后续数据包的落盘响应体
+    @details 处理器把响应体转交下游（如解析器把 body 放入落库数据包）时文件保留，
+             链路在此终止（未命中路由、解析失败、处理超时等）时文件随之删除。已被处理器自行删除的文件忽略。
+    @param consumed 已处理完的数据包
+    @param kept 处理器产出的后续数据包
+    @return 删除的文件数
+    """
+    held: dict[str, FileBody] = {body.path: body for task in consumed for body in bodies_of(task)}
+    if not held:
+        return 0
+    for task in kept:
+        for body in bodies_of(task):
+            held.pop(body.path, None)
+    for body in held.values():
+        discard_body(body)
+    if held:
+        logger.debug(f"删除 {len(held)} 个未转交下游的落盘响应体")
+    return len(held)
+
+
+def sweep_bodies(directory: str) -> int:
+    """
+    @brief 删除落盘目录中遗留的全部响应体文件
+    @details 仅在没有任何数据包引用这些文件时调用（如未启用任务日志的进程启动前与退出后）。
+    @param directory 落盘目录
+    @return 删除的文件数
+    """
+    removed: int = 0
+    for path in Path(directory).glob(f'{_PREFIX}*'):
+        with suppress(FileNotFoundError):
+            path.unlink()
+            removed += 1
+    if removed:
+        logger.info(f"已清扫落盘目录 [{directory}] 中遗留的 {removed} 个响应体文件")
+    return removed
+
+
+@cache
+def _body_fields(cls: type) -> tuple[str, ...]:
+    """
+    @brief 类型注解中含 FileBody 的字段名，按类型缓存，使不携带响应体的数据包无需逐字段检查
+    @param cls 数据包类型
+    @return 字段名元组；非数据类为空
+    """
+    if not is_dataclass(cls):
+        return ()
+    return tuple(f.name for f in fields(cls) if FileBody.__name__ in (f.type if isinstance(f.type, str) else repr(f.type)))
+
+
+if __name__ == '__main__':
+    pass
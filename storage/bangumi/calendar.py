@@ -45,14 +45,13 @@ class BangumiCalendarStorage(StorageBase[BangumiCalendarBatchStoreData]):
 
         return self._build_requests(new_ids)
 
-    @staticmethod
-    async def _insert_ratings(session, task: BangumiCalendarBatchStoreData) -> None:
+    async def _insert_ratings(self, session, task: BangumiCalendarBatchStoreData) -> None:
         """
         @brief 批量写入评分快照，重复 (bgm_id, date) 静默跳过
         @param session 当前数据库会话
         @param task 存储数据包
         """
-        await session.execute(
+        result = await session.execute(
             insert(Rating).values([
                 {
                     'bgm_id':   e.bgm_id,
@@ -76,6 +75,7 @@ class BangumiCalendarStorage(StorageBase[BangumiCalendarBatchStoreData]):
         )
 
         await session.commit()
+        self._record_rows('ratings', result.rowcount)
         logger.info(f"写入 {len(task.entries)} 条 {type(task).__name__} 数据")
 
     @staticmethod
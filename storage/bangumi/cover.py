@@ -4,18 +4,28 @@
 @brief BangumiCoverStorage：封面图字节存储器
 @details 接收 BangumiCoverStoreData，将图片字节 UPDATE 到 subjects.cover_image 列。
          通过 db_id 精确定位数据库行，UPDATE 操作幂等，链路终止后返回 None。
+         批量写入时以 VALUES 列表构造单条 UPDATE ... FROM (VALUES ...) 语句，整批一次提交。
+         流式下载的封面图以只读内存映射取得 memoryview 直接作为参数（asyncpg 接受任意 buffer），
+         不在进程堆上复制；超过 CHUNK_BYTES 的图片先写首块，再以 cover_image || 后续块逐块追加，
+         同一事务内完成，驱动侧每次只需编码一个分块，峰值内存与图片大小无关。写入完成后删除落盘文件。
 """
 
+from collections.abc import Sequence
 from logging import getLogger
 
-from sqlalchemy import update
+from sqlalchemy import Integer, LargeBinary, column, literal, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from data.store import BangumiCoverStoreData
 from database import Subject, get_session
+from spool import discard_body, map_body
 from storage.base import StorageBase
 
 logger = getLogger(__name__)
 
+# 单条 UPDATE 参数的最大字节数，更大的图片分块追加
+CHUNK_BYTES: int = 1 << 20
+
 
 class BangumiCoverStorage(StorageBase[BangumiCoverStoreData]):
     """
@@ -27,19 +37,83 @@ class BangumiCoverStorage(StorageBase[BangumiCoverStoreData]):
     async def _do_store(self, task: BangumiCoverStoreData) -> None:
         """
         @brief 将封面图字节更新到 subjects 表
-        @param task 封面图落库数据包，含 db_id 与 image_bytes
+        @param task 封面图落库数据包，含 db_id 与 image_bytes 或 image_file
         @return None（链路终止）
         """
+        try:
+            image: bytes | memoryview = map_body(task.image_file) if task.image_file is not None else task.image_bytes
+            async with get_session() as session:
+                rowcount = await self._write(session, task.db_id, image)
+                await session.commit()
+        finally:
+            if task.image_file is not None:
+                discard_body(task.image_file)
+
+        self._record_rows('subjects', rowcount)
+        logger.info(f"写入 1 条 {type(task).__name__} 数据")
+
+    async def _do_store_batch(self, tasks: Sequence[BangumiCoverStoreData]) -> None:
+        """
+        @brief 以单条多行 UPDATE 写入一批封面图
+        @details 同一 db_id 出现多次时以最后一条为准。不超过 CHUNK_BYTES 的图片合并为一条多行 UPDATE，
+                 更大的图片在同一事务内逐张分块写入。提交成功后才删除落盘文件，
+                 失败时由基类回退为逐条写入，逐条写入仍需读取这些文件。
+        @param tasks 封面图落库数据包序列
+        @return None（链路终止）
+        """
+        latest: dict[int, BangumiCoverStoreData] = {task.db_id: task for task in tasks}
+        images: dict[int, bytes | memoryview] = {
+            db_id: map_body(task.image_file) if task.image_file is not None else task.image_bytes
+            for db_id, task in latest.items()
+        }
+        small: list[tuple[int, bytes | memoryview]] = [(k, v) for k, v in images.items() if len(v) <= CHUNK_BYTES]
+        large: list[tuple[int, bytes | memoryview]] = [(k, v) for k, v in images.items() if len(v) > CHUNK_BYTES]
+
+        rowcount: int = 0
         async with get_session() as session:
-            await session.execute(
-                update(Subject)
-                .where(Subject.id == task.db_id)
-                .values(cover_image=task.image_bytes)
-            )
+            if small:
+                rows = values(
+                    column('id', Integer), column('image', LargeBinary), name='covers',
+                ).data(small)
+                result = await session.execute(
+                    update(Subject)
+                    .where(Subject.id == rows.c.id)
+                    .values(cover_image=rows.c.image)
+                )
+                rowcount += result.rowcount
+            for db_id, image in large:
+                rowcount += await self._write(session, db_id, image)
 
             await session.commit()
 
-        logger.info(f"写入 1 条 {type(task).__name__} 数据")
+        for task in tasks:
+            if task.image_file is not None:
+                discard_body(task.image_file)
+        self._record_rows('subjects', rowcount)
+        logger.info(f"批量写入 {len(images)} 条 {type(tasks[0]).__name__} 数据")
+
+    @staticmethod
+    async def _write(session: AsyncSession, db_id: int, image: bytes | memoryview) -> int:
+        """
+        @brief 在当前事务内写入一张封面图，超过 CHUNK_BYTES 时分块追加
+        @param session 数据库会话，由调用方提交
+        @param db_id subjects 表自增主键
+        @param image 图片字节或内存映射视图
+        @return 首块 UPDATE 命中的行数
+        """
+        view = memoryview(image)
+        result = await session.execute(
+            update(Subject)
+            .where(Subject.id == db_id)
+            .values(cover_image=view[:CHUNK_BYTES])
+        )
+        for offset in range(CHUNK_BYTES, len(view), CHUNK_BYTES):
+            await session.execute(
+                update(Subject)
+                .where(Subject.id == db_id)
+                .values(cover_image=Subject.cover_image.op('||')(literal(view[offset:offset + CHUNK_BYTES], LargeBinary)))
+            )
+        return result.rowcount
 
 
 if __name__ == '__main__':
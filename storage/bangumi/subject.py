@@ -4,17 +4,21 @@
 @brief BangumiSubjectMetaStorage：番剧基础信息存储器
 @details 将 BangumiSubjectMetaStoreData 写入 subjects 表，ON CONFLICT DO NOTHING
          处理重复写入，成功写入后返回携带 db_id 的封面图下载请求。
+         批量写入时以单条多行 INSERT ... RETURNING id, bgm_id 写入整批，一次提交，
+         仅为实际新插入的行产出封面图请求。
 """
 
+from collections.abc import Sequence
 from datetime import date
 from logging import getLogger
+from typing import Any
 
 import httpx
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import config
-from data.request import SingleHttpxRequestData
+from data.request import StreamHttpxRequestData
 from data.store import BangumiSubjectMetaStoreData
 from database import SeasonType, Subject, get_session
 from storage.base import StorageBase
@@ -27,16 +31,16 @@ class BangumiSubjectMetaStorage(StorageBase[BangumiSubjectMetaStoreData]):
     @brief 番剧基础信息存储器
     @details 将 BangumiSubjectMetaStoreData 写入 subjects 表。
              ON CONFLICT DO NOTHING 处理并发或重复触发场景；
-             成功写入后返回 SingleHttpxRequestData（meta 含 db_id）触发封面图下载。
+             成功写入后返回 StreamHttpxRequestData（meta 含 db_id）触发封面图流式下载。
     """
 
-    async def _do_store(self, task: BangumiSubjectMetaStoreData) -> SingleHttpxRequestData | None:
+    async def _do_store(self, task: BangumiSubjectMetaStoreData) -> StreamHttpxRequestData | None:
         """
         @brief 写入番剧基础信息并返回封面图下载请求
         @details 推导 year/season 后执行 INSERT ON CONFLICT DO NOTHING；
                  写入成功时返回携带 db_id 的封面图请求，已存在时静默返回 None 终止链路。
         @param task 待写入的番剧基础信息数据包
-        @return 携带 db_id 的 SingleHttpxRequestData；bgm_id 已存在时返回 None
+        @return 携带 db_id 的 StreamHttpxRequestData；bgm_id 已存在时返回 None
         """
         year, season = self._derive_year_season(task.air_date)
         async with get_session() as session:
@@ -45,6 +49,7 @@ class BangumiSubjectMetaStorage(StorageBase[BangumiSubjectMetaStoreData]):
         if not row:
             return None
 
+        self._record_rows('subjects', 1)
         logger.info(f"写入 1 条 {type(task).__name__} 数据")
 
         if task.cover_url.strip() in ('', 'http://', 'https://'):
@@ -52,6 +57,36 @@ class BangumiSubjectMetaStorage(StorageBase[BangumiSubjectMetaStoreData]):
 
         return self._build_cover_request(task.cover_url, row[0])
 
+    async def _do_store_batch(self, tasks: Sequence[BangumiSubjectMetaStoreData]) -> list[StreamHttpxRequestData]:
+        """
+        @brief 以单条多行 INSERT 写入一批番剧基础信息并返回封面图下载请求
+        @details 同一 bgm_id 出现多次时以最后一条为准；已存在的 bgm_id 由 ON CONFLICT DO NOTHING 跳过，
+                 不出现在 RETURNING 结果中，也不产出封面图请求。
+        @param tasks 番剧基础信息数据包序列
+        @return 新插入行的封面图请求列表
+        """
+        by_bgm_id: dict[int, BangumiSubjectMetaStoreData] = {task.bgm_id: task for task in tasks}
+        async with get_session() as session:
+            result = await session.execute(
+                insert(Subject).values([
+                    self._subject_values(task, *self._derive_year_season(task.air_date)) for task in by_bgm_id.values()
+                ])
+                .on_conflict_do_nothing(index_elements=['bgm_id'])
+                .returning(Subject.id, Subject.bgm_id)
+            )
+            rows = result.fetchall()
+            await session.commit()
+
+        self._record_rows('subjects', len(rows))
+        logger.info(f"批量写入 {len(rows)} 条 {type(tasks[0]).__name__} 数据（提交 {len(by_bgm_id)} 条）")
+
+        requests: list[StreamHttpxRequestData] = []
+        for db_id, bgm_id in rows:
+            cover_url: str = by_bgm_id[bgm_id].cover_url
+            if cover_url.strip() not in ('', 'http://', 'https://'):
+                requests.append(self._build_cover_request(cover_url, db_id))
+        return requests
+
     @staticmethod
     def _derive_year_season(air_date: date | None) -> tuple[int | None, SeasonType | None]:
         """
@@ -73,7 +108,31 @@ class BangumiSubjectMetaStorage(StorageBase[BangumiSubjectMetaStoreData]):
                 return air_date.year, SeasonType.fall
 
     @staticmethod
-    async def _insert_subject(session: AsyncSession, task: BangumiSubjectMetaStoreData, year: int | None, season: SeasonType | None):
+    def _subject_values(task: BangumiSubjectMetaStoreData, year: int | None, season: SeasonType | None) -> dict[str, Any]:
+        """
+        @brief 构造 subjects 表一行的列值
+        @param task 番剧基础信息数据包
+        @param year 推导出的播出年份，可为 None
+        @param season 推导出的播出季节，可为 None
+        @return 列名 → 值 的映射
+        """
+        return {
+            'bgm_id': task.bgm_id,
+            'url': task.url,
+            'name': task.name,
+            'translation': task.translation,
+            'air_date': task.air_date,
+            'year': year,
+            'season': season,
+            'summary': task.summary,
+            'aliases': list(task.aliases),
+            'tags': list(task.tags),
+            'infobox': task.infobox,
+            'cover_url': task.cover_url,
+        }
+
+    @classmethod
+    async def _insert_subject(cls, session: AsyncSession, task: BangumiSubjectMetaStoreData, year: int | None, season: SeasonType | None):
         """
         @brief 执行 INSERT ON CONFLICT DO NOTHING RETURNING id
         @param session 异步数据库会话
@@ -83,20 +142,8 @@ class BangumiSubjectMetaStorage(StorageBase[BangumiSubjectMetaStoreData]):
         @return 含 subjects.id 的 Row 对象；bgm_id 冲突时返回 None
         """
         result = await session.execute(
-            insert(Subject).values(
-                bgm_id=task.bgm_id,
-                url=task.url,
-                name=task.name,
-                translation=task.translation,
-                air_date=task.air_date,
-                year=year,
-                season=season,
-                summary=task.summary,
-                aliases=list(task.aliases),
-                tags=list(task.tags),
-                infobox=task.infobox,
-                cover_url=task.cover_url,
-            ).on_conflict_do_nothing(index_elements=['bgm_id'])
+            insert(Subject).values(**cls._subject_values(task, year, season))
+            .on_conflict_do_nothing(index_elements=['bgm_id'])
             .returning(Subject.id)
         )
 
@@ -104,20 +151,22 @@ class BangumiSubjectMetaStorage(StorageBase[BangumiSubjectMetaStoreData]):
         return result.fetchone()
 
     @staticmethod
-    def _build_cover_request(cover_url: str, db_id: int) -> SingleHttpxRequestData:
+    def _build_cover_request(cover_url: str, db_id: int) -> StreamHttpxRequestData:
         """
         @brief 构造封面图下载请求
+        @details 封面图以流式下载落盘，大小上限取 [bangumi] cover_max_mb（默认 10 MB）。
         @param cover_url 封面图原始 URL
         @param db_id subjects 表自增主键，写入 meta 供后续存储器定位目标行
-        @return 携带 db_id 的 SingleHttpxRequestData
+        @return 携带 db_id 的 StreamHttpxRequestData
         """
-        return SingleHttpxRequestData(
+        return StreamHttpxRequestData(
             retry=config.getint('bangumi', 'retry'),
             request=httpx.Request(
                 'GET',
                 cover_url,
                 headers={'User-Agent': config.get('bangumi', 'user_agent')},
             ),
+            max_bytes=config.getint('bangumi', 'cover_max_mb', fallback=10) << 20,
             meta={'db_id': db_id},
         )
 
@@ -6,18 +6,25 @@
          handle() 作为纯兜底保护，捕获未预期异常后以 logger.error 记录并返回 None；
          子类在 _do_store() 中实现实际写入逻辑和内部类型分发。
          签名与总线契约保持一致，允许子类产出后续任务；通常情况下返回 None 使链路在此终止。
+         子类写入完成后调用 _record_rows() 上报写入行数指标。
+         批量入口 handle_batch() 调用 _do_store_batch()，子类可覆写后者以单条多行语句、单次提交写入整批；
+         批量写入失败时回退为逐条 handle()，避免一条坏数据拖累整批。
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from logging import getLogger
 from typing import Iterable
 
 from base import HandlerBase
 from data.request import RequestBaseData
 from data.store import StoreBaseData
+from metrics import metrics
 
 logger = getLogger(__name__)
 
+_ROWS_WRITTEN = metrics.counter('storage_rows_written_total', '存储器写入的行数', ('storage', 'table'))
+
 
 class StorageBase[T: StoreBaseData](HandlerBase[T], ABC):
     """
@@ -41,6 +48,34 @@ class StorageBase[T: StoreBaseData](HandlerBase[T], ABC):
             logger.error(f'存储任务 {type(task).__name__} 时发生未预期异常，任务已丢弃：{e}', exc_info=True)
             return None
 
+    async def handle_batch(self, tasks: Sequence[T]) -> Iterable[RequestBaseData | None] | RequestBaseData | None:
+        """
+        @brief 兜底保护：调用 _do_store_batch()，未预期异常时回退为逐条写入
+        @param tasks 同一类型的存储数据包序列
+        @return _do_store_batch() 的返回值；回退时为逐条写入结果的合并
+        """
+        try:
+            return await self._do_store_batch(tasks)
+        except Exception as e:
+            logger.warning(f'批量存储 {len(tasks)} 条 {type(tasks[0]).__name__} 失败，回退为逐条写入：{e}', exc_info=True)
+            return await super().handle_batch(tasks)
+
+    async def _do_store_batch(self, tasks: Sequence[T]) -> Iterable[RequestBaseData | None] | RequestBaseData | None:
+        """
+        @brief 批量写入（子类可选覆写）
+        @details 默认逐条调用 _do_store()，不减少往返次数；覆写时须保证整批在同一事务内完成。
+        @param tasks 同一类型的存储数据包序列
+        @return 全部后续任务
+        """
+        results: list[RequestBaseData | None] = []
+        for task in tasks:
+            result = await self._do_store(task)
+            if isinstance(result, Iterable):
+                results.extend(result)
+            else:
+                results.append(result)
+        return results
+
     @abstractmethod
     async def _do_store(self, task: T) -> Iterable[RequestBaseData] | RequestBaseData | None:
         """
@@ -53,6 +88,14 @@ class StorageBase[T: StoreBaseData](HandlerBase[T], ABC):
         @throws OSError 子类内部处理，不向 handle() 抛出
         """
 
+    def _record_rows(self, table: str, count: int) -> None:
+        """
+        @brief 上报本次写入的行数
+        @param table 目标表名
+        @param count 实际写入（或更新）的行数
+        """
+        _ROWS_WRITTEN.labels(type(self).__name__, table).inc(count)
+
 
 if __name__ == '__main__':
     pass
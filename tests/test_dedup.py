@@ -0,0 +1,55 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 已见集合回归测试
+@details 确认共用同一 URL 的不同下游记录互不跳过，声明 revisit 的种子请求不受已见集合影响。
+"""
+
+import httpx
+
+from data.request import SingleHttpxRequestData, StreamHttpxRequestData
+from requester.dedup import DedupConfig, Deduplicator
+from requester.http import SingleHttpRequester, StreamHttpRequester
+
+_COVER: str = 'https://lain.bgm.tv/pic/cover/l/00/00/1.jpg'
+_CALENDAR: str = 'https://api.bgm.tv/calendar'
+
+
+def _dedup(tmp_path) -> Deduplicator:
+    """
+    @brief 构造启用已见集合的去重器
+    @param tmp_path pytest 临时目录
+    @return 去重器
+    """
+    return Deduplicator(DedupConfig(seen_path=str(tmp_path / 'seen.bin'), seen_slots=1024))
+
+
+def test_shared_cover_is_fetched_for_each_subject(tmp_path) -> None:
+    """
+    @brief 条目 1 的封面已取得后，条目 2 的同一封面 URL 仍须请求，条目 1 的重复请求被跳过
+    """
+    requester = StreamHttpRequester(None, None, dedup=_dedup(tmp_path))
+    first, second = (
+        StreamHttpxRequestData(retry=3, request=httpx.Request('GET', _COVER), max_bytes=1 << 20, meta={'db_id': db_id})
+        for db_id in (1, 2)
+    )
+    requester._dedup.mark(first.request, first.meta, 200)
+
+    assert requester._seen(first, first.request)
+    assert not requester._seen(second, second.request)
+
+
+def test_revisit_bypasses_seen_set(tmp_path) -> None:
+    """
+    @brief 已取得的种子请求在有效期内重新运行时照常发出
+    """
+    requester = SingleHttpRequester(None, None, dedup=_dedup(tmp_path))
+    seed = SingleHttpxRequestData(retry=3, request=httpx.Request('GET', _CALENDAR), revisit=True)
+    requester._dedup.mark(seed.request, seed.meta, 200)
+
+    assert not requester._seen(seed, seed.request)
+    assert requester._seen(SingleHttpxRequestData(retry=3, request=httpx.Request('GET', _CALENDAR)), seed.request)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,75 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief HTTP 条件请求缓存回归测试
+@details 本地无缓存时不得发出请求方自带的条件头；304 重建的响应须保留 Set-Cookie 等可重复的头部。
+"""
+
+import asyncio
+
+import httpx
+
+from requester.cache import HttpCache, HttpCacheConfig
+
+_URL: str = 'https://api.bgm.tv/v0/subjects/1'
+
+
+def _cache(tmp_path) -> HttpCache:
+    """
+    @brief 构造并打开临时缓存
+    @param tmp_path pytest 临时目录
+    @return 已打开的缓存
+    """
+    cache = HttpCache(HttpCacheConfig(path=str(tmp_path / 'cache.db')))
+    cache.open()
+    return cache
+
+
+def test_miss_strips_caller_conditionals(tmp_path) -> None:
+    """
+    @brief 未命中时去掉请求方自带的 If-None-Match / If-Modified-Since，原请求不变
+    """
+    cache = _cache(tmp_path)
+    request = httpx.Request('GET', _URL, headers={
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Sat, 01 Jan 2000 00:00:00 GMT', 'Accept': 'application/json',
+    })
+    try:
+        sent, entry = asyncio.run(cache.prepare(request))
+    finally:
+        cache.close()
+
+    assert entry is None
+    assert 'If-None-Match' not in sent.headers
+    assert 'If-Modified-Since' not in sent.headers
+    assert sent.headers['Accept'] == 'application/json'
+    assert request.headers['If-None-Match'] == '"v1"'
+
+
+def test_revalidated_response_keeps_repeated_headers(tmp_path) -> None:
+    """
+    @brief 缓存中的两条 Set-Cookie 在 304 重建后仍为两条，304 的同名头部覆盖缓存值
+    """
+    cache = _cache(tmp_path)
+    request = httpx.Request('GET', _URL)
+
+    async def scenario() -> httpx.Response:
+        sent, entry = await cache.prepare(request)
+        fresh = httpx.Response(200, request=sent, content=b'{}', headers=[
+            ('ETag', '"v1"'), ('Set-Cookie', 'a=1'), ('Set-Cookie', 'b=2'), ('Date', 'old'),
+        ])
+        await cache.resolve(request, fresh, entry)
+
+        sent, entry = await cache.prepare(request)
+        assert sent.headers['If-None-Match'] == '"v1"'
+        not_modified = httpx.Response(304, request=sent, headers=[('ETag', '"v1"'), ('Date', 'new')])
+        return await cache.resolve(request, not_modified, entry)
+
+    try:
+        rebuilt = asyncio.run(scenario())
+    finally:
+        cache.close()
+
+    assert rebuilt.status_code == 200
+    assert rebuilt.content == b'{}'
+    assert rebuilt.headers.get_list('Set-Cookie') == ['a=1', 'b=2']
+    assert rebuilt.headers.get_list('Date') == ['new']
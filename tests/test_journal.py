@@ -0,0 +1,114 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 任务日志回归测试
+@details 确认记录与其入队记录分属不同段时，回收段文件后重启不得重放已确认的任务；
+         数据类字段变化后无法还原的记录须确认丢弃，不得中断重放。
+"""
+
+import httpx
+import pytest
+
+import journal as journal_module
+from data.codec import CodecError, decode_task, encode_task
+from data.request import SingleHttpxRequestData
+from journal import JournalConfig, TaskJournal
+
+
+def _task(index: int) -> SingleHttpxRequestData:
+    """
+    @brief 构造测试任务
+    @param index 序号，写入 URL 以区分任务
+    @return 请求任务
+    """
+    return SingleHttpxRequestData(retry=3, request=httpx.Request('GET', f'https://api.bgm.tv/v0/subjects/{index}'))
+
+
+def test_acks_survive_segment_reclaim(tmp_path) -> None:
+    """
+    @brief 切换段 → 在新段确认旧段的任务 → 新段被回收 → 重启，只重放未确认的任务
+    @details 每追加一个任务即确认上一个（首个任务始终不确认），段尾任务的确认记录因此落在下一个段；
+             下一个段的任务随后也全部确认，回收该段不得丢失这些跨段的确认记录。
+    """
+    config = JournalConfig(directory=str(tmp_path), segment_bytes=400)
+    journal = TaskJournal(config)
+    journal.open()
+    first = journal.append(_task(0))
+    previous = None
+    for i in range(1, 30):
+        record_id = journal.append(_task(i))
+        if previous is not None:
+            journal.ack(previous)
+        previous = record_id
+    journal.ack(previous)
+    assert journal.pending == 1
+    journal.close()
+
+    reopened = TaskJournal(config)
+    assert reopened.open() == 1
+    assert [record_id for record_id, _ in reopened.recovered()] == [first]
+    reopened.close()
+
+
+def test_compaction_keeps_pending_tasks(tmp_path) -> None:
+    """
+    @brief 最旧段存活比例过低被压缩后，未确认任务仍能重放且内容不变
+    """
+    config = JournalConfig(directory=str(tmp_path), segment_bytes=400, compact_ratio=0.5)
+    journal = TaskJournal(config)
+    journal.open()
+    record_ids = [journal.append(_task(i)) for i in range(12)]
+    for record_id in record_ids:
+        if record_id % 4:
+            journal.ack(record_id)
+    pending = sorted(r for r in record_ids if r % 4 == 0)
+    assert journal.pending == len(pending)
+    journal.close()
+
+    reopened = TaskJournal(config)
+    assert reopened.open() == len(pending)
+    recovered = list(reopened.recovered())
+    assert [record_id for record_id, _ in recovered] == pending
+    assert [str(task.request.url) for _, task in recovered] == [str(_task(r - 1).request.url) for r in pending]
+    reopened.close()
+
+
+def _stale_payload(task: SingleHttpxRequestData) -> bytes:
+    """
+    @brief 模拟旧版本写入的记录：retry 字段在当前数据类中已不存在
+    @param task 请求任务
+    @return 字段名被改写的编码结果（等长替换，长度前缀仍有效）
+    """
+    return encode_task(task).replace(b'"retry"', b'"retrz"')
+
+
+def test_stale_record_is_codec_error() -> None:
+    """
+    @brief 构造参数与数据类不匹配时抛出 CodecError，而非裸 TypeError
+    """
+    with pytest.raises(CodecError):
+        decode_task(_stale_payload(_task(0)))
+
+
+def test_stale_record_is_dropped_on_recovery(tmp_path, monkeypatch) -> None:
+    """
+    @brief 无法还原的记录在重放时确认丢弃，其后的任务照常重放，再次重启不再出现
+    """
+    config = JournalConfig(directory=str(tmp_path))
+    journal = TaskJournal(config)
+    journal.open()
+    monkeypatch.setattr(journal_module, 'encode_task', _stale_payload)
+    journal.append(_task(0))
+    monkeypatch.undo()
+    kept = journal.append(_task(1))
+    journal.close()
+
+    reopened = TaskJournal(config)
+    assert reopened.open() == 2
+    assert [record_id for record_id, _ in reopened.recovered()] == [kept]
+    assert reopened.pending == 1
+    reopened.close()
+
+    again = TaskJournal(config)
+    assert again.open() == 1
+    again.close()
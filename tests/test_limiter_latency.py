@@ -0,0 +1,99 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 限速器延迟信号回归测试
+@details 确认流式下载反馈给限速器的延迟不含响应体传输，大小不一的封面图不会被当作拥塞。
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import httpx
+
+from data.request import StreamHttpxRequestData
+from requester.http import StreamHttpRequester
+
+
+class _Clients(object):
+    """
+    @brief 所有主机共用一个以 MockTransport 应答的客户端
+    """
+
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self._client = client
+
+    def get(self, host: str) -> httpx.AsyncClient:
+        return self._client
+
+
+class _Limiter(object):
+    """
+    @brief 记录反馈延迟的限速器替身
+    """
+
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        yield
+
+    def record_response(self, status: int, latency: float, retry_after: str | None) -> None:
+        self.latencies.append(latency)
+
+    def record_timeout(self) -> None:
+        pass
+
+
+class _Limiters(object):
+    """
+    @brief 所有主机共用一个限速器
+    """
+
+    def __init__(self, limiter: _Limiter) -> None:
+        self._limiter = limiter
+
+    def get(self, host: str) -> _Limiter:
+        return self._limiter
+
+
+class _SlowBody(httpx.AsyncByteStream):
+    """
+    @brief 分块缓慢送达的响应体
+    """
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for _ in range(5):
+            await asyncio.sleep(0.04)
+            yield b'x' * 1024
+
+
+async def _download(tmp_path) -> list[float]:
+    """
+    @brief 流式下载一张缓慢送达的图片
+    @param tmp_path pytest 临时目录
+    @return 限速器收到的延迟
+    """
+    limiter = _Limiter()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=_SlowBody()))
+    async with httpx.AsyncClient(transport=transport) as client:
+        requester = StreamHttpRequester(_Clients(client), _Limiters(limiter), spool_dir=str(tmp_path))
+        request = httpx.Request('GET', 'https://lain.bgm.tv/pic/cover/l/1.jpg')
+        result = await requester.handle(StreamHttpxRequestData(retry=1, request=request, max_bytes=1 << 20))
+    assert result is not None and result.body.size == 5 * 1024
+    return limiter.latencies
+
+
+def test_streamed_body_excluded_from_limiter_latency(tmp_path) -> None:
+    """
+    @brief 响应体传输约 0.2 秒，限速器收到的延迟只计到响应头
+    """
+    latencies = asyncio.run(_download(tmp_path))
+
+    assert len(latencies) == 1
+    assert latencies[0] < 0.1
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,66 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 批量请求器取消回归测试
+@details 确认批量请求在已产出部分响应后被处理期限取消时，未完成的请求仍以重试任务的形式交还总线。
+"""
+
+import asyncio
+from collections.abc import Mapping
+from typing import Any
+
+import httpx
+
+from data.request import BatchHttpxRequestData
+from data.response import HttpxResponseData
+from requester.http import BatchHttpRequester
+
+
+class _StallingRequester(BatchHttpRequester):
+    """
+    @brief 路径以 /slow 开头的请求永不完成，其余请求立即返回 200
+    """
+
+    async def _send(self, request: httpx.Request, meta: Mapping[str, Any]) -> httpx.Response:
+        if request.url.path.startswith('/slow'):
+            await asyncio.Event().wait()
+        return httpx.Response(200, request=request)
+
+
+async def _drain(task: BatchHttpxRequestData, deadline: float) -> list:
+    """
+    @brief 像 Bus 一样在期限内迭代处理器的产出
+    @param task 批量请求任务
+    @param deadline 期限（秒）
+    @return 取消前后产出的全部任务
+    """
+    requester = _StallingRequester(None, None)
+    produced: list = []
+    try:
+        async with asyncio.timeout(deadline):
+            async for item in await requester.handle(task):
+                produced.append(item)
+    except TimeoutError:
+        pass
+    return produced
+
+
+def test_timed_out_batch_retries_unanswered_requests() -> None:
+    """
+    @brief 期限到期时已完成的响应保留，未完成的请求组成递减 retry 的重试批次
+    """
+    requests = [httpx.Request('GET', f'https://api.bgm.tv/{path}') for path in ('fast/1', 'slow/1', 'fast/2', 'slow/2')]
+    task = BatchHttpxRequestData(retry=3, requests=requests, max_concurrent=4)
+
+    produced = asyncio.run(_drain(task, 0.05))
+
+    responses = [item for item in produced if isinstance(item, HttpxResponseData)]
+    retries = [item for item in produced if isinstance(item, BatchHttpxRequestData)]
+    assert len(responses) == 2
+    assert len(retries) == 1
+    assert retries[0].requests == [requests[1], requests[3]]
+    assert retries[0].retry == 2
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,37 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 路由表主机正则合并回归测试
+@details 带全局内联标志、捕获组或反向引用的主机正则不得使路由表构造失败，且匹配语义与注册顺序保持不变。
+"""
+
+import re
+
+from data.gateway import BangumiApiGatewayData, BangumiCoverGatewayData
+from data.parse import BangumiCalendarParseData, BangumiCoverParseData
+from router.table import Route, RouteTable
+
+
+def test_inline_global_flag() -> None:
+    """
+    @brief (?i) 开头的主机正则可与其他正则合并，且仍不区分大小写
+    """
+    table = RouteTable([
+        Route(re.compile(r'(?i)api\.example\.com'), '/calendar', BangumiApiGatewayData, BangumiCalendarParseData),
+        Route(re.compile(r'img\d+\.example\.com'), '/{path*}', BangumiCoverGatewayData, BangumiCoverParseData),
+    ])
+    assert table.site_of('API.Example.com') is BangumiApiGatewayData
+    assert table.site_of('img3.example.com') is BangumiCoverGatewayData
+    assert table.site_of('IMG3.example.com') is None
+
+
+def test_backreference_keeps_order() -> None:
+    """
+    @brief 含反向引用的正则单独匹配，先注册者仍优先于其后合并的正则
+    """
+    table = RouteTable([
+        Route(re.compile(r'(\w+)\.\1\.example\.com'), '/calendar', BangumiApiGatewayData, BangumiCalendarParseData),
+        Route(re.compile(r'\w+\.\w+\.example\.com'), '/{path*}', BangumiCoverGatewayData, BangumiCoverParseData),
+    ])
+    assert table.site_of('ab.ab.example.com') is BangumiApiGatewayData
+    assert table.site_of('ab.cd.example.com') is BangumiCoverGatewayData
@@ -0,0 +1,109 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 落盘响应体回归测试
+@details 确认链路在任意环节终止时落盘文件随之删除，转交下游的文件保留到最终消费者。
+"""
+
+import asyncio
+from pathlib import Path
+
+import httpx
+
+from base import HandlerBase
+from bus import Bus, BusConfig
+from data.gateway import BangumiCoverGatewayData
+from data.response import FileBody, HttpxResponseData
+from data.request import StreamHttpxRequestData
+from data.store import BangumiCoverStoreData
+
+
+class _Drop(HandlerBase):
+    """
+    @brief 不产出后续任务的处理器，inline 由构造参数决定
+    """
+
+    def __init__(self, inline: bool = False) -> None:
+        self.inline = inline
+
+    async def handle(self, task):
+        return None
+
+
+class _Fail(HandlerBase):
+    """
+    @brief 总是抛出异常的处理器
+    """
+
+    async def handle(self, task):
+        raise RuntimeError('boom')
+
+
+class _Forward(HandlerBase):
+    """
+    @brief 把响应体转交给落库数据包的处理器
+    """
+
+    async def handle(self, task):
+        return BangumiCoverStoreData(db_id=1, image_file=task.body)
+
+
+def _response(tmp_path: Path, name: str) -> HttpxResponseData:
+    """
+    @brief 构造持有落盘响应体的响应数据包
+    @param tmp_path pytest 临时目录
+    @param name 文件名
+    @return 响应数据包
+    """
+    path = tmp_path / name
+    path.write_bytes(b'image')
+    request = httpx.Request('GET', f'https://lain.bgm.tv/{name}')
+    task = StreamHttpxRequestData(retry=1, request=request, max_bytes=1 << 20)
+    return HttpxResponseData(task=task, response=httpx.Response(200, request=request), body=FileBody(str(path), 5))
+
+
+def _run(registry: dict, seeds: list) -> None:
+    """
+    @brief 以一次性模式运行总线直到空闲
+    @param registry 类型 → 处理器映射
+    @param seeds 种子任务
+    """
+    asyncio.run(Bus(BusConfig(dispatch_registry=registry, max_concurrent_tasks=4)).run_until_idle(seeds))
+
+
+def test_bodies_removed_when_chain_ends(tmp_path) -> None:
+    """
+    @brief 处理器丢弃、抛出异常、内联丢弃与无处理器时，落盘文件均被删除
+    """
+    dropped, failed = _response(tmp_path, 'dropped'), _response(tmp_path, 'failed')
+    _run({HttpxResponseData: _Drop()}, [dropped])
+    _run({HttpxResponseData: _Fail()}, [failed])
+    unrouted = _response(tmp_path, 'unrouted')
+    _run({HttpxResponseData: _Forward(), BangumiCoverStoreData: _Drop(inline=True)}, [unrouted])
+    orphan = _response(tmp_path, 'orphan')
+    gateway = BangumiCoverGatewayData(task=orphan.task, response=orphan.response, meta={}, body=orphan.body)
+    _run({}, [gateway])
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_forwarded_body_is_kept(tmp_path) -> None:
+    """
+    @brief 转交给下游的文件在上游处理结束后保留，最终消费者处理完后删除
+    """
+    forwarded = _response(tmp_path, 'forwarded')
+    seen: list[bool] = []
+
+    class _Check(HandlerBase):
+        async def handle(self, task):
+            seen.append(Path(task.image_file.path).exists())
+            return None
+
+    _run({HttpxResponseData: _Forward(), BangumiCoverStoreData: _Check()}, [forwarded])
+
+    assert seen == [True]
+    assert not Path(forwarded.body.path).exists()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,16 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief tracing 包统一导出入口
+@details 导出 Tracer 及其配置与上下文类型，供 Bus 创建 span、main.py 装配追踪器。
+         追踪文件的分析工具见 tracing.analyze（python -m tracing.analyze）。
+"""
+
+from tracing.tracer import Span, SpanContext, Tracer, TracerConfig
+
+__all__ = [
+    "Span",
+    "SpanContext",
+    "Tracer",
+    "TracerConfig",
+]
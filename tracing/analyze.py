@@ -0,0 +1,219 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 追踪文件分析工具
+@details 读取 Tracer 输出的 JSONL 文件（可同时传入多个轮转文件），按 trace 重建 span 树，输出：
+         - 各阶段（处理器 + 任务类型）的排队耗时与处理耗时统计，按处理耗时总和降序；
+         - 耗时最长的若干条链路的关键路径：从根 span 出发，每一层选择子树结束最晚的子 span，
+           该路径上的排队与处理耗时之和即为整条链路的完成时间。
+         用法：python -m tracing.analyze traces.jsonl [traces.jsonl.1 ...] [--top 1] [--json]
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+logger = getLogger(__name__)
+
+_NS_PER_MS: float = 1e6
+
+
+@dataclass
+class _Node(object):
+    """
+    @brief span 树节点
+    """
+    span: dict[str, Any]                                 # 原始 span 记录
+    children: list['_Node'] = field(default_factory=list)  # 子节点
+    subtree_end: int = 0                                 # 子树内最晚的结束时刻
+
+    @property
+    def queue_ms(self) -> float:
+        """
+        @brief 排队耗时（毫秒）：入队到开始处理
+        """
+        return (self.span['startTimeUnixNano'] - self.span['enqueuedTimeUnixNano']) / _NS_PER_MS
+
+    @property
+    def run_ms(self) -> float:
+        """
+        @brief 处理耗时（毫秒）：开始处理到 handle() 返回
+        """
+        return (self.span['endTimeUnixNano'] - self.span['startTimeUnixNano']) / _NS_PER_MS
+
+
+def load_spans(paths: Iterable[str]) -> list[dict[str, Any]]:
+    """
+    @brief 读取 JSONL 追踪文件，跳过无法解析的行
+    @param paths 文件路径
+    @return span 记录列表
+    """
+    spans: list[dict[str, Any]] = []
+    for path in paths:
+        with Path(path).open(encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    spans.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f'{path}:{line_no} 不是合法的 JSON，已跳过')
+    return spans
+
+
+def build_traces(spans: Iterable[dict[str, Any]]) -> dict[str, list[_Node]]:
+    """
+    @brief 按 traceId 重建 span 树
+    @details 父 span 缺失（如被轮转删除）的节点视为根节点。
+    @param spans span 记录
+    @return traceId → 根节点列表
+    """
+    by_trace: dict[str, dict[str, _Node]] = defaultdict(dict)
+    for span in spans:
+        by_trace[span['traceId']][span['spanId']] = _Node(span)
+
+    roots: dict[str, list[_Node]] = {}
+    for trace_id, nodes in by_trace.items():
+        trace_roots: list[_Node] = []
+        for node in nodes.values():
+            parent: _Node | None = nodes.get(node.span['parentSpanId'])
+            (parent.children if parent is not None else trace_roots).append(node)
+        for root in trace_roots:
+            _fill_subtree_end(root)
+        roots[trace_id] = trace_roots
+    return roots
+
+
+def _fill_subtree_end(root: _Node) -> None:
+    """
+    @brief 后序遍历计算每个节点的子树结束时刻（迭代实现，避免深链路递归过深）
+    @param root 根节点
+    """
+    stack: list[tuple[_Node, bool]] = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if visited:
+            node.subtree_end = max([node.span['endTimeUnixNano'], *(c.subtree_end for c in node.children)])
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children)
+
+
+def critical_path(root: _Node) -> list[_Node]:
+    """
+    @brief 求关键路径：每一层选择子树结束最晚的子节点
+    @param root 根节点
+    @return 从根到叶的节点列表
+    """
+    path: list[_Node] = [root]
+    while path[-1].children:
+        path.append(max(path[-1].children, key=lambda c: c.subtree_end))
+    return path
+
+
+def stage_stats(spans: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    @brief 按 (处理器, 任务类型) 汇总排队与处理耗时
+    @param spans span 记录
+    @return 各阶段统计，按处理耗时总和降序
+    """
+    stages: dict[tuple[str, str], list[_Node]] = defaultdict(list)
+    for span in spans:
+        stages[(span['name'], span['task'])].append(_Node(span))
+
+    rows: list[dict[str, Any]] = []
+    for (handler, task), nodes in stages.items():
+        run = sorted(n.run_ms for n in nodes)
+        queue = sorted(n.queue_ms for n in nodes)
+        rows.append({
+            'handler': handler,
+            'task': task,
+            'count': len(nodes),
+            'run_total_ms': sum(run),
+            'run_mean_ms': sum(run) / len(run),
+            'run_p95_ms': _percentile(run, 0.95),
+            'run_max_ms': run[-1],
+            'queue_mean_ms': sum(queue) / len(queue),
+            'queue_p95_ms': _percentile(queue, 0.95),
+            'exceptions': sum(1 for n in nodes if n.span.get('outcome') == 'exception'),
+        })
+    rows.sort(key=lambda row: row['run_total_ms'], reverse=True)
+    return rows
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """
+    @brief 已排序序列的最近秩分位数
+    @param values 升序数值
+    @param q 分位 0.0 ~ 1.0
+    @return 分位值
+    """
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def analyze(spans: list[dict[str, Any]], top: int) -> dict[str, Any]:
+    """
+    @brief 生成分析报告
+    @param spans span 记录
+    @param top 输出关键路径的链路条数
+    @return 报告字典，含 stages 与 critical_paths
+    """
+    roots: list[_Node] = [root for trace_roots in build_traces(spans).values() for root in trace_roots]
+    roots.sort(key=lambda r: r.subtree_end - r.span['enqueuedTimeUnixNano'], reverse=True)
+
+    paths: list[dict[str, Any]] = []
+    for root in roots[:top]:
+        path = critical_path(root)
+        paths.append({
+            'trace_id': root.span['traceId'],
+            'total_ms': (root.subtree_end - root.span['enqueuedTimeUnixNano']) / _NS_PER_MS,
+            'hops': [
+                {'handler': n.span['name'], 'task': n.span['task'], 'queue_ms': n.queue_ms, 'run_ms': n.run_ms}
+                for n in path
+            ],
+        })
+    return {'spans': len(spans), 'traces': len(roots), 'stages': stage_stats(spans), 'critical_paths': paths}
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    """
+    @brief 以文本表格输出报告
+    @param report analyze() 的返回值
+    """
+    print(f"共 {report['spans']} 个 span，{report['traces']} 条链路\n")
+    print('最慢阶段（按处理耗时总和）：')
+    print(f"{'处理器':<32}{'任务类型':<36}{'次数':>8}{'总耗时ms':>12}{'均值ms':>10}{'P95ms':>10}{'排队均值ms':>12}{'异常':>6}")
+    for row in report['stages']:
+        print(
+            f"{row['handler']:<32}{row['task']:<36}{row['count']:>8}{row['run_total_ms']:>12.1f}"
+            f"{row['run_mean_ms']:>10.2f}{row['run_p95_ms']:>10.2f}{row['queue_mean_ms']:>12.2f}{row['exceptions']:>6}"
+        )
+
+    for path in report['critical_paths']:
+        print(f"\n关键路径 trace={path['trace_id']} 总耗时 {path['total_ms']:.1f} ms：")
+        for hop in path['hops']:
+            print(f"  {hop['handler']:<32}{hop['task']:<36}排队 {hop['queue_ms']:>9.2f} ms  处理 {hop['run_ms']:>9.2f} ms")
+
+
+def main() -> None:
+    """
+    @brief 命令行入口
+    """
+    parser = argparse.ArgumentParser(description='分析任务追踪 JSONL 文件')
+    parser.add_argument('paths', nargs='+', help='追踪文件，可传入多个轮转文件')
+    parser.add_argument('--top', type=int, default=1, help='输出关键路径的链路条数（按总耗时降序）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出报告')
+    args = parser.parse_args()
+
+    report = analyze(load_spans(args.paths), args.top)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+"""
+@brief 任务血缘追踪
+@details 一次种子任务衍生出的全部任务构成一条 trace，每次处理器调用记为一个 span。
+         Bus 在处理任务时以其父 span 为上下文创建新 span，处理器返回的后续任务以当前 span 为父，
+         从而无需修改任何 data 类即可还原完整链路。
+         span 记录入队、开始、结束三个时间戳（Unix 纳秒），可区分排队耗时与处理耗时。
+         输出为按大小轮转的 JSONL 文件，每行一个 span，字段命名沿用 OTLP（traceId、spanId、
+         parentSpanId、startTimeUnixNano 等），便于转换导入其他追踪后端。
+         采样在根 span 处按 sample_rate 决定，未采样的链路仍传递上下文但不写文件。
+"""
+
+import json
+import random
+from dataclasses import dataclass, field
+from logging import DEBUG, Formatter, Logger, getLogger
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from time import time_ns
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TracerConfig(object):
+    """
+    @brief 追踪配置
+    @param path JSONL 输出文件路径
+    @param max_bytes 单个文件大小上限（字节），超过后轮转
+    @param backup_count 保留的历史文件数
+    @param sample_rate 根 span 采样率，0.0 ~ 1.0
+    """
+    path: str                  # JSONL 输出文件路径
+    max_bytes: int = 64 << 20  # 单个文件大小上限（字节）
+    backup_count: int = 5      # 保留的历史文件数
+    sample_rate: float = 1.0   # 根 span 采样率
+
+
+@dataclass(frozen=True)
+class SpanContext(object):
+    """
+    @brief 随任务传递的追踪上下文
+    @param trace_id 链路 ID（32 位十六进制）
+    @param span_id 产生该任务的 span ID（16 位十六进制）
+    @param sampled 链路是否被采样
+    """
+    trace_id: str  # 链路 ID
+    span_id: str   # 父 span ID
+    sampled: bool  # 是否采样
+
+
+@dataclass
+class Span(object):
+    """
+    @brief 一次处理器调用的追踪记录
+    @details 非 frozen，start_ns / end_ns / outcome / fan_out 在处理过程中由 Bus 填写。
+    """
+    context: SpanContext               # 本 span 的上下文，作为后续任务的父上下文
+    parent_span_id: str | None         # 父 span ID，根 span 为 None
+    handler: str                       # 处理器类名
+    task: str                          # 任务类名
+    enqueued_ns: int                   # 任务入队时刻
+    start_ns: int = 0                  # 取得并发槽位、开始处理的时刻
+    end_ns: int = 0                    # handle() 返回的时刻
+    outcome: str = ''                  # success / none / exception
+    fan_out: int = 0                   # 产出的后续任务数
+    attributes: dict[str, str | int] = field(default_factory=dict)  # 附加属性
+
+
+class Tracer(object):
+    """
+    @brief span 的创建与导出
+    @details 通过专用 Logger + RotatingFileHandler 写文件，复用标准库的轮转逻辑；
+             该 Logger 不向根 Logger 传播，不会混入业务日志。
+    """
+
+    def __init__(self, config: TracerConfig) -> None:
+        """
+        @brief 初始化追踪器并打开输出文件
+        @param config 追踪配置
+        """
+        self._sample_rate: float = config.sample_rate
+        Path(config.path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._handler = RotatingFileHandler(
+            config.path, maxBytes=config.max_bytes, backupCount=config.backup_count, encoding='utf-8',
+        )
+        self._handler.setFormatter(Formatter('%(message)s'))
+        self._output: Logger = getLogger(f'{__name__}.export')
+        self._output.setLevel(DEBUG)
+        self._output.propagate = False
+        self._output.addHandler(self._handler)
+
+    def start_span(self, parent: SpanContext | None, handler: str, task: str, enqueued_ns: int) -> Span:
+        """
+        @brief 创建 span
+        @details parent 为 None 时开启新链路并按采样率决定是否采样，否则继承父链路的 trace_id 与采样标记。
+        @param parent 父上下文
+        @param handler 处理器类名
+        @param task 任务类名
+        @param enqueued_ns 任务入队时刻（Unix 纳秒）
+        @return 新建的 span
+        """
+        if parent is None:
+            context = SpanContext(f'{random.getrandbits(128):032x}', f'{random.getrandbits(64):016x}', random.random() < self._sample_rate)
+            parent_span_id: str | None = None
+        else:
+            context = SpanContext(parent.trace_id, f'{random.getrandbits(64):016x}', parent.sampled)
+            parent_span_id = parent.span_id
+        return Span(context, parent_span_id, handler, task, enqueued_ns)
+
+    def finish(self, span: Span) -> None:
+        """
+        @brief 导出已完成的 span，未采样或未开始处理（等待槽位时被取消）时忽略
+        @param span 已填写结束时间的 span
+        """
+        if not span.context.sampled or not span.start_ns:
+            return
+        self._output.info(json.dumps({
+            'traceId': span.context.trace_id,
+            'spanId': span.context.span_id,
+            'parentSpanId': span.parent_span_id,
+            'name': span.handler,
+            'task': span.task,
+            'enqueuedTimeUnixNano': span.enqueued_ns,
+            'startTimeUnixNano': span.start_ns,
+            'endTimeUnixNano': span.end_ns or time_ns(),
+            'outcome': span.outcome,
+            'fanOut': span.fan_out,
+            'attributes': span.attributes,
+        }, ensure_ascii=False, separators=(',', ':')))
+
+    def close(self) -> None:
+        """
+        @brief 刷新并关闭输出文件
+        """
+        self._output.removeHandler(self._handler)
+        self._handler.close()
+
+
+if __name__ == '__main__':
+    pass